@@ -1,30 +1,273 @@
 """
 Django admin configuration for the Star Wars API application.
 Registers models and configures list display, search fields, and filters.
+
+The film, character and starship tables can hold millions of rows, so their
+admins never scan a whole table on a page load: filter choices are cached and
+refreshed in the background or after a sync (:func:`refresh_filter_choices`),
+result counts come from :class:`api.pagination.ApproximateCountPaginator`, and
+related objects are picked with autocomplete widgets instead of ``<select>``
+boxes listing every row.
 """
 
+import logging
+import threading
+
 from django.contrib import admin
-from .models import Film, Character, Starship
+from django.core.cache import cache
+from django.db import connections
+from django.utils.html import format_html, format_html_join
+from .models import Film, Character, Starship, ProfileReport, SyncRun, VoteTally
+from .pagination import ApproximateCountPaginator
+from .versions import get_version, table_version_name
+
+logger = logging.getLogger(__name__)
+
+FILTER_CHOICES_CACHE_TTL = 24 * 60 * 60
+
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def _choices_key(model, field_path):
+    return f"admin-choices:{model._meta.label_lower}:{field_path}"
+
+
+def _load_choices(model, field_path, max_choices):
+    """Reads and caches the first `max_choices` values of a column."""
+    version = get_version(table_version_name(model))
+    values = list(
+        model._default_manager.order_by(field_path)
+        .values_list(field_path, flat=True)
+        .distinct()[: max_choices + 1]
+    )
+    cache.set(
+        _choices_key(model, field_path),
+        {
+            "version": version,
+            "choices": values[:max_choices],
+            "truncated": len(values) > max_choices,
+        },
+        FILTER_CHOICES_CACHE_TTL,
+    )
+
+
+def _refresh(model, field_path, max_choices):
+    try:
+        _load_choices(model, field_path, max_choices)
+    except Exception:  # pylint: disable=broad-except
+        # The previous choices are served until a later page load retries
+        logger.exception("Could not load the %s filter choices", field_path)
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard((model, field_path))
+
+
+def _start_refresh(model, field_path, max_choices):
+    """Reloads the choices of a filter in a background thread."""
+    with _refreshing_lock:
+        if (model, field_path) in _refreshing:
+            return
+        _refreshing.add((model, field_path))
+
+    def run():
+        try:
+            _refresh(model, field_path, max_choices)
+        finally:
+            connections.close_all()
+
+    name = f"admin-choices-{field_path}"
+    threading.Thread(target=run, name=name, daemon=True).start()
+
+
+class CachedValuesFieldListFilter(admin.AllValuesFieldListFilter):
+    """Filter on the distinct values of a column, cached per table version.
+
+    Django's ``AllValuesFieldListFilter`` runs a ``SELECT DISTINCT`` over the
+    whole table on every page load. Here the values are read off the request
+    path: after a sync (:func:`refresh_filter_choices`), or in a background
+    thread once the table was written to (see
+    :func:`api.pagination.invalidate_counts`), while the previous values are
+    still offered. Only the first ``max_choices`` of them are listed, and the
+    title says so when there are more; the admin search finds the others.
+
+    Attributes:
+        max_choices (int): Maximum number of values listed in the filter.
+    """
+
+    max_choices = 200
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        cached = cache.get(_choices_key(model, field_path))
+        if cached is None or cached["version"] != get_version(
+            table_version_name(model)
+        ):
+            _start_refresh(model, field_path, self.max_choices)
+        if cached is None:
+            self.lookup_choices = []
+            self.title = f"{self.title} (loading values)"
+            return
+        self.lookup_choices = cached["choices"]
+        if cached["truncated"]:
+            self.title = (
+                f"{self.title} (first {self.max_choices} values, search for others)"
+            )
+
+
+class ScalableModelAdmin(admin.ModelAdmin):
+    """Admin for tables too large to count or scan on every page load.
+
+    Attributes:
+        paginator (Paginator): Paginator using cached or estimated counts.
+        show_full_result_count (bool): Disabled, as it counts the whole table.
+    """
+
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Film)
-class FilmAdmin(admin.ModelAdmin):
+class FilmAdmin(ScalableModelAdmin):
     """Admin panel configuration for the Film model."""
 
     list_display = ("title", "episode_id", "release_date", "director")
     search_fields = ("title", "director", "producer")
-    list_filter = ("release_date", "director")
+    list_filter = ("release_date", ("director", CachedValuesFieldListFilter))
+    autocomplete_fields = ("characters", "starships")
+
+
+class PilotedStarshipInline(admin.TabularInline):
+    """Edits the pilot relationship from the character side.
+
+    ``Starship.pilots`` owns the through table, so characters expose it inline.
+    """
+
+    model = Starship.pilots.through
+    extra = 0
+    autocomplete_fields = ("starship",)
+    verbose_name = "piloted starship"
+    verbose_name_plural = "piloted starships"
 
 
 @admin.register(Character)
-class CharacterAdmin(admin.ModelAdmin):
+class CharacterAdmin(ScalableModelAdmin):
     list_display = ("name", "gender", "birth_year", "homeworld")
     search_fields = ("name", "gender", "eye_color")
-    list_filter = ("gender", "eye_color", "hair_color")
+    list_filter = (
+        ("gender", CachedValuesFieldListFilter),
+        ("eye_color", CachedValuesFieldListFilter),
+        ("hair_color", CachedValuesFieldListFilter),
+    )
+    inlines = (PilotedStarshipInline,)
 
 
 @admin.register(Starship)
-class StarshipAdmin(admin.ModelAdmin):
+class StarshipAdmin(ScalableModelAdmin):
     list_display = ("name", "model", "manufacturer", "starship_class")
     search_fields = ("name", "model", "manufacturer")
-    list_filter = ("manufacturer", "starship_class")
+    list_filter = (
+        ("manufacturer", CachedValuesFieldListFilter),
+        ("starship_class", CachedValuesFieldListFilter),
+    )
+    autocomplete_fields = ("pilots",)
+
+
+def refresh_filter_choices():
+    """Reloads the choices of every cached filter, e.g. after a sync."""
+    registry = admin.site._registry  # pylint: disable=protected-access
+    for model, model_admin in registry.items():
+        for list_filter in model_admin.list_filter:
+            if isinstance(list_filter, tuple) and issubclass(
+                list_filter[1], CachedValuesFieldListFilter
+            ):
+                _load_choices(model, list_filter[0], list_filter[1].max_choices)
+
+
+@admin.register(VoteTally)
+class VoteTallyAdmin(admin.ModelAdmin):
+    """Read-only view of the flushed vote counts."""
+
+    list_display = ("kind", "object_id", "votes", "updated")
+    list_filter = ("kind",)
+    readonly_fields = ("kind", "object_id", "votes", "updated")
+
+
+@admin.register(ProfileReport)
+class ProfileReportAdmin(admin.ModelAdmin):
+    """Read-only view of the most recent on-demand profiling runs."""
+
+    list_display = (
+        "created",
+        "mode",
+        "method",
+        "path",
+        "status_code",
+        "duration_ms",
+        "user",
+    )
+    list_filter = ("mode",)
+    search_fields = ("path",)
+    fields = list_display + ("report",)
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description="stats")
+    def report(self, obj):
+        return format_html("<pre>{}</pre>", obj.stats)
+
+
+@admin.register(SyncRun)
+class SyncRunAdmin(admin.ModelAdmin):
+    """Read-only history of the ``fetch_swapi_data`` runs."""
+
+    list_display = (
+        "started",
+        "status",
+        "limit",
+        "duration_ms",
+        "http_requests",
+        "sql_queries",
+        "error_count",
+        "peak_memory_kb",
+    )
+    list_filter = ("status", "limit")
+    date_hierarchy = "started"
+    fields = list_display + ("finished", "http_bytes", "phase_table", "error_list")
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description="phases")
+    def phase_table(self, obj):
+        rows = format_html_join(
+            "",
+            "<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td>"
+            "<td>{}</td><td>{}</td><td>{}</td></tr>",
+            (
+                (
+                    name,
+                    round(phase.get("fetch_ms", 0)),
+                    round(phase.get("write_ms", 0)),
+                    phase.get("http_requests", 0),
+                    phase.get("http_bytes", 0),
+                    phase.get("sql_queries", 0),
+                    phase.get("row_delta", 0),
+                    phase.get("errors", 0),
+                )
+                for name, phase in obj.phases.items()
+            ),
+        )
+        return format_html(
+            "<table><tr><th>resource</th><th>fetch ms</th><th>write ms</th>"
+            "<th>requests</th><th>bytes</th><th>queries</th><th>row delta</th>"
+            "<th>errors</th></tr>{}</table>",
+            rows,
+        )
+
+    @admin.display(description="errors")
+    def error_list(self, obj):
+        return format_html("<pre>{}</pre>", "\n".join(obj.errors))
@@ -0,0 +1,220 @@
+"""
+In-process prefix index for type-ahead search.
+
+Search boxes send a request on every keystroke. Served by ``?search=``, each one
+scans the table with ``icontains``. ``/api/autocomplete/?q=`` answers them from
+a prefix index held by every worker:
+
+* For each kind, the normalized (case-folded, accent-free) character names, film
+  titles, and starship names and models are kept in two sorted arrays. One holds
+  whole values, the other the words inside them, so ``sky`` finds
+  ``Luke Skywalker``.
+* A lookup bisects to the first key starting with the query and reads forward,
+  so it costs ``O(log n + k)`` whatever the number of matches. Values starting
+  with the query rank before values with a later word starting with it, and
+  each group is in alphabetical order.
+
+The index of a kind is rebuilt when the table version of its model (see
+:mod:`api.versions`) changes, which every write and sync bumps. Lookups read
+the versions from the shared cache and never query the database. Workers build
+the indexes when they start (see ``gunicorn.conf.py``); only a worker without an
+index of a kind builds it on the request path. Afterwards, lookups keep being
+served from the previous index while one background thread per kind rebuilds
+it, until it matches the latest version, so a burst of writes costs a worker one
+or two rebuilds.
+
+Classes:
+    PrefixIndex: Sorted prefix index of the values of one kind.
+
+Functions:
+    normalize: Returns the form of a text that is indexed and looked up.
+    get_index: Returns the up-to-date index of a kind.
+    suggest: Returns the best matches of a query across kinds.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left
+
+from django.db import connections
+
+from .models import Character, Film, Starship
+from .versions import get_version, get_versions, table_version_name
+
+logger = logging.getLogger(__name__)
+
+# Kinds and the fields whose values are indexed; the first one is the label
+INDEXED_FIELDS = {
+    "character": (Character, ("name",)),
+    "film": (Film, ("title",)),
+    "starship": (Starship, ("name", "model")),
+}
+
+
+def normalize(text):
+    """Returns `text` case-folded, without accents and with single spaces."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return " ".join(
+        "".join(c for c in decomposed if not unicodedata.combining(c)).split()
+    )
+
+
+class _SortedKeys:
+    """Sorted keys with the ID of the object and the value each came from."""
+
+    def __init__(self, entries):
+        entries.sort()
+        self.keys = [key for key, _, _ in entries]
+        self.ids = array("q", (pk for _, pk, _ in entries))
+        self.values = [value for _, _, value in entries]
+
+    def scan(self, prefix):
+        """Yields the ``(key, id, value)`` entries starting with `prefix`, in order."""
+        for i in range(bisect_left(self.keys, prefix), len(self.keys)):
+            if not self.keys[i].startswith(prefix):
+                return
+            yield self.keys[i], self.ids[i], self.values[i]
+
+
+class PrefixIndex:
+    """Sorted prefix index of the values of one kind.
+
+    :param rows: Iterable of ``(id, label, *values)`` tuples, the label being
+        the first indexed value.
+    """
+
+    def __init__(self, rows):
+        whole, words = [], []
+        self.labels = {}
+        for pk, *values in rows:
+            self.labels[pk] = values[0]
+            for value in values:
+                if not value:
+                    continue
+                key = normalize(value)
+                whole.append((key, pk, value))
+                # Later words, keyed by the rest of the value from that word on
+                for i, char in enumerate(key):
+                    if char == " ":
+                        words.append((key[i + 1 :], pk, value))
+        self._whole = _SortedKeys(whole)
+        self._words = _SortedKeys(words)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def suggest(self, query, limit=10):
+        """
+        Return the best matches of a normalized query.
+
+        :param query: The query, as returned by :func:`normalize`.
+        :param limit: Maximum number of matches.
+        :return: Up to `limit` ``(rank, id, label, value)`` tuples, best first,
+            where ``rank`` sorts the matches and ``value`` is the matched value.
+        """
+        results, seen = [], set()
+        for tier, keys in enumerate((self._whole, self._words)):
+            for key, pk, value in keys.scan(query):
+                if len(results) == limit:
+                    return results
+                if pk not in seen:
+                    seen.add(pk)
+                    results.append(((tier, key), pk, self.labels[pk], value))
+        return results
+
+
+# Held while an index of the kind is being built
+_locks = {kind: threading.Lock() for kind in INDEXED_FIELDS}
+_indexes = {}
+
+
+def get_index(kind):
+    """Returns the index of `kind` in the current worker, rebuilding it when stale."""
+    model, _ = INDEXED_FIELDS[kind]
+    return _current_index(kind, get_version(table_version_name(model)))
+
+
+def _build(kind, version):
+    model, fields = INDEXED_FIELDS[kind]
+    rows = model.objects.order_by().values_list("pk", *fields).iterator()
+    _indexes[kind] = (version, PrefixIndex(rows))
+
+
+def _current_index(kind, version):
+    built = _indexes.get(kind)
+    if built is None:
+        with _locks[kind]:
+            if kind not in _indexes:
+                _build(kind, version)
+        return _indexes[kind][1]
+    if built[0] != version and _locks[kind].acquire(blocking=False):
+        _start_rebuild(kind)
+    return built[1]
+
+
+def _start_rebuild(kind):
+    """Rebuilds the index of `kind` in a background thread."""
+
+    def run():
+        try:
+            _rebuild(kind)
+        finally:
+            connections.close_all()
+
+    threading.Thread(target=run, name=f"autocomplete-{kind}", daemon=True).start()
+
+
+def _rebuild(kind):
+    """Rebuilds the index of `kind` until it is current, then releases its lock."""
+    model, _ = INDEXED_FIELDS[kind]
+    try:
+        # Versions read before each build, so writes during one start another
+        version = get_version(table_version_name(model))
+        while _indexes[kind][0] != version:
+            _build(kind, version)
+            version = get_version(table_version_name(model))
+    except Exception:  # pylint: disable=broad-except
+        # The previous index is served until a later lookup retries
+        logger.exception("Could not rebuild the %s autocomplete index", kind)
+    finally:
+        _locks[kind].release()
+
+
+def suggest(query, kinds=None, limit=10):
+    """
+    Return the best matches of a query across kinds.
+
+    :param query: The text typed so far.
+    :param kinds: The kinds to search; defaults to all of :data:`INDEXED_FIELDS`.
+    :param limit: Maximum number of matches.
+    :return: List of dicts with the ``kind``, ``id`` and ``label`` of each match,
+        and the ``matched`` value, best first.
+    """
+    query = normalize(query)
+    if not query:
+        return []
+    names = {
+        kind: table_version_name(INDEXED_FIELDS[kind][0])
+        for kind in kinds or INDEXED_FIELDS
+    }
+    versions = get_versions(names.values())
+    # Each kind's matches are sorted by rank; merging them keeps the best
+    matches = heapq.merge(
+        *(
+            [
+                (rank, kind, pk, label, value)
+                for rank, pk, label, value in _current_index(
+                    kind, versions[name]
+                ).suggest(query, limit)
+            ]
+            for kind, name in names.items()
+        )
+    )
+    return [
+        {"kind": kind, "id": pk, "label": label, "matched": value}
+        for _, kind, pk, label, value in itertools.islice(matches, limit)
+    ]
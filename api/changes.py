@@ -0,0 +1,126 @@
+"""
+Change log of characters, films and starships, for incremental mirroring.
+
+Downstream services used to mirror the API by re-paging every collection.
+Instead they can follow the change log: whenever the rendered document of an
+object (see :mod:`api.documents`) is written or dropped, an entry with a
+sequence number is appended, both from the per-row signal handlers and from the
+rebuild at the end of ``fetch_swapi_data``. Syncs leave no entry for objects
+they did not change.
+
+``/api/changes/?since=<seq>`` returns the entries after ``seq`` in order,
+upserts with the current document of the object and deletions as tombstones.
+Clients pass the returned ``last_seq`` as ``since`` next time, so a refresh
+costs bytes proportional to the changes rather than to the dataset.
+
+Sequence numbers are visible in commit order: on PostgreSQL, appends hold a
+transaction-level advisory lock until they commit, so an entry can never show
+up behind one that a client has already read past.
+
+:func:`compact` drops the entries superseded by a later entry for the same
+object, which keeps the log at one entry per object, and tombstones older than
+``CHANGE_LOG_TOMBSTONE_DAYS``. A client whose ``since`` lies before a dropped
+tombstone may have missed a deletion; it has to mirror again from ``since=0``.
+
+Functions:
+    record_changes: Appends changes to the log.
+    changes_since: Returns the entries after a sequence number.
+    compact: Drops superseded entries and expired tombstones.
+    horizon: Returns the sequence number through which tombstones were dropped.
+    last_seq: Returns the sequence number of the latest entry.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, Max, OuterRef
+from django.utils import timezone
+
+from .models import ChangeLogCompaction, ChangeLogEntry
+
+# Arbitrary key of the advisory lock serializing appends on PostgreSQL
+APPEND_LOCK_ID = 7_346_826_591
+
+
+def record_changes(changes):
+    """
+    Append changes to the log, inside the caller's transaction if any.
+
+    :param changes: :class:`api.documents.Change` objects.
+    :return: The created entries.
+    """
+    if not changes:
+        return []
+    now = timezone.now()
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", [APPEND_LOCK_ID])
+        return ChangeLogEntry.objects.bulk_create(
+            ChangeLogEntry(
+                kind=change.kind,
+                object_id=change.object_id,
+                deleted=change.deleted,
+                created=now,
+            )
+            for change in changes
+        )
+
+
+def changes_since(since, limit):
+    """
+    Return the entries after a sequence number, oldest first.
+
+    :param since: The sequence number the client has synced through.
+    :param limit: The maximum number of entries returned.
+    """
+    return list(ChangeLogEntry.objects.filter(seq__gt=since).order_by("seq")[:limit])
+
+
+def horizon():
+    """
+    Return the sequence number through which tombstones were dropped.
+
+    :return: The sequence number, or 0 if no tombstone was ever dropped.
+    """
+    result = ChangeLogCompaction.objects.aggregate(Max("expired_through"))
+    return result["expired_through__max"] or 0
+
+
+def last_seq(using=None):
+    """
+    Return the sequence number of the latest entry.
+
+    :param using: The database to read, e.g. a replica; defaults to the router's.
+    :return: The sequence number, or 0 if the log is empty.
+    """
+    result = ChangeLogEntry.objects.using(using).aggregate(Max("seq"))
+    return result["seq__max"] or 0
+
+
+def compact(tombstone_days=None):
+    """
+    Drop superseded entries and expired tombstones, and record the compaction.
+
+    :param tombstone_days: Age in days after which tombstones are dropped;
+        ``CHANGE_LOG_TOMBSTONE_DAYS`` when omitted.
+    :return: The :class:`~api.models.ChangeLogCompaction` that was recorded.
+    """
+    if tombstone_days is None:
+        tombstone_days = settings.CHANGE_LOG_TOMBSTONE_DAYS
+    later = ChangeLogEntry.objects.filter(
+        kind=OuterRef("kind"), object_id=OuterRef("object_id"), seq__gt=OuterRef("seq")
+    )
+    with transaction.atomic():
+        superseded, _ = ChangeLogEntry.objects.filter(Exists(later)).delete()
+        expired_tombstones = ChangeLogEntry.objects.filter(
+            deleted=True, created__lt=timezone.now() - timedelta(days=tombstone_days)
+        )
+        expired_through = expired_tombstones.aggregate(Max("seq"))["seq__max"]
+        expired, _ = expired_tombstones.delete()
+        return ChangeLogCompaction.objects.create(
+            superseded=superseded,
+            expired=expired,
+            expired_through=max(expired_through or 0, horizon()),
+        )
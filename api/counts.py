@@ -0,0 +1,74 @@
+"""
+Denormalized relation counts.
+
+``Character.film_count``, ``Character.starship_count`` and
+``Starship.pilot_count`` mirror the number of rows in the corresponding through
+tables, so clients can sort by popularity with an index scan instead of a
+``GROUP BY`` over the join tables on every page.
+
+The counts are recomputed with one set-based ``UPDATE`` per table, either for
+the rows touched by a write (see :mod:`api.signals`) or for the whole table at
+the end of ``fetch_swapi_data``. Only the rows whose counts changed are
+rewritten, so a rebuild after a sync that changed few relations writes few rows.
+
+Functions:
+    refresh_character_counts: Recomputes the counts of characters.
+    refresh_starship_counts: Recomputes the counts of starships.
+    refresh_all_counts: Recomputes every count.
+"""
+
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Character, Film, Starship
+
+
+def _through_count(through, column):
+    """Returns an expression counting the through rows pointing at ``OuterRef("pk")``."""
+    return Coalesce(
+        Subquery(
+            through.objects.filter(**{column: OuterRef("pk")})
+            .order_by()
+            .values(column)
+            .annotate(total=Count("*"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def refresh_character_counts(character_ids=None):
+    """
+    Recompute ``film_count`` and ``starship_count`` of characters.
+
+    :param character_ids: Primary keys to refresh; every character when omitted.
+    :return: The number of characters whose counts changed.
+    """
+    characters = Character.objects.all()
+    if character_ids is not None:
+        characters = characters.filter(pk__in=character_ids)
+    counts = {
+        "film_count": _through_count(Film.characters.through, "character_id"),
+        "starship_count": _through_count(Starship.pilots.through, "character_id"),
+    }
+    return characters.exclude(**counts).update(**counts)
+
+
+def refresh_starship_counts(starship_ids=None):
+    """
+    Recompute ``pilot_count`` of starships.
+
+    :param starship_ids: Primary keys to refresh; every starship when omitted.
+    :return: The number of starships whose count changed.
+    """
+    starships = Starship.objects.all()
+    if starship_ids is not None:
+        starships = starships.filter(pk__in=starship_ids)
+    counts = {"pilot_count": _through_count(Starship.pilots.through, "starship_id")}
+    return starships.exclude(**counts).update(**counts)
+
+
+def refresh_all_counts():
+    """Recompute every denormalized count."""
+    refresh_character_counts()
+    refresh_starship_counts()
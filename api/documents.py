@@ -0,0 +1,212 @@
+"""
+Pre-rendered JSON documents for the character, film and starship detail reads.
+
+The base tables only change when ``fetch_swapi_data`` runs or an object is
+edited, yet every detail request used to load the object and its relations and
+run the serializer. Instead, the final JSON of every object is rendered once
+and stored as a :class:`~api.models.RenderedDocument` row, which the detail
+endpoints return as is after a single indexed lookup.
+
+Documents are rebuilt at the end of every ``fetch_swapi_data`` run and
+re-rendered after writes to the objects or their relations (see
+:mod:`api.signals`), in the same transaction as the write.
+
+Classes:
+    Change: A document that was written or dropped.
+
+Functions:
+    refresh_documents: Re-renders the documents of some objects of a model.
+    rebuild_documents: Re-renders every document.
+    get_document: Returns the stored JSON of an object.
+    get_documents: Returns the stored JSON of several objects of a kind.
+"""
+
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from .models import Character, Film, RenderedDocument, Starship
+from .serializers import CharacterSerializer, FilmSerializer, StarshipSerializer
+
+BATCH_SIZE = 500
+
+# The kind of each model, with the queryset and serializer rendering it
+DOCUMENTS = {
+    Character: (
+        "character",
+        Character.objects.prefetch_related("starships"),
+        CharacterSerializer,
+    ),
+    Film: (
+        "film",
+        Film.objects.prefetch_related("characters", "starships"),
+        FilmSerializer,
+    ),
+    Starship: (
+        "starship",
+        Starship.objects.prefetch_related("pilots"),
+        StarshipSerializer,
+    ),
+}
+
+# The models whose documents show each relation, as a list of IDs or a count
+RELATION_DOCUMENTS = {
+    Film.characters.through: (Film, Character),
+    Film.starships.through: (Film,),
+    Starship.pilots.through: (Starship, Character),
+}
+
+_renderer = JSONRenderer()
+
+
+@dataclass(frozen=True)
+class Change:
+    """A document that was written or dropped.
+
+    Attributes:
+        kind (str): ``character``, ``film`` or ``starship``.
+        object_id (int): The primary key of the object.
+        deleted (bool): Whether the object was deleted.
+    """
+
+    kind: str
+    object_id: int
+    deleted: bool
+
+
+def _render(model, objects):
+    kind, _, serializer_class = DOCUMENTS[model]
+    now = timezone.now()
+    return [
+        RenderedDocument(
+            kind=kind,
+            object_id=obj.pk,
+            body=_renderer.render(serializer_class(obj).data),
+            rendered=now,
+        )
+        for obj in objects
+    ]
+
+
+def _store_changed(model, objects):
+    """Stores the documents of `objects` whose JSON changed.
+
+    :return: The primary keys of the objects whose document changed.
+    """
+    kind = DOCUMENTS[model][0]
+    documents = _render(model, objects)
+    stored = dict(
+        RenderedDocument.objects.filter(
+            kind=kind, object_id__in=[document.object_id for document in documents]
+        ).values_list("object_id", "body")
+    )
+    changed = [
+        document
+        for document in documents
+        if document.object_id not in stored
+        or bytes(stored[document.object_id]) != document.body
+    ]
+    RenderedDocument.objects.bulk_create(
+        changed,
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["kind", "object_id"],
+        update_fields=["body", "rendered"],
+    )
+    return [document.object_id for document in changed]
+
+
+def _changes(kind, updated, deleted):
+    return [Change(kind, pk, False) for pk in updated] + [
+        Change(kind, pk, True) for pk in deleted
+    ]
+
+
+def refresh_documents(model, pks):
+    """Re-renders the documents of some objects, dropping those of deleted ones.
+
+    :param model: Character, Film or Starship.
+    :param pks: Primary keys of the objects.
+    :return: The :class:`Change` of every document that was written or dropped.
+    """
+    pks = {pk for pk in pks if pk is not None}
+    if not pks:
+        return []
+    kind, queryset, _ = DOCUMENTS[model]
+    objects = list(queryset.filter(pk__in=pks))
+    with transaction.atomic():
+        updated = _store_changed(model, objects)
+        deleted = pks - {obj.pk for obj in objects}
+        if deleted:
+            deleted = set(
+                RenderedDocument.objects.filter(
+                    kind=kind, object_id__in=deleted
+                ).values_list("object_id", flat=True)
+            )
+            RenderedDocument.objects.filter(kind=kind, object_id__in=deleted).delete()
+    return _changes(kind, updated, sorted(deleted))
+
+
+def rebuild_documents():
+    """Re-renders the documents of every object and drops orphaned ones.
+
+    Everything is swapped inside one transaction, so readers see either the
+    previous or the rebuilt documents. Documents whose JSON did not change are
+    not rewritten.
+
+    :return: The :class:`Change` of every document that was written or dropped.
+    """
+    changes = []
+    with transaction.atomic():
+        for model, (kind, queryset, _) in DOCUMENTS.items():
+            orphans = RenderedDocument.objects.filter(kind=kind).exclude(
+                object_id__in=model.objects.values("pk")
+            )
+            deleted = sorted(orphans.values_list("object_id", flat=True))
+            orphans.delete()
+            updated = []
+            batch = []
+            for obj in queryset.iterator(chunk_size=BATCH_SIZE):
+                batch.append(obj)
+                if len(batch) == BATCH_SIZE:
+                    updated += _store_changed(model, batch)
+                    batch = []
+            updated += _store_changed(model, batch)
+            changes += _changes(kind, updated, deleted)
+    return changes
+
+
+def get_document(kind, pk):
+    """Returns the stored JSON of an object.
+
+    :param kind: ``character``, ``film`` or ``starship``.
+    :param pk: The object's primary key, as found in the URL.
+    :return: The JSON bytes, or None if no document is stored for the object.
+    """
+    if not str(pk).isdigit():
+        return None
+    try:
+        body = RenderedDocument.objects.values_list("body", flat=True).get(
+            kind=kind, object_id=pk
+        )
+    except RenderedDocument.DoesNotExist:
+        return None
+    return bytes(body)
+
+
+def get_documents(kind, pks):
+    """Returns the stored JSON of several objects of a kind.
+
+    :param kind: ``character``, ``film`` or ``starship``.
+    :param pks: The objects' primary keys.
+    :return: A mapping of primary keys to JSON bytes, without the objects that
+        have no document.
+    """
+    return {
+        pk: bytes(body)
+        for pk, body in RenderedDocument.objects.filter(
+            kind=kind, object_id__in=pks
+        ).values_list("object_id", "body")
+    }
@@ -0,0 +1,284 @@
+"""
+In-process character co-appearance graph.
+
+Two characters are connected when they appear in the same film. The graph is the
+bipartite character/film graph implied by the ``Film.characters`` through table,
+held in memory as compact integer arrays:
+
+* ``film -> characters``: the dense indices of the characters in each film.
+* ``character -> films``: the dense indices of the films of each character.
+
+Neighbours are never materialised; they are expanded through the films on
+demand, which keeps memory proportional to the number of through rows. Path
+queries run a bidirectional breadth-first search that visits every film at most
+once per side.
+
+Each worker keeps one graph, built from the through table on first use. Once a
+write commits, it patches the local graph in place and bumps the shared
+``graph`` version (see :mod:`api.versions`), so other workers rebuild on their
+next query. Bumping only after the commit keeps them from rebuilding from the
+data before the write and keeping that graph.
+
+Classes:
+    CoAppearanceGraph: The adjacency index and its queries.
+
+Functions:
+    get_graph: Returns the up-to-date graph of the current worker.
+    set_film_members: Patches the film membership of the current graph.
+    remove_character: Drops a deleted character from the current graph.
+    remove_film: Drops a deleted film from the current graph.
+    invalidate: Forces every worker to rebuild its graph.
+"""
+
+import threading
+from array import array
+from functools import partial
+
+from django.db import transaction
+
+from .models import Film
+from .versions import bump_version, get_version
+
+VERSION_KEY = "graph"
+
+
+class CoAppearanceGraph:
+    """Adjacency index of characters who appeared in the same film.
+
+    :param memberships: Iterable of ``(film_id, character_id)`` pairs.
+    """
+
+    def __init__(self, memberships=()):
+        self._character_index = {}
+        self._character_ids = array("q")
+        self._character_films = []
+        self._film_index = {}
+        self._film_ids = array("q")
+        self._film_members = []
+        self._degrees = None
+        for film_id, character_id in memberships:
+            film = self._film_slot(film_id)
+            character = self._character_slot(character_id)
+            self._film_members[film].append(character)
+            self._character_films[character].append(film)
+
+    @classmethod
+    def from_database(cls):
+        """Builds the graph from the ``Film.characters`` through table."""
+        return cls(
+            Film.characters.through.objects.values_list(
+                "film_id", "character_id"
+            ).iterator()
+        )
+
+    def _film_slot(self, film_id):
+        index = self._film_index.get(film_id)
+        if index is None:
+            index = self._film_index[film_id] = len(self._film_ids)
+            self._film_ids.append(film_id)
+            self._film_members.append(array("i"))
+        return index
+
+    def _character_slot(self, character_id):
+        index = self._character_index.get(character_id)
+        if index is None:
+            index = self._character_index[character_id] = len(self._character_ids)
+            self._character_ids.append(character_id)
+            self._character_films.append(array("i"))
+        return index
+
+    def __contains__(self, character_id):
+        return character_id in self._character_index
+
+    def set_film_members(self, film_id, character_ids):
+        """Replaces the characters of a film.
+
+        :param film_id: Primary key of the film.
+        :param character_ids: Primary keys of all characters now in the film.
+        """
+        film = self._film_slot(film_id)
+        for character in self._film_members[film]:
+            self._character_films[character].remove(film)
+        members = array("i", (self._character_slot(pk) for pk in set(character_ids)))
+        for character in members:
+            self._character_films[character].append(film)
+        self._film_members[film] = members
+        self._degrees = None
+
+    def remove_film(self, film_id):
+        """Removes a film and all of its character links."""
+        if film_id in self._film_index:
+            self.set_film_members(film_id, ())
+
+    def remove_character(self, character_id):
+        """Removes a character from every film it appeared in."""
+        character = self._character_index.get(character_id)
+        if character is None:
+            return
+        for film in self._character_films[character]:
+            self._film_members[film].remove(character)
+        self._character_films[character] = array("i")
+        self._degrees = None
+
+    def _neighbours(self, character):
+        neighbours = set()
+        for film in self._character_films[character]:
+            neighbours.update(self._film_members[film])
+        neighbours.discard(character)
+        return neighbours
+
+    def co_stars(self, character_id):
+        """Returns the primary keys of the characters who shared a film with one.
+
+        :param character_id: Primary key of the character.
+        :return: Sorted list of character primary keys.
+        """
+        character = self._character_index.get(character_id)
+        if character is None:
+            return []
+        return sorted(self._character_ids[i] for i in self._neighbours(character))
+
+    def most_connected(self, limit=10):
+        """Returns the characters with the most distinct co-stars.
+
+        Degrees are computed once and reused until the graph changes.
+
+        :param limit: Maximum number of characters to return.
+        :return: List of ``(character_id, connections)`` pairs, best first.
+        """
+        if self._degrees is None:
+            self._degrees = array(
+                "i", (len(self._neighbours(i)) for i in range(len(self._character_ids)))
+            )
+        ranked = sorted(
+            (i for i, degree in enumerate(self._degrees) if degree),
+            key=lambda i: (-self._degrees[i], self._character_ids[i]),
+        )
+        return [(self._character_ids[i], self._degrees[i]) for i in ranked[:limit]]
+
+    def shortest_path(self, source_id, target_id):
+        """Finds a shortest chain of shared films between two characters.
+
+        Runs a bidirectional breadth-first search, always expanding the smaller
+        frontier by one level.
+
+        :param source_id: Primary key of the first character.
+        :param target_id: Primary key of the second character.
+        :return: List of ``(character_id, film_id)`` hops starting at the source,
+            where ``film_id`` is the film shared with the previous character
+            (``None`` for the source), or ``None`` when they are not connected.
+        """
+        source = self._character_index.get(source_id)
+        target = self._character_index.get(target_id)
+        if source is None or target is None:
+            return None
+        if source == target:
+            return [(source_id, None)]
+
+        # parents[side][character] = (previous character, shared film)
+        parents = ({source: None}, {target: None})
+        seen_films = (set(), set())
+        frontiers = ([source], [target])
+        while frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            meeting, expanded = self._expand(
+                frontiers[side], parents[side], seen_films[side], parents[1 - side]
+            )
+            if side == 0:
+                frontiers = (expanded, frontiers[1])
+            else:
+                frontiers = (frontiers[0], expanded)
+            if meeting is not None:
+                return self._join_paths(meeting, *parents)
+        return None
+
+    def _expand(self, frontier, parents, seen_films, other_parents):
+        next_frontier = []
+        for character in frontier:
+            for film in self._character_films[character]:
+                if film in seen_films:
+                    continue
+                seen_films.add(film)
+                for member in self._film_members[film]:
+                    if member in parents:
+                        continue
+                    parents[member] = (character, film)
+                    if member in other_parents:
+                        return member, next_frontier
+                    next_frontier.append(member)
+        return None, next_frontier
+
+    def _join_paths(self, meeting, source_parents, target_parents):
+        hops = []
+        character = meeting
+        link = source_parents[meeting]
+        while link is not None:
+            hops.append((character, link[1]))
+            character = link[0]
+            link = source_parents[character]
+        hops.append((character, None))
+        hops.reverse()
+
+        link = target_parents[meeting]
+        while link is not None:
+            character, film = link
+            hops.append((character, film))
+            link = target_parents[character]
+
+        return [
+            (self._character_ids[c], None if f is None else self._film_ids[f])
+            for c, f in hops
+        ]
+
+
+_lock = threading.Lock()
+_graph = None
+_graph_version = None
+
+
+def get_graph():
+    """Returns the graph of the current worker, rebuilding it when stale."""
+    global _graph, _graph_version
+    version = get_version(VERSION_KEY)
+    with _lock:
+        if _graph is None or _graph_version != version:
+            _graph = CoAppearanceGraph.from_database()
+            _graph_version = version
+        return _graph
+
+
+def _apply(change):
+    """Applies `change` once the current transaction commits."""
+    transaction.on_commit(partial(_apply_now, change))
+
+
+def _apply_now(change):
+    """Applies `change` to the local graph and publishes a new version."""
+    global _graph_version
+    with _lock:
+        current = _graph is not None and _graph_version == get_version(VERSION_KEY)
+        if current:
+            change(_graph)
+        version = bump_version(VERSION_KEY)
+        if current:
+            _graph_version = version
+
+
+def set_film_members(film_id, character_ids):
+    """Patches the characters of a film in the local graph."""
+    _apply(lambda graph: graph.set_film_members(film_id, character_ids))
+
+
+def remove_film(film_id):
+    """Drops a deleted film from the local graph."""
+    _apply(lambda graph: graph.remove_film(film_id))
+
+
+def remove_character(character_id):
+    """Drops a deleted character from the local graph."""
+    _apply(lambda graph: graph.remove_character(character_id))
+
+
+def invalidate():
+    """Forces every worker to rebuild its graph once the transaction commits."""
+    transaction.on_commit(partial(bump_version, VERSION_KEY))
@@ -0,0 +1,86 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.utils import load_backend
+
+DIRECT_ENGINE = "django.db.backends.postgresql"
+POOLED_ENGINE = "core.db.backends.pooled_postgresql"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-request cost of a database connection with Django's "
+        "PostgreSQL backend and with the pooled backend"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests", type=int, default=500, help="Requests simulated per backend"
+        )
+        parser.add_argument(
+            "--database", default="default", help="Database alias to connect to"
+        )
+
+    def handle(self, *args, **options):
+        settings_dict = connections[options["database"]].settings_dict
+        if connections[options["database"]].vendor != "postgresql":
+            raise CommandError("The benchmark needs a PostgreSQL database")
+        if options["requests"] < 2:
+            raise CommandError("--requests must be at least 2")
+        base_options = {
+            key: value
+            for key, value in settings_dict["OPTIONS"].items()
+            if key != "pool"
+        }
+        pool_options = settings_dict["OPTIONS"].get("pool") or {}
+
+        results = {}
+        for engine, engine_options in (
+            (DIRECT_ENGINE, base_options),
+            (POOLED_ENGINE, {**base_options, "pool": pool_options}),
+        ):
+            wrapper = load_backend(engine).DatabaseWrapper(
+                {**settings_dict, "ENGINE": engine, "OPTIONS": engine_options},
+                alias=f"{options['database']}-benchmark",
+            )
+            try:
+                results[engine] = self.measure(wrapper, options["requests"])
+            finally:
+                wrapper.close()
+                if hasattr(wrapper, "close_pool"):
+                    wrapper.close_pool()
+
+        self.stdout.write(
+            f"Connection cost per request over {options['requests']} requests "
+            "(connect, SELECT 1, close), in ms:"
+        )
+        self.stdout.write(f"  {'backend':<36}{'mean':>8}{'p50':>8}{'p95':>8}{'p99':>8}")
+        for engine, timings in results.items():
+            cuts = statistics.quantiles(timings, n=100)
+            self.stdout.write(
+                f"  {engine:<36}{statistics.fmean(timings):8.2f}"
+                f"{cuts[49]:8.2f}{cuts[94]:8.2f}{cuts[98]:8.2f}"
+            )
+        speedup = statistics.fmean(results[DIRECT_ENGINE]) / statistics.fmean(
+            results[POOLED_ENGINE]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Pooling is {speedup:.1f}x faster"))
+
+    @staticmethod
+    def measure(wrapper, requests):
+        """
+        Simulate requests that each run one query on a fresh connection.
+
+        :return: The time each request spent, in milliseconds.
+        """
+        timings = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            with wrapper.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            # What Django does at the end of a request with CONN_MAX_AGE = 0
+            wrapper.close()
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.profiling import make_profile_token
+
+
+class Command(BaseCommand):
+    help = "Create a signed token allowing ?profile= on API requests"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "issuer",
+            help="Name recorded on the profile reports made with the token",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(make_profile_token(options["issuer"]))
+        self.stderr.write(
+            f"Valid for {settings.PROFILE_TOKEN_MAX_AGE} seconds. Pass it as "
+            "?profile_token=... or in the X-Profile-Token header."
+        )
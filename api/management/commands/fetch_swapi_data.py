@@ -3,7 +3,12 @@ import requests
 from requests.exceptions import RequestException
 from django.db.utils import IntegrityError
 
+from api import sync
+from api.admin import refresh_filter_choices
+from api.staging import StagedSync
 from api.models import Character, Film, Starship
+from api.signals import bulk_sync, rebuild_derived_data
+from core.metrics import observe_phase
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,7 +26,7 @@ def fetch_related_model(model, url_list):
                 objects.append(obj)
         except Exception as e:
             logger.error(
-                f"Error fetching related model {model.__name__} for URL {url}: {e}"
+                "Error fetching related model %s for URL %s: %s", model.__name__, url, e
             )
     return objects
 
@@ -32,6 +37,7 @@ def fetch_all_from_url(url, limit=None):
     while url and (limit is None or count < limit):
         try:
             response = requests.get(url)
+            sync.record_http(len(response.content))
             response.raise_for_status()
             page_data = response.json()
             results = page_data.get("results", [])
@@ -43,16 +49,22 @@ def fetch_all_from_url(url, limit=None):
             count += len(results)
             url = page_data.get("next") if (limit is None or count < limit) else None
         except RequestException as e:
-            logger.error(f"Error fetching data from {url}: {e}")
+            logger.error("Error fetching data from %s: %s", url, e)
             break
         except ValueError as e:
-            logger.error(f"Error parsing JSON response from {url}: {e}")
+            logger.error("Error parsing JSON response from %s: %s", url, e)
             break
     return data
 
 
 def fetch_characters(limit=None):
-    characters_data = fetch_all_from_url(f"{BASE_URL}people/", limit)
+    with sync.step("fetch"):
+        characters_data = fetch_all_from_url(f"{BASE_URL}people/", limit)
+    with sync.step("write"):
+        store_characters(characters_data)
+
+
+def store_characters(characters_data):
     for character_data in characters_data:
         try:
             Character.objects.update_or_create(
@@ -74,11 +86,17 @@ def fetch_characters(limit=None):
                 },
             )
         except IntegrityError as e:
-            logger.error(f"Error saving character '{character_data['name']}': {e}")
+            logger.error("Error saving character '%s': %s", character_data["name"], e)
 
 
 def fetch_films(limit=None):
-    films_data = fetch_all_from_url(f"{BASE_URL}films/", limit)
+    with sync.step("fetch"):
+        films_data = fetch_all_from_url(f"{BASE_URL}films/", limit)
+    with sync.step("write"):
+        store_films(films_data)
+
+
+def store_films(films_data):
     for film_data in films_data:
         try:
             film, created = Film.objects.update_or_create(
@@ -102,11 +120,17 @@ def fetch_films(limit=None):
             film.characters.set(characters)
             film.starships.set(starships)
         except IntegrityError as e:
-            logger.error(f"Error saving film '{film_data['title']}': {e}")
+            logger.error("Error saving film '%s': %s", film_data["title"], e)
 
 
 def fetch_starships(limit=None):
-    starships_data = fetch_all_from_url(f"{BASE_URL}starships/", limit)
+    with sync.step("fetch"):
+        starships_data = fetch_all_from_url(f"{BASE_URL}starships/", limit)
+    with sync.step("write"):
+        store_starships(starships_data)
+
+
+def store_starships(starships_data):
     for starship_data in starships_data:
         try:
             starship, created = Starship.objects.update_or_create(
@@ -132,7 +156,48 @@ def fetch_starships(limit=None):
             pilots = fetch_related_model(Character, starship_data.get("pilots", []))
             starship.pilots.set(pilots)
         except IntegrityError as e:
-            logger.error(f"Error saving starship '{starship_data['name']}': {e}")
+            logger.error("Error saving starship '%s': %s", starship_data["name"], e)
+
+
+def sync_per_row(recorder, limit=None):
+    with recorder.resource("characters", Character):
+        fetch_characters(limit)
+    with recorder.resource("films", Film):
+        fetch_films(limit)
+    with recorder.resource("starships", Starship):
+        fetch_starships(limit)
+
+
+def stage_resource(staged, model, url, limit=None):
+    with sync.step("fetch"):
+        data = fetch_all_from_url(url, limit)
+    with sync.step("write"):
+        for error in staged.stage(model, data):
+            logger.error("Rejected staged record: %s", error)
+
+
+def sync_staged(recorder, limit=None):
+    """
+    Fetch and stage every resource, then publish them in one transaction.
+
+    The derived data is rebuilt once the publish has committed, in a
+    transaction of its own, so the rebuild does not hold the row locks of the
+    publish. Readers may see the new data with the previous statistics, counts
+    or documents until the rebuild commits.
+
+    :return: The number of updated and inserted rows per model.
+    """
+    with StagedSync() as staged:
+        with recorder.resource("characters", Character):
+            stage_resource(staged, Character, f"{BASE_URL}people/", limit)
+        with recorder.resource("films", Film):
+            stage_resource(staged, Film, f"{BASE_URL}films/", limit)
+        with recorder.resource("starships", Starship):
+            stage_resource(staged, Starship, f"{BASE_URL}starships/", limit)
+        with recorder.resource("publish") as phase, sync.step("write"):
+            phase["merged"] = staged.publish()
+    rebuild_derived_data()
+    return phase["merged"]
 
 
 class Command(BaseCommand):
@@ -145,15 +210,32 @@ class Command(BaseCommand):
             default=None,
             help="Limit the number of items to fetch from each category",
         )
+        parser.add_argument(
+            "--staging",
+            action="store_true",
+            help="Load everything into staging tables first, then publish it "
+            "in one transaction",
+        )
 
     def handle(self, *args, **options):
         limit = options["limit"]
         try:
-            fetch_characters(limit)
-            fetch_films(limit)
-            fetch_starships(limit)
+            with sync.SyncRecorder(limit) as recorder, observe_phase("total"):
+                if options["staging"]:
+                    sync_staged(recorder, limit)
+                else:
+                    # Derived data such as the stats is rebuilt once at the end
+                    with bulk_sync():
+                        sync_per_row(recorder, limit)
+            # Off the request path, so the admin filters never scan the tables
+            refresh_filter_choices()
+            run = recorder.run
             self.stdout.write(
-                self.style.SUCCESS("Successfully fetched and stored data from SWAPI")
+                self.style.SUCCESS(
+                    f"Successfully fetched and stored data from SWAPI in "
+                    f"{run.duration_ms / 1000:.1f}s (sync run {run.pk}, "
+                    f"{run.error_count} errors)"
+                )
             )
         except Exception as e:
             self.stderr.write(f"An error occurred: {e}")
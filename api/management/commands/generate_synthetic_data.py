@@ -0,0 +1,93 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import synthetic
+
+
+def _range(value):
+    """Parses ``MIN:MAX`` (or a single number) into an inclusive range."""
+    low, _, high = value.partition(":")
+    try:
+        bounds = (int(low), int(high or low))
+    except ValueError as e:
+        raise CommandError(f"Invalid range {value!r}; expected MIN:MAX") from e
+    if bounds[0] < 0 or bounds[0] > bounds[1]:
+        raise CommandError(f"Invalid range {value!r}; expected 0 <= MIN <= MAX")
+    return bounds
+
+
+class Command(BaseCommand):
+    help = "Populate the database with synthetic characters, films and starships"
+
+    def add_arguments(self, parser):
+        defaults = synthetic.Density()
+        parser.add_argument("--characters", type=int, default=1000)
+        parser.add_argument("--films", type=int, default=100)
+        parser.add_argument("--starships", type=int, default=200)
+        parser.add_argument(
+            "--cast",
+            default="{}:{}".format(*defaults.cast),
+            help="Characters per film, as MIN:MAX",
+        )
+        parser.add_argument(
+            "--fleet",
+            default="{}:{}".format(*defaults.fleet),
+            help="Starships per film, as MIN:MAX",
+        )
+        parser.add_argument(
+            "--pilots",
+            default="{}:{}".format(*defaults.pilots),
+            help="Pilots per starship, as MIN:MAX",
+        )
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=defaults.skew,
+            help="Zipf exponent of relation popularity (0 for uniform)",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Use bulk_create even on PostgreSQL",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete all characters, films and starships first",
+        )
+
+    def handle(self, *args, **options):
+        if min(options["characters"], options["films"], options["starships"]) < 0:
+            raise CommandError("Row counts must not be negative")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+        density = synthetic.Density(
+            cast=_range(options["cast"]),
+            fleet=_range(options["fleet"]),
+            pilots=_range(options["pilots"]),
+            skew=options["skew"],
+        )
+
+        start = time.perf_counter()
+        if options["clear"]:
+            synthetic.clear()
+            self.stdout.write("Deleted existing data")
+        synthetic.generate(
+            options["characters"],
+            options["films"],
+            options["starships"],
+            density=density,
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            use_copy=False if options["no_copy"] else None,
+            stdout=self.stdout,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully generated synthetic data in "
+                f"{time.perf_counter() - start:.1f}s"
+            )
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from api.admin import refresh_filter_choices
+from api.signals import rebuild_derived_data
+
+
+class Command(BaseCommand):
+    help = "Rebuild data derived from films, characters and starships"
+
+    def handle(self, *args, **options):
+        rebuild_derived_data()
+        refresh_filter_choices()
+        self.stdout.write(self.style.SUCCESS("Successfully rebuilt derived data"))
@@ -0,0 +1,33 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.schema import code_hash, render_schema
+
+
+class Command(BaseCommand):
+    help = "Render the OpenAPI schema to a static file served at /openapi.json"
+    # Runs at image build time, without a database
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="Path of the schema file (default: OPENAPI_SCHEMA_FILE)",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["output"] or settings.OPENAPI_SCHEMA_FILE)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        content = render_schema()
+        # Write then rename, so workers never read a partial file
+        partial = path.with_suffix(path.suffix + ".tmp")
+        partial.write_bytes(content)
+        partial.replace(path)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully rendered the schema for code {code_hash()} to {path}"
+            )
+        )
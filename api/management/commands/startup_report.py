@@ -0,0 +1,168 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Boots the application in a fresh interpreter, as a worker does, and times the
+# boot, the warm-up and the first requests. Prints its results as JSON on the
+# last line; ``-X importtime`` writes the import breakdown to stderr.
+PROBE = """
+import json, resource, sys, time
+from wsgiref.util import setup_testing_defaults
+
+started = time.perf_counter()
+from core.wsgi import application
+booted = time.perf_counter()
+warm_up_s = None
+if sys.argv[1] == "warm":
+    from core.warmup import warm_up
+    warm_up_s = warm_up()
+
+from django.conf import settings
+hosts = [host.lstrip(".") for host in settings.ALLOWED_HOSTS if host not in ("", "*")]
+requests = []
+for _ in range(2):
+    environ = {"PATH_INFO": sys.argv[2], "HTTP_HOST": (hosts or ["localhost"])[0]}
+    setup_testing_defaults(environ)
+    statuses = []
+    sent = time.perf_counter()
+    response = application(environ, lambda status, headers, *_: statuses.append(status))
+    b"".join(response)
+    response.close()
+    requests.append((time.perf_counter() - sent, statuses[0]))
+print(json.dumps({
+    "boot_s": booted - started,
+    "warm_up_s": warm_up_s,
+    "requests": requests,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}))
+"""
+
+
+def parse_importtime(lines):
+    """
+    Parse the output of ``python -X importtime``.
+
+    :param lines: Lines of the interpreter's stderr; other lines are skipped.
+    :return: A list of ``(module, self_us, cumulative_us, depth)`` tuples, where
+        depth 0 marks a module imported directly by the probe.
+    """
+    imports = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # The header line
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        imports.append((stripped, int(fields[0]), int(fields[1]), depth))
+    return imports
+
+
+def summarize(imports, top):
+    """
+    Summarize an import-time breakdown.
+
+    :param imports: The tuples returned by :func:`parse_importtime`.
+    :param top: Number of entries to keep per ranking.
+    :return: A dict with the total import time, the time spent per top-level
+        package and the slowest top-level imports, in milliseconds. Modules first
+        imported by the warm-up or a request count as top-level imports.
+    """
+    packages = defaultdict(int)
+    for module, self_us, _, _ in imports:
+        packages[module.split(".")[0]] += self_us
+    direct = [
+        (module, cumulative) for module, _, cumulative, depth in imports if depth == 0
+    ]
+    return {
+        "total_ms": sum(packages.values()) / 1000,
+        "modules": len(imports),
+        "packages": [
+            (package, self_us / 1000)
+            for package, self_us in sorted(
+                packages.items(), key=lambda item: item[1], reverse=True
+            )[:top]
+        ],
+        "direct": [
+            (module, cumulative / 1000)
+            for module, cumulative in sorted(
+                direct, key=lambda item: item[1], reverse=True
+            )[:top]
+        ],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Report how long a worker takes to boot: an import-time breakdown, the "
+        "warm-up and the first requests, measured in a fresh interpreter"
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top", type=int, default=15, help="Entries listed per ranking"
+        )
+        parser.add_argument(
+            "--path", default="/api/", help="Path of the requests to time"
+        )
+        parser.add_argument(
+            "--no-warm-up",
+            action="store_true",
+            help="Serve the first request without warming up, as a worker "
+            "without preloading did",
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Print the report as JSON"
+        )
+
+    def handle(self, *args, **options):
+        path = filter(None, [str(settings.BASE_DIR), os.getenv("PYTHONPATH")])
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(path))
+        mode = "cold" if options["no_warm_up"] else "warm"
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE, mode, options["path"]],
+            capture_output=True,
+            text=True,
+            env=env,
+            cwd=settings.BASE_DIR,
+            check=False,
+        )
+        if result.returncode or not result.stdout.strip():
+            raise CommandError(f"The application failed to boot:\n{result.stderr}")
+
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        report.update(
+            summarize(parse_importtime(result.stderr.splitlines()), options["top"])
+        )
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.write_report(report)
+
+    def write_report(self, report):
+        write = self.stdout.write
+        write(f"Boot (import core.wsgi): {report['boot_s'] * 1000:.0f} ms")
+        write(
+            f"Imports until the last response: {report['total_ms']:.0f} ms "
+            f"across {report['modules']} modules"
+        )
+        if report["warm_up_s"] is not None:
+            write(f"Warm-up: {report['warm_up_s'] * 1000:.0f} ms")
+        for label, (seconds, status) in zip(("First", "Second"), report["requests"]):
+            write(f"{label} request: {seconds * 1000:.1f} ms ({status})")
+        write(f"Peak memory: {report['max_rss_kb'] / 1024:.1f} MiB")
+
+        write("\nImport time by top-level package (self):")
+        for package, ms in report["packages"]:
+            write(f"  {ms:8.1f} ms  {package}")
+        write("\nSlowest top-level imports (cumulative):")
+        for module, ms in report["direct"]:
+            write(f"  {ms:8.1f} ms  {module}")
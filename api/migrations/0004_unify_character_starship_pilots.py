@@ -0,0 +1,63 @@
+# Generated by Django 4.2.16 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+def merge_piloted_by_into_pilots(apps, schema_editor):
+    """Copy rows from the legacy ``Character.starships`` table into ``Starship.pilots``.
+
+    Both tables described the same relationship, so the union of the two is kept
+    and duplicate pairs are dropped.
+    """
+    Character = apps.get_model("api", "Character")
+    Starship = apps.get_model("api", "Starship")
+    legacy = Character.starships.through
+    pilots = Starship.pilots.through
+
+    existing = set(pilots.objects.values_list("starship_id", "character_id"))
+    missing = [
+        pilots(starship_id=starship_id, character_id=character_id)
+        for character_id, starship_id in legacy.objects.values_list(
+            "character_id", "starship_id"
+        ).iterator()
+        if (starship_id, character_id) not in existing
+    ]
+    pilots.objects.bulk_create(missing, batch_size=1000)
+
+
+def split_pilots_into_piloted_by(apps, schema_editor):
+    """Reverse of :func:`merge_piloted_by_into_pilots`: repopulate the legacy table."""
+    Character = apps.get_model("api", "Character")
+    Starship = apps.get_model("api", "Starship")
+    legacy = Character.starships.through
+    pilots = Starship.pilots.through
+
+    legacy.objects.bulk_create(
+        [
+            legacy(character_id=character_id, starship_id=starship_id)
+            for starship_id, character_id in pilots.objects.values_list(
+                "starship_id", "character_id"
+            ).iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0003_alter_character_birth_year_alter_character_eye_color_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_piloted_by_into_pilots, split_pilots_into_piloted_by),
+        migrations.RemoveField(
+            model_name="character",
+            name="starships",
+        ),
+        migrations.AlterField(
+            model_name="starship",
+            name="pilots",
+            field=models.ManyToManyField(related_name="starships", to="api.character"),
+        ),
+    ]
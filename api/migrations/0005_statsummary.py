@@ -0,0 +1,42 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_unify_character_starship_pilots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50)),
+                ('key', models.CharField(max_length=500)),
+                ('value', models.IntegerField()),
+                ('refreshed', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['kind', '-value', 'key'],
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='character',
+            options={'ordering': ['name']},
+        ),
+        migrations.AlterModelOptions(
+            name='film',
+            options={'ordering': ['title']},
+        ),
+        migrations.AlterModelOptions(
+            name='starship',
+            options={'ordering': ['name']},
+        ),
+        migrations.AddConstraint(
+            model_name='statsummary',
+            constraint=models.UniqueConstraint(fields=('kind', 'key'), name='unique_stat_bucket'),
+        ),
+    ]
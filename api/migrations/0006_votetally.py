@@ -0,0 +1,30 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_statsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoteTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('character', 'Character'), ('film', 'Film'), ('starship', 'Starship')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('votes', models.PositiveIntegerField(default=0)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['kind', '-votes'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='votetally',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_vote_tally'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:42
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _through_count(through, column):
+    return Coalesce(
+        Subquery(
+            through.objects.filter(**{column: OuterRef("pk")})
+            .order_by()
+            .values(column)
+            .annotate(total=Count("*"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def populate_relation_counts(apps, schema_editor):
+    Character = apps.get_model("api", "Character")
+    Film = apps.get_model("api", "Film")
+    Starship = apps.get_model("api", "Starship")
+    Character.objects.update(
+        film_count=_through_count(Film.characters.through, "character_id"),
+        starship_count=_through_count(Starship.pilots.through, "character_id"),
+    )
+    Starship.objects.update(
+        pilot_count=_through_count(Starship.pilots.through, "starship_id")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_votetally'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='character',
+            name='film_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='starship_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='starship',
+            name='pilot_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='character',
+            index=models.Index(fields=['film_count'], name='character_film_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='character',
+            index=models.Index(fields=['starship_count'], name='character_starship_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='starship',
+            index=models.Index(fields=['pilot_count'], name='starship_pilot_count_idx'),
+        ),
+        migrations.RunPython(populate_relation_counts, migrations.RunPython.noop),
+    ]
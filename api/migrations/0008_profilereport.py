@@ -0,0 +1,30 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_relation_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=2000)),
+                ('mode', models.CharField(choices=[('cprofile', 'cProfile'), ('alloc', 'tracemalloc')], max_length=10)),
+                ('user', models.CharField(blank=True, max_length=150)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('duration_ms', models.FloatField()),
+                ('stats', models.TextField()),
+            ],
+            options={
+                'ordering': ['-created'],
+            },
+        ),
+    ]
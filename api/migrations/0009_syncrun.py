@@ -0,0 +1,34 @@
+# Generated by Django 4.2.16 on 2026-10-19 06:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_profilereport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started', models.DateTimeField(auto_now_add=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='running', max_length=10)),
+                ('limit', models.PositiveIntegerField(blank=True, null=True)),
+                ('duration_ms', models.FloatField(blank=True, null=True)),
+                ('http_requests', models.PositiveIntegerField(default=0)),
+                ('http_bytes', models.PositiveBigIntegerField(default=0)),
+                ('sql_queries', models.PositiveIntegerField(default=0)),
+                ('peak_memory_kb', models.PositiveIntegerField(blank=True, null=True)),
+                ('error_count', models.PositiveIntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('phases', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'ordering': ['-started'],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.16 on 2026-10-19 07:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_syncrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderedDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('character', 'Character'), ('film', 'Film'), ('starship', 'Starship')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('body', models.BinaryField()),
+                ('rendered', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='rendereddocument',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_rendered_document'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.16 on 2026-10-19 07:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_change_log'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='character',
+            index=models.Index(fields=['name'], name='character_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='film',
+            index=models.Index(fields=['title'], name='film_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='starship',
+            index=models.Index(fields=['name'], name='starship_name_idx'),
+        ),
+    ]
@@ -11,6 +11,13 @@ Classes:
         like name, gender, and homeworld.
     Starship: Represents a starship with attributes such as model, manufacturer, 
         crew capacity, and associated pilots.
+    StatSummary: Stores one precomputed bucket of an aggregate statistic.
+    VoteTally: Stores the flushed vote count of a character, film or starship.
+    ProfileReport: Stores the result of an on-demand profiling run.
+    SyncRun: Records the timings and volumes of one ``fetch_swapi_data`` run.
+    RenderedDocument: Stores the rendered JSON of a character, film or starship.
+    ChangeLogEntry: Records that a character, film or starship changed.
+    ChangeLogCompaction: Records one compaction of the change log.
 
 Each model uses Django's ORM to define relationships and fields, 
 including JSON fields for related URLs and other resources.
@@ -60,6 +67,7 @@ class Film(models.Model):
 
     class Meta:
         ordering = ["title"]
+        indexes = [models.Index(fields=["title"], name="film_title_idx")]
 
 
 class Character(models.Model):
@@ -77,7 +85,10 @@ class Character(models.Model):
         homeworld (URL): The URL of the character's home planet.
         species (JSONField): List of species the character belongs to.
         vehicles (JSONField): List of vehicles associated with the character.
-        starships (ManyToManyField): Related starships piloted by the character.
+        starships (RelatedManager): Starships piloted by the character, the
+            reverse side of ``Starship.pilots``.
+        film_count (int): Number of films the character appears in.
+        starship_count (int): Number of starships the character pilots.
         created (DateTime): Timestamp when the character record was created.
         edited (DateTime): Timestamp of the last edit.
         url (URL): URL identifier for the character.
@@ -94,7 +105,8 @@ class Character(models.Model):
     homeworld = models.URLField()
     species = models.JSONField()
     vehicles = models.JSONField()
-    starships = models.ManyToManyField("Starship", related_name="piloted_by")
+    film_count = models.PositiveIntegerField(default=0, editable=False)
+    starship_count = models.PositiveIntegerField(default=0, editable=False)
     created = models.DateTimeField()
     edited = models.DateTimeField()
     url = models.URLField()
@@ -105,6 +117,13 @@ class Character(models.Model):
 
     class Meta:
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["name"], name="character_name_idx"),
+            models.Index(fields=["film_count"], name="character_film_count_idx"),
+            models.Index(
+                fields=["starship_count"], name="character_starship_count_idx"
+            ),
+        ]
 
 
 class Starship(models.Model):
@@ -125,6 +144,9 @@ class Starship(models.Model):
         MGLT (str): Speed in MGLT (megalights per hour).
         starship_class (str): The class of the starship.
         pilots (ManyToManyField): Related characters who pilot the starship.
+            This is the single source of truth for the pilot relationship and
+            is exposed on the character side as ``Character.starships``.
+        pilot_count (int): Number of characters who pilot the starship.
         created (DateTime): When the starship record was created.
         edited (DateTime): Timestamp of last edit.
         url (URL): URL identifier for the starship.
@@ -143,7 +165,8 @@ class Starship(models.Model):
     hyperdrive_rating = models.CharField(max_length=50)
     MGLT = models.CharField(max_length=50)
     starship_class = models.CharField(max_length=100)
-    pilots = models.ManyToManyField("Character", related_name="piloting_starships")
+    pilots = models.ManyToManyField("Character", related_name="starships")
+    pilot_count = models.PositiveIntegerField(default=0, editable=False)
     created = models.DateTimeField()
     edited = models.DateTimeField()
     url = models.URLField()
@@ -154,3 +177,251 @@ class Starship(models.Model):
 
     class Meta:
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["name"], name="starship_name_idx"),
+            models.Index(fields=["pilot_count"], name="starship_pilot_count_idx"),
+        ]
+
+
+class StatSummary(models.Model):
+    """Precomputed aggregate backing the ``/api/stats/`` endpoints.
+
+    Each row holds one bucket of one statistic, e.g. the number of characters
+    with a given gender. Rows are rebuilt by :func:`api.stats.refresh_stats`, so
+    reading a statistic never touches the base tables.
+
+    Attributes:
+        kind (str): The statistic the row belongs to, e.g. ``gender-distribution``.
+        key (str): The bucket label, e.g. ``female``.
+        value (int): The aggregated count for the bucket.
+        refreshed (DateTime): When the statistic was last recomputed.
+    """
+
+    kind = models.CharField(max_length=50)
+    key = models.CharField(max_length=500)
+    value = models.IntegerField()
+    refreshed = models.DateTimeField()
+
+    def __str__(self):
+        """Returns the string representation of the statistic bucket."""
+        return f"{self.kind}: {self.key} = {self.value}"
+
+    class Meta:
+        ordering = ["kind", "-value", "key"]
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "key"], name="unique_stat_bucket")
+        ]
+
+
+class VoteTally(models.Model):
+    """Persisted vote count of a character, film or starship.
+
+    Votes are first counted in a buffer (see :mod:`api.votes`) and added to
+    these rows in batches, so popular items never see row-lock contention on
+    the request path.
+
+    Attributes:
+        kind (str): The type of the voted object: character, film or starship.
+        object_id (int): The primary key of the voted object.
+        votes (int): The number of flushed votes.
+        updated (DateTime): When votes were last flushed into the row.
+    """
+
+    KIND_CHOICES = [
+        ("character", "Character"),
+        ("film", "Film"),
+        ("starship", "Starship"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    votes = models.PositiveIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """Returns the string representation of the tally."""
+        return f"{self.kind} {self.object_id}: {self.votes} votes"
+
+    class Meta:
+        ordering = ["kind", "-votes"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "object_id"], name="unique_vote_tally"
+            )
+        ]
+
+
+class ProfileReport(models.Model):
+    """Result of an on-demand profiling run of one API request.
+
+    Reports are kept as a bounded ring buffer: only the newest
+    ``PROFILE_HISTORY_SIZE`` rows are retained (see :mod:`api.profiling`).
+
+    Attributes:
+        created (DateTime): When the request was profiled.
+        method (str): The HTTP method of the request.
+        path (str): The full path of the request, including the query string.
+        mode (str): The profiler used: ``cprofile`` or ``alloc``.
+        user (str): The staff user or token that triggered the run.
+        status_code (int): The status code of the profiled response.
+        duration_ms (float): Wall-clock duration of the profiled request.
+        stats (str): The sorted profiler output.
+    """
+
+    MODE_CHOICES = [("cprofile", "cProfile"), ("alloc", "tracemalloc")]
+
+    created = models.DateTimeField(auto_now_add=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2000)
+    mode = models.CharField(max_length=10, choices=MODE_CHOICES)
+    user = models.CharField(max_length=150, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    stats = models.TextField()
+
+    def __str__(self):
+        """Returns the string representation of the report."""
+        return f"{self.mode} {self.method} {self.path}"
+
+    class Meta:
+        ordering = ["-created"]
+
+
+class SyncRun(models.Model):
+    """Timings, volumes and errors of one ``fetch_swapi_data`` run.
+
+    Runs are recorded by :class:`api.sync.SyncRecorder`.
+
+    Attributes:
+        started (DateTime): When the run started.
+        finished (DateTime): When the run ended; empty while it is running.
+        status (str): ``running``, ``succeeded`` or ``failed``.
+        limit (int): The ``--limit`` the run was started with, if any.
+        duration_ms (float): Wall-clock duration of the whole run.
+        http_requests (int): Requests sent to SWAPI.
+        http_bytes (int): Bytes received from SWAPI.
+        sql_queries (int): SQL queries executed, including derived data rebuilds.
+        peak_memory_kb (int): Peak resident memory of the process by the end
+            of the run.
+        error_count (int): Errors logged during the run.
+        errors (list): The first ``MAX_ERRORS`` error messages.
+        phases (dict): Per resource, the ``fetch_ms`` and ``write_ms`` durations,
+            ``http_requests``, ``http_bytes``, ``sql_queries``, ``rows_before``,
+            ``rows_after``, ``row_delta`` and ``errors``. Staged runs write to the
+            staging tables per resource and add a ``publish`` phase holding the
+            ``merged`` row counts per model.
+    """
+
+    STATUS_CHOICES = [
+        ("running", "Running"),
+        ("succeeded", "Succeeded"),
+        ("failed", "Failed"),
+    ]
+    MAX_ERRORS = 100
+
+    started = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="running")
+    limit = models.PositiveIntegerField(null=True, blank=True)
+    duration_ms = models.FloatField(null=True, blank=True)
+    http_requests = models.PositiveIntegerField(default=0)
+    http_bytes = models.PositiveBigIntegerField(default=0)
+    sql_queries = models.PositiveIntegerField(default=0)
+    peak_memory_kb = models.PositiveIntegerField(null=True, blank=True)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    phases = models.JSONField(default=dict, blank=True)
+
+    def __str__(self):
+        """Returns the string representation of the run."""
+        return f"Sync run {self.pk} ({self.status})"
+
+    class Meta:
+        ordering = ["-started"]
+
+
+class RenderedDocument(models.Model):
+    """Final JSON body of a character, film or starship detail response.
+
+    Rows are re-rendered by :mod:`api.documents` whenever the object or its
+    relations change, so detail reads return the stored bytes with one indexed
+    lookup instead of loading relations and running the serializer.
+
+    Attributes:
+        kind (str): The type of the object: character, film or starship.
+        object_id (int): The primary key of the object.
+        body (bytes): The JSON rendered from the object's serializer.
+        rendered (DateTime): When the body was last rendered.
+    """
+
+    kind = models.CharField(max_length=20, choices=VoteTally.KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    body = models.BinaryField()
+    rendered = models.DateTimeField()
+
+    def __str__(self):
+        """Returns the string representation of the document."""
+        return f"{self.kind} {self.object_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "object_id"], name="unique_rendered_document"
+            )
+        ]
+
+
+class ChangeLogEntry(models.Model):
+    """One change of a character, film or starship, in commit order.
+
+    Entries are appended by :mod:`api.changes` whenever the rendered document
+    of an object is written or dropped, and served by ``/api/changes/``.
+
+    Attributes:
+        seq (int): The sequence number; increases in the order entries commit.
+        kind (str): The type of the object: character, film or starship.
+        object_id (int): The primary key of the object.
+        deleted (bool): Whether the object was deleted (a tombstone).
+        created (DateTime): When the change was recorded.
+    """
+
+    seq = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=20, choices=VoteTally.KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+    created = models.DateTimeField()
+
+    def __str__(self):
+        """Returns the string representation of the entry."""
+        action = "delete" if self.deleted else "upsert"
+        return f"{self.seq}: {action} {self.kind} {self.object_id}"
+
+    class Meta:
+        ordering = ["seq"]
+        indexes = [
+            models.Index(fields=["kind", "object_id"], name="changelog_object_idx"),
+        ]
+
+
+class ChangeLogCompaction(models.Model):
+    """One compaction run of the change log (see :func:`api.changes.compact`).
+
+    Attributes:
+        created (DateTime): When the compaction ran.
+        superseded (int): Entries dropped because a later one covers the object.
+        expired (int): Tombstones dropped for being older than the retention.
+        expired_through (int): The highest sequence number of a dropped
+            tombstone; clients that last synced before it have to start over.
+    """
+
+    created = models.DateTimeField(auto_now_add=True)
+    superseded = models.PositiveIntegerField(default=0)
+    expired = models.PositiveIntegerField(default=0)
+    expired_through = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        """Returns the string representation of the compaction."""
+        return f"Compaction {self.pk} through {self.expired_through}"
+
+    class Meta:
+        ordering = ["-created"]
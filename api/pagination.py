@@ -0,0 +1,226 @@
+"""
+Page number pagination with cheap approximate counts.
+
+Filling in ``count`` takes a ``SELECT COUNT(*)`` over the filtered queryset,
+which on large tables costs more than fetching the page itself.
+:class:`ApproximateCountPagination` avoids it:
+
+* Exact counts of characters, films and starships are cached per filter
+  signature for ``EXACT_COUNT_CACHE_TTL`` seconds, and dropped as soon as the
+  table changes (see :func:`invalidate_counts`).
+* Unfiltered lists of tables known to hold at least
+  ``APPROXIMATE_COUNT_THRESHOLD`` rows get PostgreSQL's estimate instead, from
+  the table statistics (``pg_class.reltuples``), which is as cheap as reading a
+  cached count. A table's size is known from its last unfiltered exact count or
+  estimate, cached for ``TABLE_SIZE_CACHE_TTL`` seconds, so tables of unknown
+  or small size cost no query beyond the count. Filtered lists are counted.
+
+Responses carry ``count_is_approximate``. As an estimate may be off, pages past
+the estimated last page are still served while rows remain, and the ``next``
+link is based on whether a further row exists. Clients needing an exact count
+pass ``?exact_count=1``.
+
+Classes:
+    ApproximateCountPaginator: Django paginator counting with estimates.
+    ApproximateCountPagination: DRF pagination using that paginator.
+
+Functions:
+    estimate_count: Returns the planner's row estimate for a queryset.
+    is_unfiltered: Returns whether a queryset selects every row of its table.
+    invalidate_counts: Drops the cached exact counts of a model.
+"""
+
+import hashlib
+import json
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.translation import gettext_lazy as _
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+from .models import Character, Film, Starship
+from .versions import bump_version, get_version, table_version_name
+
+# Models whose writes invalidate their cached counts, through api.signals
+CACHED_COUNT_MODELS = (Character, Film, Starship)
+
+
+def invalidate_counts(model):
+    """Bumps the table version of `model`, dropping its cached exact counts."""
+    bump_version(table_version_name(model))
+
+
+def _count_cache_key(queryset):
+    sql, params = queryset.order_by().query.get_compiler(queryset.db).as_sql()
+    signature = hashlib.sha256(repr((sql, params)).encode()).hexdigest()[:32]
+    version = get_version(table_version_name(queryset.model))
+    return f"exact-count:{queryset.model._meta.label_lower}:{version}:{signature}"
+
+
+def _table_size_key(model, using):
+    return f"table-size:{using}:{model._meta.label_lower}"
+
+
+def is_unfiltered(queryset):
+    """Returns whether `queryset` selects every row of its table."""
+    query = queryset.query
+    return not query.where and not query.distinct and not query.is_sliced
+
+
+def estimate_count(queryset):
+    """
+    Estimate the number of rows of a queryset without counting them.
+
+    :param queryset: The queryset.
+    :return: The planner's estimate, or None if the database cannot estimate it
+        (only PostgreSQL can) or the table was never analyzed.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        if is_unfiltered(queryset):
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                [connection.ops.quote_name(queryset.model._meta.db_table)],
+            )
+            row = cursor.fetchone()
+            # reltuples is -1 until the table is first analyzed
+            return int(row[0]) if row and row[0] >= 0 else None
+        sql, params = queryset.order_by().query.get_compiler(queryset.db).as_sql()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class _ApproximatePage(Page):
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class ApproximateCountPaginator(Paginator):
+    """A paginator whose count may be the planner's estimate.
+
+    Attributes:
+        exact (bool): Whether the count must be exact.
+        count_is_approximate (bool): Whether :attr:`count` is an estimate.
+    """
+
+    def __init__(self, object_list, per_page, *args, exact=False, **kwargs):
+        super().__init__(object_list, per_page, *args, **kwargs)
+        self.exact = exact
+        self.count_is_approximate = False
+        self._count = None
+
+    def _get_count(self):
+        """Returns the number of objects, computed once per paginator."""
+        if self._count is None:
+            self._count = self._compute_count()
+        return self._count
+
+    count = property(_get_count)
+
+    def _compute_count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return super().count
+        cached = queryset.model in CACHED_COUNT_MODELS
+        key = _count_cache_key(queryset) if cached else None
+        unfiltered = is_unfiltered(queryset)
+        size_key = _table_size_key(queryset.model, queryset.db)
+        if not self.exact:
+            count = cache.get(key) if cached else None
+            if count is not None:
+                return count
+            size = cache.get(size_key) if unfiltered else None
+            if size is not None and size >= settings.APPROXIMATE_COUNT_THRESHOLD:
+                estimate = estimate_count(queryset)
+                if (
+                    estimate is not None
+                    and estimate >= settings.APPROXIMATE_COUNT_THRESHOLD
+                ):
+                    cache.set(size_key, estimate, settings.TABLE_SIZE_CACHE_TTL)
+                    self.count_is_approximate = True
+                    return estimate
+        count = queryset.count()
+        if cached:
+            cache.set(key, count, settings.EXACT_COUNT_CACHE_TTL)
+        if unfiltered:
+            cache.set(size_key, count, settings.TABLE_SIZE_CACHE_TTL)
+        return count
+
+    def validate_number(self, number):
+        _ = self.count  # Decides whether the count is approximate
+        if not self.count_is_approximate:
+            return super().validate_number(number)
+        # Estimates may be low, so the upper bound is checked by page()
+        try:
+            number = int(number)
+        except (TypeError, ValueError) as error:
+            raise PageNotAnInteger(_("That page number is not an integer")) from error
+        if number < 1:
+            raise EmptyPage(_("That page number is less than 1"))
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.count_is_approximate:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        # One row more than the page tells whether there is a next page
+        rows = list(self.object_list[bottom : bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(_("That page contains no results"))
+        return _ApproximatePage(
+            rows[: self.per_page], number, self, has_next=len(rows) > self.per_page
+        )
+
+
+class ApproximateCountPagination(PageNumberPagination):
+    """Page number pagination whose ``count`` may be an estimate.
+
+    Attributes:
+        exact_count_query_param (str): Parameter requesting an exact count.
+    """
+
+    django_paginator_class = ApproximateCountPaginator
+    exact_count_query_param = "exact_count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        exact = request.query_params.get(self.exact_count_query_param) in (
+            "1",
+            "true",
+        )
+        self.django_paginator_class = partial(ApproximateCountPaginator, exact=exact)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "count": self.page.paginator.count,
+                "count_is_approximate": self.page.paginator.count_is_approximate,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema["properties"]["count_is_approximate"] = {
+            "type": "boolean",
+            "description": "Whether `count` is an estimate; "
+            "pass `exact_count=1` for an exact count.",
+        }
+        return schema
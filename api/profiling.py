@@ -0,0 +1,173 @@
+"""
+On-demand profiling of individual API requests.
+
+Adding ``?profile=cprofile`` or ``?profile=alloc`` to any request runs it under
+:mod:`cProfile` or :mod:`tracemalloc` and returns the sorted statistics as plain
+text instead of the normal response. Every run is also stored as a
+:class:`~api.models.ProfileReport`, viewable in the admin, and only the newest
+``PROFILE_HISTORY_SIZE`` reports are kept.
+
+Profiling is only honoured for staff users or requests carrying a signed token
+(``?profile_token=`` or the ``X-Profile-Token`` header) minted with the
+``create_profile_token`` management command. Requests without the ``profile``
+parameter pay a single dictionary lookup.
+
+Optional parameters:
+    ``profile_sort``: pstats sort key for ``cprofile`` (default ``cumulative``).
+    ``profile_limit``: Number of rows to report (default 50).
+
+Classes:
+    ProfilingMiddleware: Runs opted-in requests under a profiler.
+
+Functions:
+    make_profile_token: Creates a signed profiling token.
+"""
+
+import io
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core import signing
+from django.http import HttpResponse
+
+from .models import ProfileReport
+
+TOKEN_SALT = "api.profiling"
+SORT_KEYS = {"cumulative", "tottime", "calls", "ncalls", "time"}
+
+
+def make_profile_token(issuer):
+    """
+    Create a token that allows profiling without a staff session.
+
+    :param issuer: Recorded as the user of the reports made with the token.
+    :return: The signed token; valid for ``PROFILE_TOKEN_MAX_AGE`` seconds.
+    """
+    return signing.dumps({"issuer": issuer}, salt=TOKEN_SALT)
+
+
+def _profiling_user(request):
+    """Returns who may profile `request`, or None if profiling is not allowed."""
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated and user.is_staff:
+        return user.get_username()
+    token = request.GET.get("profile_token") or request.headers.get("X-Profile-Token")
+    if not token:
+        return None
+    try:
+        payload = signing.loads(
+            token, salt=TOKEN_SALT, max_age=settings.PROFILE_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return None
+    return f"token:{payload['issuer']}"
+
+
+def _run_cprofile(get_response, request, limit):
+    # Imported here: pstats alone costs tens of milliseconds of every worker boot
+    # pylint: disable=import-outside-toplevel
+    import cProfile
+    import pstats
+
+    sort = request.GET.get("profile_sort", "cumulative")
+    profiler = cProfile.Profile()
+    response = profiler.runcall(get_response, request)
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats(sort if sort in SORT_KEYS else "cumulative").print_stats(limit)
+    return response, stream.getvalue()
+
+
+def _run_tracemalloc(get_response, request, limit):
+    # Leave tracing running if something else started it before us.
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(25)
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    try:
+        response = get_response(request)
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if started:
+            tracemalloc.stop()
+    lines = [
+        f"Peak traced memory: {peak / 1024:.1f} KiB",
+        f"Still allocated: {current / 1024:.1f} KiB",
+        f"Top {limit} allocation sites during the request:",
+    ]
+    lines.extend(str(stat) for stat in after.compare_to(before, "lineno")[:limit])
+    return response, "\n".join(lines)
+
+
+PROFILERS = {"cprofile": _run_cprofile, "alloc": _run_tracemalloc}
+
+
+def _report_path(request):
+    """The path of `request` without the ``profile*`` parameters.
+
+    Reports outlive the token that made them, which must not be readable from
+    the admin.
+    """
+    query = request.GET.copy()
+    for name in list(query):
+        if name.startswith("profile"):
+            del query[name]
+    if not query:
+        return request.path
+    return f"{request.path}?{query.urlencode()}"
+
+
+class ProfilingMiddleware:
+    """
+    Runs requests carrying ``?profile=<mode>`` under a profiler.
+
+    Must come after ``AuthenticationMiddleware``, which sets ``request.user``.
+    Requests that are not allowed to profile are served normally.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = request.GET.get("profile")
+        if mode is None:
+            return self.get_response(request)
+        profiler = PROFILERS.get(mode)
+        user = _profiling_user(request) if profiler else None
+        if user is None:
+            return self.get_response(request)
+
+        try:
+            limit = max(1, int(request.GET.get("profile_limit", 50)))
+        except ValueError:
+            limit = 50
+        start = time.perf_counter()
+        response, stats = profiler(self.get_response, request, limit)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        report = ProfileReport.objects.create(
+            method=request.method,
+            path=_report_path(request)[:2000],
+            mode=mode,
+            user=user,
+            status_code=response.status_code,
+            duration_ms=duration_ms,
+            stats=stats,
+        )
+        self._prune()
+
+        profiled = HttpResponse(stats, content_type="text/plain; charset=utf-8")
+        profiled["X-Profile-Report"] = str(report.pk)
+        profiled["X-Profiled-Status"] = str(response.status_code)
+        return profiled
+
+    @staticmethod
+    def _prune():
+        """Deletes the reports that fell out of the ring buffer."""
+        stale = ProfileReport.objects.order_by("-created", "-pk").values_list(
+            "pk", flat=True
+        )[settings.PROFILE_HISTORY_SIZE :]
+        ProfileReport.objects.filter(pk__in=list(stale)).delete()
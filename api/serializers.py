@@ -1,8 +1,12 @@
 from rest_framework import serializers
-from .models import Character, Film, Starship
+from .models import Character, Film, Starship, SyncRun
 
 
 class CharacterSerializer(serializers.ModelSerializer):
+    starships = serializers.PrimaryKeyRelatedField(
+        many=True, queryset=Starship.objects.all(), required=False
+    )
+
     class Meta:
         model = Character
         fields = "__all__"
@@ -18,3 +22,11 @@ class StarshipSerializer(serializers.ModelSerializer):
     class Meta:
         model = Starship
         fields = "__all__"
+
+
+class SyncRunSerializer(serializers.ModelSerializer):
+    previous_duration_ms = serializers.FloatField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = SyncRun
+        fields = "__all__"
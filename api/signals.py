@@ -0,0 +1,375 @@
+"""
+Signal handlers that keep derived data in sync with the core models.
+
+Writes to films, characters and starships (including their many-to-many
+relations) refresh the data derived from them, such as the precomputed
+statistics in :mod:`api.stats`, the co-appearance graph in :mod:`api.graph`,
+the relation counts in :mod:`api.counts`, the cached list counts in
+:mod:`api.pagination` and the rendered documents in :mod:`api.documents`, whose
+changes are appended to the change log in :mod:`api.changes` and announced on the
+event stream in :mod:`api.stream`.
+
+Bulk operations like ``fetch_swapi_data`` touch thousands of rows, so running
+the per-row handlers for each of them would be wasteful. They wrap their work in
+:func:`bulk_sync`, which suspends the handlers and rebuilds all derived data once
+at the end.
+
+A single API write saves a row and then sets its relations, each of which would
+re-render documents and append to the change log. The API wraps its writes in
+:func:`batched_writes` instead, which runs them in one transaction and renders
+the touched documents once at the end, logging them in a single insert.
+
+Functions:
+    bulk_sync: Context manager that defers maintenance to a single rebuild.
+    batched_writes: Context manager that renders documents once per transaction.
+    rebuild_derived_data: Rebuilds every piece of derived data from scratch.
+"""
+
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import graph, stream
+from .changes import record_changes
+from .documents import RELATION_DOCUMENTS, rebuild_documents, refresh_documents
+from .counts import refresh_all_counts, refresh_character_counts, refresh_starship_counts
+from .models import Character, Film, Starship
+from .pagination import CACHED_COUNT_MODELS, invalidate_counts
+from .stats import refresh_stats, schedule_refresh, stats_reading
+
+_state = threading.local()
+
+
+def _in_bulk_sync():
+    return getattr(_state, "bulk_sync", False)
+
+
+@contextmanager
+def bulk_sync():
+    """Suspends per-row signal handlers and rebuilds derived data on exit.
+
+    Nested uses are allowed; only the outermost block triggers the rebuild. The
+    rebuild also runs when the block raises, since earlier rows may already have
+    been written.
+    """
+    outermost = not _in_bulk_sync()
+    _state.bulk_sync = True
+    try:
+        yield
+    finally:
+        if outermost:
+            _state.bulk_sync = False
+            rebuild_derived_data()
+
+
+@contextmanager
+def batched_writes():
+    """Runs writes in one transaction and re-renders their documents at the end.
+
+    The documents touched by the per-row handlers are collected instead of being
+    rendered right away, then rendered once per model before the transaction
+    commits, and their changes are appended to the change log in one insert.
+    Nested uses join the outermost block.
+    """
+    if getattr(_state, "pending_documents", None) is not None:
+        yield
+        return
+    _state.pending_documents = {}
+    try:
+        with transaction.atomic():
+            yield
+            pending, _state.pending_documents = _state.pending_documents, None
+            _refresh_documents(*pending.items())
+    finally:
+        _state.pending_documents = None
+
+
+def _invalidate_caches():
+    graph.invalidate()
+    for model in CACHED_COUNT_MODELS:
+        invalidate_counts(model)
+
+
+def rebuild_derived_data():
+    """Rebuilds every piece of derived data from the current base tables.
+
+    The rebuild is atomic and joins the caller's transaction, if any, so that
+    callers can commit it together with the base tables. The caches are
+    invalidated again once it commits.
+    """
+    with transaction.atomic():
+        refresh_all_counts()
+        refresh_stats()
+        stream.publish_changes(record_changes(rebuild_documents()))
+        _invalidate_caches()
+        transaction.on_commit(_invalidate_caches)
+
+
+@receiver(post_save, sender=Film)
+@receiver(post_save, sender=Character)
+@receiver(post_save, sender=Starship)
+@receiver(post_delete, sender=Film)
+@receiver(post_delete, sender=Character)
+@receiver(post_delete, sender=Starship)
+def invalidate_counts_on_write(sender, **kwargs):
+    """Drops the cached list counts of a model after a row is saved or deleted."""
+    if not _in_bulk_sync():
+        invalidate_counts(sender)
+        # Again once committed, in case a reader cached the old count meanwhile
+        transaction.on_commit(lambda: invalidate_counts(sender))
+
+
+@receiver(post_save, sender=Film)
+@receiver(post_save, sender=Character)
+@receiver(post_save, sender=Starship)
+@receiver(post_delete, sender=Film)
+@receiver(post_delete, sender=Character)
+@receiver(post_delete, sender=Starship)
+def refresh_stats_on_write(sender, signal, **kwargs):
+    """Schedules the statistics reading a model once a save or delete commits."""
+    if not _in_bulk_sync():
+        kinds = stats_reading(sender, deleted=signal is post_delete)
+        transaction.on_commit(partial(schedule_refresh, kinds))
+
+
+@receiver(m2m_changed, sender=Film.characters.through)
+@receiver(m2m_changed, sender=Starship.pilots.through)
+def refresh_stats_on_relation_change(sender, action, **kwargs):
+    """Schedules the statistics reading a relation once its change commits."""
+    if action in ("post_add", "post_remove", "post_clear") and not _in_bulk_sync():
+        transaction.on_commit(partial(schedule_refresh, stats_reading(sender)))
+
+
+@receiver(m2m_changed, sender=Film.characters.through)
+def patch_graph_on_cast_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Patches the co-appearance graph after the cast of a film changes."""
+    if _in_bulk_sync() or action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if action == "post_clear":
+        # The cleared rows are gone, so there is nothing left to patch from.
+        graph.invalidate()
+        return
+    film_ids = pk_set if reverse else {instance.pk}
+    members = {film_id: [] for film_id in film_ids}
+    for film_id, character_id in sender.objects.filter(
+        film_id__in=film_ids
+    ).values_list("film_id", "character_id"):
+        members[film_id].append(character_id)
+    for film_id, character_ids in members.items():
+        graph.set_film_members(film_id, character_ids)
+
+
+@receiver(post_delete, sender=Film)
+def remove_film_from_graph(sender, instance, **kwargs):
+    """Drops a deleted film from the co-appearance graph."""
+    if not _in_bulk_sync():
+        graph.remove_film(instance.pk)
+
+
+@receiver(post_delete, sender=Character)
+def remove_character_from_graph(sender, instance, **kwargs):
+    """Drops a deleted character from the co-appearance graph."""
+    if not _in_bulk_sync():
+        graph.remove_character(instance.pk)
+
+
+@receiver(m2m_changed, sender=Film.characters.through)
+def update_counts_on_cast_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Updates ``Character.film_count`` after the cast of a film changes."""
+    if _in_bulk_sync():
+        return
+    if action == "pre_clear" and not reverse:
+        # The rows are gone after the clear, so remember who was in the cast.
+        instance._cleared_character_ids = list(
+            sender.objects.filter(film_id=instance.pk).values_list(
+                "character_id", flat=True
+            )
+        )
+    elif action in ("post_add", "post_remove"):
+        refresh_character_counts({instance.pk} if reverse else pk_set)
+    elif action == "post_clear":
+        if reverse:
+            refresh_character_counts([instance.pk])
+        else:
+            refresh_character_counts(instance.__dict__.pop("_cleared_character_ids", []))
+
+
+@receiver(m2m_changed, sender=Starship.pilots.through)
+def update_counts_on_pilot_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Updates ``Character.starship_count`` and ``Starship.pilot_count``."""
+    if _in_bulk_sync():
+        return
+    if action == "pre_clear":
+        # The rows are gone after the clear, so remember the other side.
+        if reverse:
+            cleared = sender.objects.filter(character_id=instance.pk)
+            instance._cleared_pilot_ids = list(
+                cleared.values_list("starship_id", flat=True)
+            )
+        else:
+            cleared = sender.objects.filter(starship_id=instance.pk)
+            instance._cleared_pilot_ids = list(
+                cleared.values_list("character_id", flat=True)
+            )
+        return
+    if action in ("post_add", "post_remove"):
+        related_ids = pk_set
+    elif action == "post_clear":
+        related_ids = instance.__dict__.pop("_cleared_pilot_ids", [])
+    else:
+        return
+    if reverse:
+        refresh_character_counts([instance.pk])
+        refresh_starship_counts(related_ids)
+    else:
+        refresh_starship_counts([instance.pk])
+        refresh_character_counts(related_ids)
+
+
+@receiver(pre_delete, sender=Film)
+@receiver(pre_delete, sender=Character)
+@receiver(pre_delete, sender=Starship)
+def remember_related_ids(sender, instance, **kwargs):
+    """Records the rows whose counts change when `instance` is deleted.
+
+    Deleting a row cascades to the through tables without sending
+    ``m2m_changed``, so the affected rows have to be collected beforehand.
+    """
+    if _in_bulk_sync():
+        return
+    if sender is Film:
+        instance._count_related = (
+            list(instance.characters.values_list("pk", flat=True)),
+            [],
+        )
+    elif sender is Character:
+        instance._count_related = (
+            [],
+            list(instance.starships.values_list("pk", flat=True)),
+        )
+    else:
+        instance._count_related = (
+            list(instance.pilots.values_list("pk", flat=True)),
+            [],
+        )
+
+
+@receiver(post_delete, sender=Film)
+@receiver(post_delete, sender=Character)
+@receiver(post_delete, sender=Starship)
+def update_counts_on_delete(sender, instance, **kwargs):
+    """Updates the counts of the rows that were related to a deleted one."""
+    related = instance.__dict__.pop("_count_related", None)
+    if related is None or _in_bulk_sync():
+        return
+    character_ids, starship_ids = related
+    if character_ids:
+        refresh_character_counts(character_ids)
+    if starship_ids:
+        refresh_starship_counts(starship_ids)
+
+
+def _refresh_documents(*targets):
+    """Re-renders documents, then logs and announces those that changed.
+
+    Inside :func:`batched_writes` the documents are only collected, to be
+    rendered when the block ends.
+
+    :param targets: ``(model, pks)`` pairs of the documents to re-render.
+    """
+    pending = getattr(_state, "pending_documents", None)
+    if pending is not None:
+        for model, pks in targets:
+            pending.setdefault(model, set()).update(pks)
+        return
+    with transaction.atomic():
+        changes = []
+        for model, pks in targets:
+            changes += refresh_documents(model, pks)
+        stream.publish_changes(record_changes(changes))
+
+
+# The document handlers are registered last, so that they render the counts
+# refreshed by the handlers above.
+@receiver(post_save, sender=Film)
+@receiver(post_save, sender=Character)
+@receiver(post_save, sender=Starship)
+def refresh_document_on_save(sender, instance, **kwargs):
+    """Re-renders the document of a saved row."""
+    if not _in_bulk_sync():
+        _refresh_documents((sender, [instance.pk]))
+
+
+def _through_column(through, model):
+    return next(
+        field.attname for field in through._meta.fields if field.related_model is model
+    )
+
+
+@receiver(m2m_changed, sender=Film.characters.through)
+@receiver(m2m_changed, sender=Film.starships.through)
+@receiver(m2m_changed, sender=Starship.pilots.through)
+def refresh_documents_on_relation_change(
+    sender, instance, action, model, pk_set, **kwargs
+):
+    """Re-renders the documents showing a changed relation, one render per side.
+
+    A side whose documents do not show the relation, like starships for the
+    films they appear in, is left alone.
+    """
+    if _in_bulk_sync():
+        return
+    sides = RELATION_DOCUMENTS[sender]
+    if action == "pre_clear":
+        if model not in sides:
+            return
+        # The rows are gone after the clear, so remember the other side.
+        cleared = sender.objects.filter(
+            **{_through_column(sender, type(instance)): instance.pk}
+        )
+        instance._cleared_document_ids = list(
+            cleared.values_list(_through_column(sender, model), flat=True)
+        )
+        return
+    if action in ("post_add", "post_remove"):
+        related_ids = pk_set
+    elif action == "post_clear":
+        related_ids = instance.__dict__.pop("_cleared_document_ids", [])
+    else:
+        return
+    targets = [(type(instance), [instance.pk]), (model, related_ids)]
+    _refresh_documents(*(target for target in targets if target[0] in sides))
+
+
+@receiver(pre_delete, sender=Film)
+@receiver(pre_delete, sender=Character)
+@receiver(pre_delete, sender=Starship)
+def remember_related_documents(sender, instance, **kwargs):
+    """Records the rows whose documents change when `instance` is deleted."""
+    if _in_bulk_sync():
+        return
+    if sender is Film:
+        related = {Character: instance.characters}
+    elif sender is Character:
+        related = {Film: instance.films, Starship: instance.starships}
+    else:
+        related = {Character: instance.pilots, Film: instance.films}
+    instance._document_related = {
+        model: list(manager.values_list("pk", flat=True))
+        for model, manager in related.items()
+    }
+
+
+@receiver(post_delete, sender=Film)
+@receiver(post_delete, sender=Character)
+@receiver(post_delete, sender=Starship)
+def refresh_documents_on_delete(sender, instance, **kwargs):
+    """Drops the document of a deleted row and re-renders the related ones."""
+    related = instance.__dict__.pop("_document_related", None)
+    if _in_bulk_sync():
+        return
+    _refresh_documents((sender, [instance.pk]), *(related or {}).items())
@@ -0,0 +1,331 @@
+"""
+Staged ingestion for ``fetch_swapi_data --staging``.
+
+The default sync writes every SWAPI record with its own ``update_or_create`` and
+``set()`` calls. Readers see the data change row by row for the whole run, and
+the run holds row locks and sends thousands of small statements to the primary
+while requests are being served. :class:`StagedSync` separates loading from
+publishing:
+
+1. Fetched records are validated with the model fields and loaded into
+   temporary staging tables, with ``COPY`` on PostgreSQL. Temporary tables are
+   private to the connection and skip the write-ahead log, so neither readers
+   nor replicas see this work.
+2. :meth:`StagedSync.publish` first resolves the SWAPI URL of every related
+   object to its natural key (``name`` or ``title``), from the staged records
+   or else the live rows, looked up by one ``UPDATE`` joining the live table,
+   and stages the relations by key. It then merges the staged tables into the
+   live ones in a single transaction of set-based statements: one ``UPDATE``
+   of the changed rows and one ``INSERT`` of the new rows per model, matched on
+   the natural key the default sync uses, then the replacement of the staged
+   objects' relations. Every join is an equality on an indexed natural key.
+   Readers see either the data before the sync or all of it, and a failed
+   merge changes nothing.
+
+Classes:
+    StagedSync: Stages fetched records and publishes them in one transaction.
+"""
+
+import csv
+import io
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import JSONField
+
+from .models import Character, Film, Starship
+
+# The field matching SWAPI records to existing rows, as in the default sync
+NATURAL_KEYS = {Character: "name", Film: "title", Starship: "name"}
+
+
+def _quote(name):
+    return connection.ops.quote_name(name)
+
+
+def _staged_fields(model):
+    """The fields filled from SWAPI records, i.e. all but the key and counters."""
+    return [
+        field
+        for field in model._meta.concrete_fields
+        if not field.primary_key and field.editable
+    ]
+
+
+def _clean(field, value):
+    """Converts a SWAPI value for `field` and checks it like a form would."""
+    value = field.to_python(value)
+    if value is None and not field.null:
+        raise ValidationError(f"{field.name} is required")
+    field.run_validators(value)
+    return value
+
+
+def _related_id(url):
+    """The SWAPI ID at the end of `url`, e.g. ``1`` for ``.../people/1/``."""
+    return url.rstrip("/").rsplit("/", 1)[-1]
+
+
+def _key_column(model):
+    return model._meta.get_field(NATURAL_KEYS[model]).column
+
+
+def _id_matches(url, swapi_id):
+    """SQL comparing the SWAPI ID at the end of the `url` column to `swapi_id`."""
+    if connection.vendor == "postgresql":
+        # An equality, so that the planner can hash the join
+        return f"substring({url} from '([^/]+)/*$') = {swapi_id}"
+    return f"({url} LIKE '%/' || {swapi_id} || '/' OR {url} LIKE '%/' || {swapi_id})"
+
+
+class StagedSync:
+    """Stages fetched records, then publishes them in one transaction.
+
+    Use it as a context manager: the staging tables are created on entry and
+    dropped on exit.
+
+    Attributes:
+        use_copy (bool): Whether rows are loaded with ``COPY``.
+        staged (dict): Number of staged rows per model.
+    """
+
+    def __init__(self, use_copy=None):
+        """
+        :param use_copy: Use ``COPY``; defaults to True on PostgreSQL.
+        """
+        if use_copy is None:
+            use_copy = connection.vendor == "postgresql"
+        self.use_copy = use_copy
+        self.staged = {model: 0 for model in NATURAL_KEYS}
+        self._tables = []
+        # Natural key of every staged record by SWAPI ID, and the staged
+        # relations as (owner key, related SWAPI ID) pairs, until publishing
+        self._keys = {model: {} for model in NATURAL_KEYS}
+        self._relations = {}
+
+    def __enter__(self):
+        for model in NATURAL_KEYS:
+            columns = [
+                (field.column, field.db_type(connection))
+                for field in _staged_fields(model)
+            ]
+            self._create(self._table(model), columns, [_key_column(model)])
+            for field in model._meta.local_many_to_many:
+                self._create(
+                    self._relation_table(field),
+                    [
+                        ("owner", self._key_type(model)),
+                        ("related_id", "varchar(100)"),
+                        ("related", self._key_type(field.related_model)),
+                    ],
+                    ["owner", "related_id"],
+                )
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        with connection.cursor() as cursor:
+            for table in self._tables:
+                cursor.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+        self._tables = []
+        return False
+
+    @staticmethod
+    def _table(model):
+        return f"staging_{model._meta.db_table}"
+
+    @staticmethod
+    def _relation_table(field):
+        return f"staging_{field.m2m_db_table()}"
+
+    @staticmethod
+    def _key_type(model):
+        return model._meta.get_field(NATURAL_KEYS[model]).db_type(connection)
+
+    def _create(self, table, columns, indexed):
+        definition = ", ".join(f"{_quote(name)} {kind}" for name, kind in columns)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+            cursor.execute(f"CREATE TEMPORARY TABLE {_quote(table)} ({definition})")
+            for column in indexed:
+                cursor.execute(
+                    f"CREATE INDEX {_quote(f'{table}_{column}')} "
+                    f"ON {_quote(table)} ({_quote(column)})"
+                )
+        self._tables.append(table)
+
+    def _load(self, table, columns, rows):
+        if not rows:
+            return
+        names = ", ".join(_quote(column) for column in columns)
+        with connection.cursor() as cursor:
+            if self.use_copy:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(rows)
+                buffer.seek(0)
+                cursor.cursor.copy_expert(
+                    f"COPY {_quote(table)} ({names}) FROM STDIN WITH (FORMAT csv)",
+                    buffer,
+                )
+            else:
+                placeholders = ", ".join(["%s"] * len(columns))
+                cursor.executemany(
+                    f"INSERT INTO {_quote(table)} ({names}) VALUES ({placeholders})",
+                    rows,
+                )
+
+    def _prepare(self, field, value):
+        if self.use_copy and isinstance(field, JSONField):
+            return json.dumps(value)
+        return field.get_db_prep_save(value, connection)
+
+    def stage(self, model, records):
+        """
+        Validate SWAPI records and load them into the staging tables of `model`.
+
+        Records failing validation are left out. When several records share a
+        natural key, the last one wins, like repeated ``update_or_create`` calls.
+
+        :param model: :class:`Character`, :class:`Film` or :class:`Starship`.
+        :param records: The records as returned by SWAPI.
+        :return: A message for every rejected record.
+        """
+        key = NATURAL_KEYS[model]
+        fields = _staged_fields(model)
+        valid, errors = {}, []
+        for record in records:
+            try:
+                values = [_clean(field, record[field.attname]) for field in fields]
+            except (KeyError, ValidationError) as error:
+                errors.append(
+                    f"Invalid {model._meta.model_name} '{record.get(key)}': {error!r}"
+                )
+                continue
+            valid[record[key]] = (values, record)
+
+        self._load(
+            self._table(model),
+            [field.column for field in fields],
+            [
+                [self._prepare(field, value) for field, value in zip(fields, values)]
+                for values, _ in valid.values()
+            ],
+        )
+        for owner, (_, record) in valid.items():
+            self._keys[model][_related_id(record["url"])] = owner
+        for field in model._meta.local_many_to_many:
+            self._relations.setdefault(field, []).extend(
+                (owner, _related_id(url))
+                for owner, (_, record) in valid.items()
+                for url in record.get(field.name, [])
+            )
+        self.staged[model] += len(valid)
+        return errors
+
+    def _resolve_live_keys(self, cursor, field):
+        """
+        Fill in the relations of `field` to objects that were not staged.
+
+        Their SWAPI IDs are looked up among the live rows by the ID ending their
+        URL, keeping the oldest row like the default sync.
+        """
+        table = _quote(self._relation_table(field))
+        related = _quote(field.related_model._meta.db_table)
+        related_key = _quote(_key_column(field.related_model))
+        cursor.execute(
+            f"UPDATE {table} SET related = r.{related_key} "
+            f"FROM (SELECT p.related_id, MIN(l.id) AS id FROM {table} p "
+            f"JOIN {related} l ON {_id_matches('l.url', 'p.related_id')} "
+            f"WHERE p.related IS NULL GROUP BY p.related_id) m "
+            f"JOIN {related} r ON r.id = m.id "
+            f"WHERE {table}.related IS NULL AND {table}.related_id = m.related_id"
+        )
+
+    def _stage_relations(self):
+        """Stages the relations by the natural keys of both ends."""
+        with connection.cursor() as cursor:
+            for field, pairs in self._relations.items():
+                keys = self._keys[field.related_model]
+                self._load(
+                    self._relation_table(field),
+                    ["owner", "related_id", "related"],
+                    sorted(
+                        {(owner, pk, keys.get(pk)) for owner, pk in pairs},
+                        key=lambda row: row[:2],
+                    ),
+                )
+                self._resolve_live_keys(cursor, field)
+        self._relations = {}
+
+    def _merge(self, cursor, model):
+        """Updates the changed rows of `model` and inserts the new ones."""
+        table, staging = _quote(model._meta.db_table), _quote(self._table(model))
+        key = _quote(_key_column(model))
+        columns = [_quote(field.column) for field in _staged_fields(model)]
+        distinct = "IS DISTINCT FROM" if connection.vendor == "postgresql" else "IS NOT"
+        cursor.execute(
+            f"UPDATE {table} SET "
+            + ", ".join(f"{column} = s.{column}" for column in columns)
+            + f" FROM {staging} s WHERE {table}.{key} = s.{key} AND ("
+            + " OR ".join(f"{table}.{c} {distinct} s.{c}" for c in columns)
+            + ")"
+        )
+        updated = cursor.rowcount
+
+        # Counters not filled from SWAPI start at their default until the rebuild
+        defaults = [
+            field
+            for field in model._meta.concrete_fields
+            if not field.primary_key and not field.editable
+        ]
+        names = columns + [_quote(field.column) for field in defaults]
+        values = [f"s.{column}" for column in columns] + ["%s"] * len(defaults)
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(names)}) "
+            f"SELECT {', '.join(values)} FROM {staging} s "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE t.{key} = s.{key})",
+            [field.get_default() for field in defaults],
+        )
+        return {"updated": updated, "inserted": cursor.rowcount}
+
+    def _replace_relations(self, cursor, model, field):
+        """Replaces the relations of the staged objects with the staged ones."""
+        through_table = _quote(field.m2m_db_table())
+        owner_column = _quote(field.m2m_column_name())
+        related_column = _quote(field.m2m_reverse_name())
+        owners = _quote(model._meta.db_table)
+        related = _quote(field.related_model._meta.db_table)
+        key = _quote(_key_column(model))
+        related_key = _quote(_key_column(field.related_model))
+        cursor.execute(
+            f"DELETE FROM {through_table} WHERE {owner_column} IN "
+            f"(SELECT o.id FROM {owners} o "
+            f"JOIN {_quote(self._table(model))} s ON o.{key} = s.{key})"
+        )
+        # The first match is kept if several rows share a key
+        cursor.execute(
+            f"INSERT INTO {through_table} ({owner_column}, {related_column}) "
+            f"SELECT o.id, MIN(r.id) FROM {_quote(self._relation_table(field))} s "
+            f"JOIN {owners} o ON o.{key} = s.owner "
+            f"JOIN {related} r ON r.{related_key} = s.related "
+            f"GROUP BY o.id, s.related"
+        )
+
+    def publish(self):
+        """
+        Merge everything staged into the live tables in one transaction.
+
+        Callers may wrap it in a transaction of their own to write more changes
+        atomically with the merge, such as the derived data.
+
+        :return: The number of ``updated`` and ``inserted`` rows per model label.
+        """
+        self._stage_relations()
+        merged = {}
+        with transaction.atomic(), connection.cursor() as cursor:
+            for model in NATURAL_KEYS:
+                merged[model._meta.label] = self._merge(cursor, model)
+            for model in NATURAL_KEYS:
+                for field in model._meta.local_many_to_many:
+                    self._replace_relations(cursor, model, field)
+        return merged
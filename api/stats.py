@@ -0,0 +1,184 @@
+"""
+Precomputed aggregate statistics for the Star Wars API application.
+
+Dashboards ask the same handful of aggregate questions over and over. Instead of
+running a ``GROUP BY`` over the base tables on every request, each statistic is
+computed once and stored as :class:`~api.models.StatSummary` rows, which the
+``/api/stats/`` endpoints read with a single indexed lookup.
+
+Statistics are recomputed at the end of every ``fetch_swapi_data`` run, and
+after a write to the underlying models commits, only those reading the written
+model (see :mod:`api.signals`). Recomputing a statistic scans its tables, so
+writes do not do it themselves: :func:`schedule_refresh` has a Celery task
+refresh it ``STATS_REFRESH_DELAY`` seconds later, once for all the writes in
+between.
+
+Functions:
+    refresh_stats: Recomputes one, several or all statistics.
+    schedule_refresh: Refreshes statistics in a Celery task a little later.
+    stats_reading: Returns the statistics a write to a model can change.
+    get_stat: Returns the stored buckets of a statistic.
+"""
+
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Character, Film, Starship, StatSummary
+
+
+def _characters_per_film():
+    return Film.objects.annotate(value=Count("characters")).values_list(
+        "title", "value"
+    )
+
+
+def _pilots_per_starship_class():
+    return (
+        Starship.objects.values("starship_class")
+        .annotate(value=Count("pilots", distinct=True))
+        .values_list("starship_class", "value")
+    )
+
+
+def _gender_distribution():
+    return (
+        Character.objects.values("gender")
+        .annotate(value=Count("id"))
+        .values_list("gender", "value")
+    )
+
+
+def _starships_per_manufacturer():
+    return (
+        Starship.objects.values("manufacturer")
+        .annotate(value=Count("id"))
+        .values_list("manufacturer", "value")
+    )
+
+
+def _films_per_director():
+    return (
+        Film.objects.values("director")
+        .annotate(value=Count("id"))
+        .values_list("director", "value")
+    )
+
+
+STATS = {
+    "characters-per-film": _characters_per_film,
+    "pilots-per-starship-class": _pilots_per_starship_class,
+    "gender-distribution": _gender_distribution,
+    "starships-per-manufacturer": _starships_per_manufacturer,
+    "films-per-director": _films_per_director,
+}
+
+
+# The statistics reading each model; relations count as models of their own
+STATS_BY_MODEL = {
+    Film: ("characters-per-film", "films-per-director"),
+    Character: ("gender-distribution",),
+    Starship: ("pilots-per-starship-class", "starships-per-manufacturer"),
+    Film.characters.through: ("characters-per-film",),
+    Starship.pilots.through: ("pilots-per-starship-class",),
+}
+
+
+def stats_reading(model, deleted=False):
+    """Returns the statistics a write to `model` can change.
+
+    :param model: The written model or many-to-many through model.
+    :param deleted: Whether rows were deleted, which also deletes their
+        relations.
+    :return: Set of statistic names.
+    """
+    kinds = set(STATS_BY_MODEL.get(model, ()))
+    if deleted:
+        for through, through_kinds in STATS_BY_MODEL.items():
+            if through._meta.auto_created and any(
+                field.related_model is model
+                for field in through._meta.fields
+                if field.is_relation
+            ):
+                kinds.update(through_kinds)
+    return kinds
+
+
+def refresh_stats(kinds=None):
+    """Recomputes the given statistics and replaces their stored buckets.
+
+    The old and new rows are swapped inside one transaction, so readers see
+    either the previous or the refreshed statistic, never a partial one.
+
+    :param kinds: Names of the statistics to refresh; all of them when omitted.
+    :raises KeyError: If an unknown statistic name is given.
+    """
+    kinds = list(STATS) if kinds is None else list(kinds)
+    now = timezone.now()
+    rows = []
+    for kind in kinds:
+        # Titles and free-text labels are not unique, so equal keys are merged.
+        buckets = Counter()
+        for key, value in STATS[kind]():
+            buckets[key or ""] += value
+        rows.extend(
+            StatSummary(kind=kind, key=key, value=value, refreshed=now)
+            for key, value in buckets.items()
+        )
+    with transaction.atomic():
+        StatSummary.objects.filter(kind__in=kinds).delete()
+        StatSummary.objects.bulk_create(rows)
+
+
+def _scheduled_key(kind):
+    return f"stats:refresh-scheduled:{kind}"
+
+
+def schedule_refresh(kinds):
+    """Refreshes statistics in a Celery task ``STATS_REFRESH_DELAY`` seconds later.
+
+    Statistics already scheduled are left to the pending task, so a burst of
+    writes costs one refresh. With a delay of 0 they are refreshed right away.
+
+    :param kinds: Names of the statistics to refresh.
+    """
+    delay = settings.STATS_REFRESH_DELAY
+    if not delay:
+        refresh_stats(kinds)
+        return
+    # The marks expire in case the task is lost, e.g. with its worker
+    due = [
+        kind
+        for kind in sorted(kinds)
+        if cache.add(_scheduled_key(kind), True, timeout=delay + 60)
+    ]
+    if due:
+        from .tasks import (  # pylint: disable=import-outside-toplevel
+            refresh_stats_later,
+        )
+
+        refresh_stats_later.apply_async((due,), countdown=delay)
+
+
+def clear_scheduled(kinds):
+    """Lets later writes schedule another refresh of `kinds`.
+
+    :param kinds: Names of the statistics about to be refreshed.
+    """
+    cache.delete_many([_scheduled_key(kind) for kind in kinds])
+
+
+def get_stat(kind):
+    """Returns the stored buckets of a statistic, largest first.
+
+    :param kind: Name of the statistic.
+    :raises KeyError: If the statistic does not exist.
+    :return: List of ``{"key": ..., "value": ...}`` dictionaries.
+    """
+    if kind not in STATS:
+        raise KeyError(kind)
+    return list(StatSummary.objects.filter(kind=kind).values("key", "value"))
@@ -0,0 +1,261 @@
+"""
+Server-sent events announcing data changes to idle clients.
+
+Dashboards used to poll the list endpoints to notice new or updated records.
+``/api/stream/`` instead keeps a connection open and pushes an event whenever
+the change log (see :mod:`api.changes`) grows, and when a ``fetch_swapi_data``
+run ends::
+
+    id: 42
+    event: change
+    data: {"seq":42,"kind":"character","id":7,"action":"upsert"}
+
+    event: sync
+    data: {"run":12,"status":"succeeded"}
+
+Change events carry the change log sequence number as their ID. A client that
+reconnects sends it back in ``Last-Event-ID`` (browsers do so automatically)
+and first receives the changes it missed, read from the change log.
+
+Events are published through Redis pub/sub, so that writes in any web or Celery
+process reach the clients of every ASGI process. Each event loop holds a single
+subscription and fans the events out to its connections, so an idle connection
+costs one coroutine and one queue. With ``STREAM_BACKEND = "memory"`` events
+only reach the clients of the publishing process, for tests and development.
+
+Classes:
+    Broadcaster: Fans the published events out to the connections of a process.
+
+Functions:
+    publish: Publishes an event to every connected client.
+    publish_changes: Publishes change log entries once they are committed.
+    event_stream: Yields the messages of one connection.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+
+import redis
+import redis.asyncio
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+
+from . import changes
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "stream:events"
+PUBLISH_BATCH_SIZE = 1000
+REPLAY_BATCH_SIZE = 500
+QUEUE_SIZE = 1000
+RECONNECT_SECONDS = 1
+RETRY_MS = 3000
+
+
+def _message(event, data, event_id=None):
+    lines = [] if event_id is None else [f"id: {event_id}"]
+    lines += [f"event: {event}", f"data: {json.dumps(data, separators=(',', ':'))}"]
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+def _change_event(seq, kind, object_id, deleted):
+    return {
+        "event": "change",
+        "id": seq,
+        "data": {
+            "seq": seq,
+            "kind": kind,
+            "id": object_id,
+            "action": "delete" if deleted else "upsert",
+        },
+    }
+
+
+class Broadcaster:
+    """Fans the published events out to the connections of a process.
+
+    Connections subscribe from their event loop and receive lists of events in
+    a bounded queue. A connection that falls too far behind receives None and
+    is closed, and resumes from the change log when the client reconnects.
+    With the Redis backend, every event loop runs one listener task.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queues = {}
+        self._listeners = {}
+
+    def subscribe(self):
+        """
+        Register a connection of the running event loop.
+
+        :return: The queue receiving the connection's events.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(QUEUE_SIZE)
+        with self._lock:
+            self._queues[queue] = loop
+            if settings.STREAM_BACKEND == "redis" and loop not in self._listeners:
+                self._listeners[loop] = loop.create_task(self._listen(loop))
+        return queue
+
+    def unsubscribe(self, queue):
+        """Forgets a connection's queue."""
+        with self._lock:
+            self._queues.pop(queue, None)
+
+    def dispatch(self, events, loop=None):
+        """
+        Hand events to the connections. Safe to call from any thread.
+
+        :param events: The events, or None to close the connections.
+        :param loop: Only reach the connections of this event loop.
+        """
+        with self._lock:
+            targets = [
+                (queue, queue_loop)
+                for queue, queue_loop in self._queues.items()
+                if loop is None or queue_loop is loop
+            ]
+        for queue, queue_loop in targets:
+            if queue_loop.is_closed():
+                self.unsubscribe(queue)
+            else:
+                queue_loop.call_soon_threadsafe(self._put, queue, events)
+
+    @staticmethod
+    def _put(queue, events):
+        if events is not None:
+            try:
+                queue.put_nowait(events)
+                return
+            except asyncio.QueueFull:
+                pass
+        # Too far behind, or events were lost: the client resumes from the log.
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    async def _listen(self, loop):
+        client = redis.asyncio.Redis.from_url(settings.STREAM_REDIS_URL)
+        while True:
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.dispatch(json.loads(message["data"]), loop)
+            except redis.RedisError as error:
+                logger.warning("Stream subscription lost: %s", error)
+                self.dispatch(None, loop)
+                await asyncio.sleep(RECONNECT_SECONDS)
+
+
+broadcaster = Broadcaster()
+_publisher = None
+
+
+def _publish(events):
+    global _publisher
+    backend = settings.STREAM_BACKEND
+    if backend == "memory":
+        broadcaster.dispatch(events)
+        return
+    if backend != "redis":
+        raise ValueError(f"Unknown stream backend '{backend}'")
+    if _publisher is None:
+        _publisher = redis.Redis.from_url(
+            settings.STREAM_REDIS_URL, socket_connect_timeout=1
+        )
+    try:
+        for start in range(0, len(events), PUBLISH_BATCH_SIZE):
+            batch = events[start : start + PUBLISH_BATCH_SIZE]
+            _publisher.publish(CHANNEL, json.dumps(batch))
+    except redis.RedisError as error:
+        # Clients catch up from the change log when they reconnect.
+        logger.warning("Could not publish stream events: %s", error)
+
+
+def publish(event, data):
+    """
+    Publish an event to every connected client.
+
+    :param event: The event type, e.g. ``sync``.
+    :param data: The JSON-serializable payload.
+    """
+    _publish([{"event": event, "id": None, "data": data}])
+
+
+def publish_changes(entries):
+    """
+    Publish change log entries once the current transaction commits.
+
+    :param entries: :class:`~api.models.ChangeLogEntry` objects.
+    """
+    events = [
+        _change_event(entry.seq, entry.kind, entry.object_id, entry.deleted)
+        for entry in entries
+    ]
+    if events:
+        transaction.on_commit(lambda: _publish(events))
+
+
+async def _replay(since):
+    """Yields the change events after `since` from the change log."""
+    while True:
+        entries = await sync_to_async(changes.changes_since)(since, REPLAY_BATCH_SIZE)
+        for entry in entries:
+            yield _change_event(entry.seq, entry.kind, entry.object_id, entry.deleted)
+            since = entry.seq
+        if len(entries) < REPLAY_BATCH_SIZE:
+            return
+
+
+async def event_stream(last_event_id=None):
+    """
+    Yield the messages of one connection.
+
+    The stream ends after ``STREAM_MAX_SECONDS``, or when the connection falls
+    behind; clients then reconnect and resume from their last event ID.
+
+    :param last_event_id: The sequence number the client has seen, if any.
+    :return: An async iterator of encoded server-sent event messages.
+    """
+    queue = broadcaster.subscribe()
+    try:
+        yield f"retry: {RETRY_MS}\n\n".encode()
+        replayed_through = last_event_id
+        if last_event_id is not None:
+            horizon = await sync_to_async(changes.horizon)()
+            if 0 < last_event_id < horizon:
+                # Deletions were compacted away; the client has to reload.
+                yield _message("reset", {"horizon": horizon})
+                return
+            async for event in _replay(last_event_id):
+                yield _message(event["event"], event["data"], event["id"])
+                replayed_through = event["id"]
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.STREAM_MAX_SECONDS
+        while (remaining := deadline - loop.time()) > 0:
+            timeout = min(settings.STREAM_HEARTBEAT_SECONDS, remaining)
+            try:
+                events = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing the connection, and notices
+                # clients that went away.
+                yield b": keepalive\n\n"
+                continue
+            if events is None:
+                return
+            for event in events:
+                # Changes committed during the replay may have been replayed
+                if replayed_through is not None and event["id"] is not None:
+                    if event["id"] <= replayed_through:
+                        continue
+                yield _message(event["event"], event["data"], event["id"])
+    finally:
+        broadcaster.unsubscribe(queue)
@@ -0,0 +1,195 @@
+"""
+Run history of ``fetch_swapi_data``.
+
+:class:`SyncRecorder` wraps a run and stores a :class:`~api.models.SyncRun`
+with its duration, SWAPI traffic, SQL query count, peak memory and the errors
+logged by the command. Inside it, :meth:`SyncRecorder.resource` measures one
+resource (row counts before and after, plus an ``observe_phase`` metric) and
+the module-level :func:`step` and :func:`record_http` let the fetch functions
+report their fetch and write durations and HTTP volume. Both are no-ops when
+no run is being recorded. The end of every run is announced on the event stream
+(see :mod:`api.stream`).
+
+Classes:
+    SyncRecorder: Context manager recording one run.
+
+Functions:
+    step: Context manager timing a step of the current resource.
+    record_http: Counts a SWAPI response in the current run.
+"""
+
+import logging
+import sys
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from django.db import connections
+from django.utils import timezone
+
+from core.metrics import QueryTimer, observe_phase
+
+from . import stream
+from .models import SyncRun
+
+_current = ContextVar("sync_recorder", default=None)
+
+# Errors logged here during a run are stored with it
+COMMAND_LOGGER = "api.management.commands.fetch_swapi_data"
+
+
+def _peak_memory_kb():
+    """The peak resident memory of this process so far, in KiB, if known."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in KiB elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+@contextmanager
+def _count_queries():
+    """Yields a :class:`QueryTimer` counting the queries of every connection."""
+    timer = QueryTimer()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timer))
+        yield timer
+
+
+class _ErrorCollector(logging.Handler):
+    def __init__(self, recorder):
+        super().__init__(logging.ERROR)
+        self.recorder = recorder
+
+    def emit(self, record):
+        self.recorder.record_error(record.getMessage())
+
+
+class SyncRecorder:
+    """
+    Records one ``fetch_swapi_data`` run as a :class:`~api.models.SyncRun`.
+
+    The row is created on entry, so running syncs are visible, and completed on
+    exit. An exception escaping the block marks the run as failed and is
+    re-raised.
+
+    :param limit: The ``--limit`` of the run, stored for comparison.
+    """
+
+    def __init__(self, limit=None):
+        self.run = SyncRun(limit=limit)
+        self._phase = None
+        self._queries = None
+        self._stack = None
+        self._token = None
+        self._start = None
+
+    def __enter__(self):
+        self.run.save()
+        self._start = time.perf_counter()
+        self._stack = ExitStack()
+        self._queries = self._stack.enter_context(_count_queries())
+        handler = _ErrorCollector(self)
+        logger = logging.getLogger(COMMAND_LOGGER)
+        logger.addHandler(handler)
+        self._stack.callback(logger.removeHandler, handler)
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        _current.reset(self._token)
+        self._stack.close()
+
+        run = self.run
+        if exc is not None:
+            self.record_error(f"{exc_type.__name__}: {exc}")
+        run.status = "failed" if exc is not None else "succeeded"
+        run.finished = timezone.now()
+        run.duration_ms = (time.perf_counter() - self._start) * 1000
+        run.sql_queries = self._queries.count
+        run.peak_memory_kb = _peak_memory_kb()
+        run.save()
+        stream.publish("sync", {"run": run.pk, "status": run.status})
+        return False
+
+    @contextmanager
+    def resource(self, name, model=None):
+        """
+        Measure the sync of one resource.
+
+        :param name: Name of the resource, also used as the metric phase.
+        :param model: The model it writes, whose rows are counted, if any.
+        """
+        phase = self.run.phases.setdefault(
+            name,
+            {
+                "fetch_ms": 0.0,
+                "write_ms": 0.0,
+                "http_requests": 0,
+                "http_bytes": 0,
+                "sql_queries": 0,
+                "errors": 0,
+            },
+        )
+        if model is not None:
+            phase["rows_before"] = model.objects.count()
+        self._phase = phase
+        timer = None
+        try:
+            with observe_phase(name), _count_queries() as timer:
+                yield phase
+        finally:
+            self._phase = None
+            if timer is not None:
+                phase["sql_queries"] += timer.count
+            if model is not None:
+                phase["rows_after"] = model.objects.count()
+                phase["row_delta"] = phase["rows_after"] - phase["rows_before"]
+
+    def add_time(self, step_name, ms):
+        if self._phase is not None:
+            key = f"{step_name}_ms"
+            self._phase[key] = self._phase.get(key, 0.0) + ms
+
+    def record_http(self, size):
+        self.run.http_requests += 1
+        self.run.http_bytes += size
+        if self._phase is not None:
+            self._phase["http_requests"] += 1
+            self._phase["http_bytes"] += size
+
+    def record_error(self, message):
+        self.run.error_count += 1
+        if len(self.run.errors) < SyncRun.MAX_ERRORS:
+            self.run.errors.append(message)
+        if self._phase is not None:
+            self._phase["errors"] += 1
+
+
+@contextmanager
+def step(name):
+    """
+    Time a step (``fetch`` or ``write``) of the resource being recorded.
+
+    The duration is added to ``<name>_ms`` of the current phase.
+    """
+    recorder = _current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if recorder is not None:
+            recorder.add_time(name, (time.perf_counter() - start) * 1000)
+
+
+def record_http(size):
+    """Count a SWAPI response of `size` bytes in the current run, if any."""
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.record_http(size)
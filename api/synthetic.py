@@ -0,0 +1,334 @@
+"""
+Synthetic dataset generation for development, benchmarks and load tests.
+
+:func:`generate` creates any number of characters, films and starships with
+configurable relation density, popularity skew and random seed. Rows are
+streamed in batches: on PostgreSQL they are loaded with ``COPY``, elsewhere
+with ``bulk_create``. Through-table rows are inserted the same way, and derived
+data (counts, stats, ...) is rebuilt once at the end through
+:func:`api.signals.bulk_sync`.
+
+Classes:
+    Density: Ranges of related rows per film and starship.
+
+Functions:
+    generate: Adds a synthetic dataset to the database.
+    clear: Deletes every character, film and starship.
+"""
+
+import csv
+import io
+import itertools
+import json
+import random
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Character, Film, Starship
+from .signals import bulk_sync
+
+GENDERS = ["male", "female", "n/a", "hermaphrodite", "none"]
+GENDER_WEIGHTS = [60, 30, 6, 2, 2]
+COLORS = ["blue", "brown", "black", "red", "yellow", "green", "grey", "white"]
+STARSHIP_CLASSES = [
+    "Starfighter",
+    "Light freighter",
+    "Star Destroyer",
+    "Corvette",
+    "Transport",
+    "Patrol craft",
+]
+MANUFACTURERS = [f"Manufacturer {index}" for index in range(40)]
+DIRECTORS = [f"Director {index}" for index in range(25)]
+
+
+@dataclass
+class Density:
+    """Inclusive ranges of related rows generated per film and per starship.
+
+    Attributes:
+        cast (tuple): Characters per film.
+        fleet (tuple): Starships per film.
+        pilots (tuple): Pilots per starship.
+        skew (float): Zipf exponent of the popularity of related rows; 0 picks
+            them uniformly, higher values concentrate relations on few rows.
+    """
+
+    cast: tuple = (10, 40)
+    fleet: tuple = (2, 15)
+    pilots: tuple = (0, 4)
+    skew: float = 0.0
+
+
+class _Picker:
+    """Draws distinct IDs from a pool, optionally following a Zipf distribution."""
+
+    def __init__(self, ids, skew, rng):
+        self.ids = ids
+        self.rng = rng
+        self.cumulative = None
+        if skew > 0 and ids:
+            weights = [1 / (rank**skew) for rank in range(1, len(ids) + 1)]
+            self.cumulative = list(itertools.accumulate(weights))
+
+    def pick(self, bounds):
+        count = min(len(self.ids), self.rng.randint(*bounds))
+        if self.cumulative is None:
+            return self.rng.sample(self.ids, count)
+        total = self.cumulative[-1]
+        picked = set()
+        # Popular IDs repeat, so stop after a bounded number of draws.
+        for _ in range(count * 4):
+            if len(picked) == count:
+                break
+            index = bisect_left(self.cumulative, self.rng.random() * total)
+            picked.add(self.ids[min(index, len(self.ids) - 1)])
+        return list(picked)
+
+
+def _batches(rows, size):
+    iterator = iter(rows)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def _copy(model, columns, rows):
+    """Loads rows into the table of `model` with PostgreSQL ``COPY``."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(
+            json.dumps(value) if isinstance(value, (list, dict)) else value
+            for value in row
+        )
+    buffer.seek(0)
+    table = connection.ops.quote_name(model._meta.db_table)
+    names = ", ".join(connection.ops.quote_name(column) for column in columns)
+    with connection.cursor() as cursor:
+        cursor.cursor.copy_expert(
+            f"COPY {table} ({names}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+
+
+def _insert(model, columns, rows, batch_size, use_copy):
+    """Inserts tuples of `columns` values into the table of `model` in batches."""
+    for batch in _batches(rows, batch_size):
+        if use_copy:
+            _copy(model, columns, batch)
+        else:
+            model.objects.bulk_create(
+                [model(**dict(zip(columns, row))) for row in batch],
+                batch_size=batch_size,
+            )
+
+
+def _new_ids(model, previous_max):
+    return list(
+        model.objects.filter(pk__gt=previous_max or 0)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def generate(
+    characters,
+    films,
+    starships,
+    density=None,
+    seed=0,
+    batch_size=5000,
+    use_copy=None,
+    stdout=None,
+):
+    """
+    Add a synthetic dataset to the database.
+
+    Names, URLs and episode numbers continue from the rows already present, so
+    the function can be called repeatedly to grow a dataset.
+
+    :param characters: Number of characters to create.
+    :param films: Number of films to create.
+    :param starships: Number of starships to create.
+    :param density: :class:`Density` of the relations; the defaults otherwise.
+    :param seed: Seed of the random generator, for reproducible datasets.
+    :param batch_size: Rows per ``COPY`` or ``bulk_create`` batch.
+    :param use_copy: Use ``COPY``; defaults to True on PostgreSQL.
+    :param stdout: Optional stream receiving progress messages.
+    """
+    density = density or Density()
+    rng = random.Random(seed)
+    if use_copy is None:
+        use_copy = connection.vendor == "postgresql"
+    now = timezone.now()
+
+    def log(message):
+        if stdout is not None:
+            stdout.write(message)
+
+    with bulk_sync(), transaction.atomic():
+        previous = {
+            model: model.objects.aggregate(last=Max("pk"))["last"]
+            for model in (Character, Film, Starship)
+        }
+        offset = previous[Character] or 0
+        _insert(
+            Character,
+            [
+                "name", "birth_year", "eye_color", "gender", "hair_color", "height",
+                "mass", "skin_color", "homeworld", "species", "vehicles",
+                "film_count", "starship_count", "created", "edited", "url",
+            ],
+            (
+                (
+                    f"Character {offset + index}",
+                    f"{rng.randint(0, 900)}BBY",
+                    rng.choice(COLORS),
+                    rng.choices(GENDERS, GENDER_WEIGHTS)[0],
+                    rng.choice(COLORS),
+                    str(rng.randint(60, 260)),
+                    str(rng.randint(20, 300)),
+                    rng.choice(COLORS),
+                    f"https://swapi.dev/api/planets/{rng.randint(1, 60)}/",
+                    [],
+                    [],
+                    0,
+                    0,
+                    now,
+                    now,
+                    f"https://swapi.dev/api/people/{offset + index}/",
+                )
+                for index in range(characters)
+            ),
+            batch_size,
+            use_copy,
+        )
+        log(f"Created {characters} characters")
+
+        offset = previous[Starship] or 0
+        _insert(
+            Starship,
+            [
+                "name", "model", "manufacturer", "cost_in_credits", "length",
+                "max_atmosphering_speed", "crew", "passengers", "cargo_capacity",
+                "consumables", "hyperdrive_rating", "MGLT", "starship_class",
+                "pilot_count", "created", "edited", "url",
+            ],
+            (
+                (
+                    f"Starship {offset + index}",
+                    f"Model {(offset + index) % 500}",
+                    rng.choice(MANUFACTURERS),
+                    str(rng.randint(10_000, 10_000_000)),
+                    str(rng.randint(5, 2000)),
+                    str(rng.randint(100, 1500)),
+                    str(rng.randint(1, 5000)),
+                    str(rng.randint(0, 500)),
+                    str(rng.randint(0, 1_000_000)),
+                    f"{rng.randint(1, 12)} months",
+                    f"{rng.choice([0.5, 1, 2, 3, 4])}",
+                    str(rng.randint(10, 120)),
+                    rng.choice(STARSHIP_CLASSES),
+                    0,
+                    now,
+                    now,
+                    f"https://swapi.dev/api/starships/{offset + index}/",
+                )
+                for index in range(starships)
+            ),
+            batch_size,
+            use_copy,
+        )
+        log(f"Created {starships} starships")
+
+        last_episode = Film.objects.aggregate(last=Max("episode_id"))["last"]
+        first_episode = (last_episode or 0) + 1
+        _insert(
+            Film,
+            [
+                "title", "episode_id", "opening_crawl", "director", "producer",
+                "release_date", "planets", "species", "vehicles", "created",
+                "edited", "url",
+            ],
+            (
+                (
+                    f"Film {first_episode + index}",
+                    first_episode + index,
+                    "A long time ago in a galaxy far, far away...",
+                    rng.choice(DIRECTORS),
+                    rng.choice(DIRECTORS),
+                    date(1977, 5, 25) + timedelta(days=index % 20000),
+                    [],
+                    [],
+                    [],
+                    now,
+                    now,
+                    f"https://swapi.dev/api/films/{first_episode + index}/",
+                )
+                for index in range(films)
+            ),
+            batch_size,
+            use_copy,
+        )
+        log(f"Created {films} films")
+
+        character_ids = _new_ids(Character, previous[Character])
+        starship_ids = _new_ids(Starship, previous[Starship])
+        film_ids = _new_ids(Film, previous[Film])
+        cast = _Picker(character_ids, density.skew, rng)
+        fleet = _Picker(starship_ids, density.skew, rng)
+
+        _insert(
+            Film.characters.through,
+            ["film_id", "character_id"],
+            (
+                (film_id, character_id)
+                for film_id in film_ids
+                for character_id in cast.pick(density.cast)
+            ),
+            batch_size,
+            use_copy,
+        )
+        _insert(
+            Film.starships.through,
+            ["film_id", "starship_id"],
+            (
+                (film_id, starship_id)
+                for film_id in film_ids
+                for starship_id in fleet.pick(density.fleet)
+            ),
+            batch_size,
+            use_copy,
+        )
+        _insert(
+            Starship.pilots.through,
+            ["starship_id", "character_id"],
+            (
+                (starship_id, character_id)
+                for starship_id in starship_ids
+                for character_id in cast.pick(density.pilots)
+            ),
+            batch_size,
+            use_copy,
+        )
+        log("Created relations; rebuilding derived data")
+
+
+def clear():
+    """Delete every character, film and starship, with their relations."""
+    with bulk_sync(), transaction.atomic():
+        for model in (
+            Film.characters.through,
+            Film.starships.through,
+            Starship.pilots.through,
+        ):
+            model.objects.all().delete()
+        # The through rows are gone, so skip the per-row delete signals and
+        # cascades Django would otherwise run on millions of rows.
+        for model in (Film, Starship, Character):
+            queryset = model.objects.all()
+            queryset._raw_delete(queryset.db)  # pylint: disable=protected-access
@@ -1,7 +1,48 @@
 from celery import shared_task
+from django.conf import settings
 from django.core.management import call_command
 
+# ``core`` imports the Celery app lazily; this binds the shared tasks to it
+import core.celery  # noqa: F401  pylint: disable=unused-import
+
+from . import changes, stats, warming
+from .models import SyncRun
+from .votes import flush_votes
+
 
 @shared_task
 def fetch_swapi_data_periodically(limit=None):
     call_command("fetch_swapi_data", limit=limit)
+    run = SyncRun.objects.order_by("-pk").first()
+    if run is not None and run.status == "succeeded":
+        warm_caches_after_sync.delay()
+
+
+@shared_task(bind=True, max_retries=10)
+def warm_caches_after_sync(self, aliases=None):
+    warmed = warming.warm_caches(aliases=aliases)
+    behind = [alias for alias, requests in warmed.items() if requests is None]
+    if behind:
+        # Warm the lagging replicas once they have replayed the sync
+        raise self.retry(
+            kwargs={"aliases": behind}, countdown=settings.CACHE_WARMING_RETRY_SECONDS
+        )
+    return warmed
+
+
+@shared_task
+def flush_votes_periodically():
+    return flush_votes()
+
+
+@shared_task
+def refresh_stats_later(kinds):
+    # Writes from now on schedule another refresh
+    stats.clear_scheduled(kinds)
+    stats.refresh_stats(kinds)
+
+
+@shared_task
+def compact_change_log_periodically():
+    compaction = changes.compact()
+    return {"superseded": compaction.superseded, "expired": compaction.expired}
@@ -0,0 +1,198 @@
+"""
+Performance benchmarks for the character, film and starship endpoints.
+
+Each endpoint operation (list, search, detail, deep paging, create, update) is
+timed against synthetic datasets and its median latency and query count are
+compared with ``baseline.json``, keyed by database vendor and dataset size.
+
+The suite is skipped unless ``RUN_BENCHMARKS=1`` is set. Other knobs:
+
+``BENCHMARK_SIZES``
+    Comma-separated dataset sizes (default ``1000``; e.g. ``1000,10000,100000``).
+``BENCHMARK_ROUNDS``
+    Timed repetitions per operation (default ``5``).
+``BENCHMARK_TOLERANCE``
+    Allowed slowdown over the baseline median, as a fraction (default ``0.5``).
+``BENCHMARK_UPDATE_BASELINE``
+    When ``1``, record the measurements as the new baseline instead of comparing.
+
+Query counts must never exceed the baseline. Operations without a baseline
+entry are measured and reported but not compared.
+
+Run with::
+
+    RUN_BENCHMARKS=1 pytest api/tests/benchmarks -s
+"""
+
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api import synthetic
+from api.models import Character, Film, Starship
+from api.views import StandardResultsSetPagination
+
+pytestmark = pytest.mark.skipif(
+    os.getenv("RUN_BENCHMARKS") != "1", reason="set RUN_BENCHMARKS=1 to run"
+)
+
+BASELINE_FILE = Path(__file__).with_name("baseline.json")
+SIZES = [int(size) for size in os.getenv("BENCHMARK_SIZES", "1000").split(",")]
+ROUNDS = int(os.getenv("BENCHMARK_ROUNDS", "5"))
+TOLERANCE = float(os.getenv("BENCHMARK_TOLERANCE", "0.5"))
+UPDATE_BASELINE = os.getenv("BENCHMARK_UPDATE_BASELINE") == "1"
+
+RESOURCES = {
+    "character": (Character, "Character 12"),
+    "film": (Film, "Film 12"),
+    "starship": (Starship, "Starship 12"),
+}
+OPERATIONS = ["list", "search", "detail", "deep-page", "create", "update"]
+
+
+def _load_baseline():
+    if BASELINE_FILE.exists():
+        return json.loads(BASELINE_FILE.read_text())
+    return {}
+
+
+_baseline = _load_baseline()
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda size: f"{size}-rows")
+def dataset(request, django_db_setup, django_db_blocker):
+    """Seeds a synthetic dataset of the parametrized size for the module."""
+    with django_db_blocker.unblock():
+        synthetic.generate(request.param, request.param, request.param)
+        yield request.param
+        synthetic.clear()
+
+    if UPDATE_BASELINE:
+        BASELINE_FILE.write_text(json.dumps(_baseline, indent=2, sort_keys=True) + "\n")
+
+
+def _payload(kind, index):
+    """Returns a valid create payload for `kind`."""
+    if kind == "character":
+        return {
+            "name": f"Benchmark {index}",
+            "birth_year": "19BBY",
+            "eye_color": "blue",
+            "gender": "male",
+            "hair_color": "blond",
+            "height": "172",
+            "mass": "77",
+            "skin_color": "fair",
+            "homeworld": "https://swapi.dev/api/planets/1/",
+            "species": [],
+            "vehicles": [],
+            "starships": list(Starship.objects.values_list("pk", flat=True)[:3]),
+            "created": "2014-12-09T13:50:51.644000Z",
+            "edited": "2014-12-20T21:17:56.891000Z",
+            "url": "https://swapi.dev/api/people/1/",
+        }
+    if kind == "film":
+        return {
+            "title": f"Benchmark {index}",
+            "episode_id": 10_000_000 + index,
+            "opening_crawl": "...",
+            "director": "George Lucas",
+            "producer": "Gary Kurtz",
+            "release_date": "1977-05-25",
+            "characters": list(Character.objects.values_list("pk", flat=True)[:20]),
+            "starships": list(Starship.objects.values_list("pk", flat=True)[:5]),
+            "planets": [],
+            "species": [],
+            "vehicles": [],
+            "created": "2014-12-10T14:23:31.880000Z",
+            "edited": "2014-12-20T19:49:45.256000Z",
+            "url": "https://swapi.dev/api/films/1/",
+        }
+    return {
+        "name": f"Benchmark {index}",
+        "model": "T-65 X-wing",
+        "manufacturer": "Incom Corporation",
+        "cost_in_credits": "149999",
+        "length": "12.5",
+        "max_atmosphering_speed": "1050",
+        "crew": "1",
+        "passengers": "0",
+        "cargo_capacity": "110",
+        "consumables": "1 week",
+        "hyperdrive_rating": "1.0",
+        "MGLT": "100",
+        "starship_class": "Starfighter",
+        "pilots": list(Character.objects.values_list("pk", flat=True)[:2]),
+        "created": "2014-12-12T11:19:05.340000Z",
+        "edited": "2014-12-20T21:17:50.309000Z",
+        "url": "https://swapi.dev/api/starships/12/",
+    }
+
+
+def _request(client, kind, operation, round_index, size):
+    """Issues one request of `operation` against the `kind` endpoints."""
+    model, search_term = RESOURCES[kind]
+    if operation == "list":
+        return client.get(reverse(f"{kind}-list"))
+    if operation == "search":
+        return client.get(reverse(f"{kind}-list"), {"search": search_term})
+    if operation == "deep-page":
+        last_page = -(-size // StandardResultsSetPagination.page_size)
+        return client.get(reverse(f"{kind}-list"), {"page": last_page})
+    if operation == "create":
+        return client.post(
+            reverse(f"{kind}-list"), _payload(kind, round_index), format="json"
+        )
+    pk = model.objects.order_by("pk").values_list("pk", flat=True)[size // 2]
+    if operation == "detail":
+        return client.get(reverse(f"{kind}-detail", kwargs={"pk": pk}))
+    return client.patch(
+        reverse(f"{kind}-detail", kwargs={"pk": pk}),
+        {"edited": "2024-01-01T00:00:00Z"},
+        format="json",
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("operation", OPERATIONS)
+@pytest.mark.parametrize("kind", RESOURCES)
+def test_endpoint_performance(dataset, kind, operation):
+    client = APIClient()
+    _request(client, kind, operation, -1, dataset)  # warm-up
+    timings = []
+    for round_index in range(ROUNDS):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = _request(client, kind, operation, round_index, dataset)
+            timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code < 400, response.content
+    measured = {
+        "median_ms": round(statistics.median(timings), 3),
+        "queries": len(queries),
+    }
+    print(f"\n{connection.vendor} {dataset} {kind} {operation}: {measured}")
+
+    entries = _baseline.setdefault(connection.vendor, {}).setdefault(str(dataset), {})
+    key = f"{kind}-{operation}"
+    if UPDATE_BASELINE:
+        entries[key] = measured
+        return
+    expected = entries.get(key)
+    if expected is None:
+        pytest.skip(f"no baseline for {key}; measured {measured}")
+    assert measured["queries"] <= expected["queries"], (
+        f"{key} ran {measured['queries']} queries, baseline is {expected['queries']}"
+    )
+    limit = expected["median_ms"] * (1 + TOLERANCE)
+    assert measured["median_ms"] <= limit, (
+        f"{key} took {measured['median_ms']} ms, baseline is "
+        f"{expected['median_ms']} ms (+{TOLERANCE:.0%} allowed)"
+    )
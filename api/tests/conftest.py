@@ -0,0 +1,91 @@
+from contextlib import contextmanager
+
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.test import override_settings
+from core.querycheck import QueryInspector
+
+
+@pytest.fixture(autouse=True)
+def primary_reads(request):
+    """
+    Read from the primary in tests that do not list the replicas in `databases`.
+
+    Configured replicas are TEST MIRRORs of the primary's test database, whose
+    connections cannot see the rows a test has not committed.
+    """
+    databases = getattr(request.instance, "databases", None) or ()
+    replicas = [
+        alias
+        for alias in settings.DATABASE_REPLICAS
+        if databases == "__all__"
+        or alias in databases
+        or not connections.settings.get(alias, {}).get("TEST", {}).get("MIRROR")
+    ]
+    with override_settings(DATABASE_REPLICAS=replicas):
+        yield
+
+
+@pytest.fixture(autouse=True, scope="session")
+def memory_backends():
+    """
+    Keep the state of every Redis-backed feature in process memory.
+
+    Tests never reach for the Redis server of a deployment, not even while
+    creating class-level test data: the event stream, the access statistics
+    and the vote buffer use their in-process backends, and statistics are
+    refreshed inline rather than by a Celery task.
+    """
+    with override_settings(
+        STREAM_BACKEND="memory",
+        ACCESS_STATS_BACKEND="memory",
+        VOTE_BUFFER_BACKEND="memory",
+        STATS_REFRESH_DELAY=0,
+    ):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    """
+    Start every test with an empty cache.
+
+    Rolling back a test's rows fires no signals, so values cached from them,
+    like list counts, would otherwise outlive them.
+    """
+    cache.clear()
+    yield
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Fail the test when a block executes more queries than allowed.
+
+    Usage::
+
+        def test_list(client, query_budget):
+            with query_budget(3):
+                client.get("/api/characters/")
+
+    The failure message includes the N+1 shapes and their origin frames.
+    """
+
+    @contextmanager
+    def budget(max_queries):
+        with QueryInspector() as inspector:
+            yield inspector
+        if len(inspector.queries) > max_queries:
+            report = inspector.report(explain=False)
+            details = "\n".join(
+                f"  {item['count']}x {item['shape']}\n    from {item['origin']}"
+                for item in report["n_plus_one"]
+            )
+            pytest.fail(
+                f"{len(inspector.queries)} queries executed, budget is {max_queries}"
+                + (f"\nRepeated queries:\n{details}" if details else "")
+            )
+
+    return budget
@@ -0,0 +1,97 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from api.admin import CachedValuesFieldListFilter, _refresh, refresh_filter_choices
+from api.models import Character, Film, Starship
+
+
+def create_character(name, eye_color):
+    return Character.objects.create(
+        name=name,
+        eye_color=eye_color,
+        species=[],
+        vehicles=[],
+        created="2014-12-09T13:50:51.644000Z",
+        edited="2014-12-20T21:17:56.891000Z",
+        url="https://swapi.dev/api/people/1/",
+    )
+
+
+class ScalableAdminTest(TestCase):
+    def setUp(self):
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@example.com", "password")
+        )
+        create_character("Luke Skywalker", "blue")
+        self.url = reverse("admin:api_character_changelist")
+        # Filter choices are reloaded inline when a test asks for it
+        patcher = mock.patch("api.admin._start_refresh")
+        self.start_refresh = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_filter_choices_are_cached_until_the_table_changes(self):
+        refresh_filter_choices()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertContains(response, "?eye_color=blue")
+        self.assertFalse(
+            [query for query in queries if "DISTINCT" in query["sql"].upper()]
+        )
+
+        create_character("Darth Vader", "yellow")
+        self.start_refresh.side_effect = _refresh
+        # The previous choices are served while they are reloaded
+        self.assertNotContains(self.client.get(self.url), "?eye_color=yellow")
+        self.start_refresh.assert_any_call(Character, "eye_color", 200)
+        self.assertContains(self.client.get(self.url), "?eye_color=yellow")
+
+    def test_filter_choices_are_loaded_off_the_request_path(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, "eye color (loading values)")
+        self.assertNotContains(response, "?eye_color=blue")
+        self.start_refresh.assert_any_call(Character, "eye_color", 200)
+
+    def test_truncated_filter_choices_are_flagged(self):
+        create_character("Darth Vader", "yellow")
+        with mock.patch.object(CachedValuesFieldListFilter, "max_choices", 1):
+            refresh_filter_choices()
+            response = self.client.get(self.url)
+        self.assertContains(response, "?eye_color=blue")
+        self.assertNotContains(response, "?eye_color=yellow")
+        self.assertContains(response, "eye color (first 1 values, search for others)")
+
+    def test_full_result_count_is_not_computed(self):
+        response = self.client.get(self.url, {"eye_color": "blue"})
+        self.assertContains(response, "1 result")
+        self.assertNotContains(response, "total")
+
+    def test_relations_are_picked_with_autocomplete_widgets(self):
+        for _ in range(3):
+            Starship.objects.create(
+                name="X-wing",
+                model="T-65 X-wing",
+                manufacturer="Incom Corporation",
+                length="12.5",
+                max_atmosphering_speed="1050",
+                crew="1",
+                passengers="0",
+                cargo_capacity="110",
+                consumables="1 week",
+                hyperdrive_rating="1.0",
+                MGLT="100",
+                starship_class="Starfighter",
+                created="2014-12-12T11:19:05.340000Z",
+                edited="2014-12-20T21:17:50.309000Z",
+                url="https://swapi.dev/api/starships/12/",
+            )
+        for model in (Film, Starship, Character):
+            response = self.client.get(
+                reverse(f"admin:api_{model._meta.model_name}_add")
+            )
+            self.assertContains(response, "admin-autocomplete")
+            self.assertNotContains(response, ">Luke Skywalker</option>")
+            self.assertNotContains(response, ">X-wing</option>")
@@ -0,0 +1,116 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api import autocomplete
+from api.autocomplete import PrefixIndex, normalize
+from api.models import Character
+
+
+class PrefixIndexTest(SimpleTestCase):
+    def setUp(self):
+        self.index = PrefixIndex(
+            [
+                (1, "Luke Skywalker"),
+                (2, "Anakin Skywalker"),
+                (3, "Lando Calrissian"),
+                (4, "Padmé Amidala"),
+                (5, "Lobot"),
+            ]
+        )
+
+    def suggest(self, query, limit=10):
+        return [pk for _, pk, _, _ in self.index.suggest(normalize(query), limit)]
+
+    def test_values_starting_with_the_query_rank_first(self):
+        self.assertEqual(self.suggest("l"), [3, 5, 1])
+        self.assertEqual(self.suggest("SKY"), [1, 2])
+        self.assertEqual(self.suggest("luke  sky"), [1])
+        self.assertEqual(self.suggest("l", limit=2), [3, 5])
+        self.assertEqual(self.suggest("x"), [])
+
+    def test_accents_are_ignored(self):
+        self.assertEqual(self.suggest("padme"), [4])
+        self.assertEqual(self.suggest("Amidála"), [4])
+
+    def test_each_object_is_suggested_once(self):
+        index = PrefixIndex([(9, "Death Star", "DS-1 Orbital Battle Station")])
+        matches = index.suggest("d", 10)
+        self.assertEqual(len(matches), 1)
+        self.assertEqual(matches[0][2:], ("Death Star", "Death Star"))
+        self.assertEqual(
+            index.suggest("orbital", 10)[0][3], "DS-1 Orbital Battle Station"
+        )
+
+
+class AutocompleteViewTest(APITestCase):
+    def setUp(self):
+        autocomplete._indexes.clear()
+        self.addCleanup(autocomplete._indexes.clear)
+        self.url = reverse("autocomplete")
+        self.luke = self.create_character("Luke Skywalker")
+
+    @staticmethod
+    def create_character(name):
+        return Character.objects.create(
+            name=name,
+            species=[],
+            vehicles=[],
+            created="2014-12-09T13:50:51.644000Z",
+            edited="2014-12-20T21:17:56.891000Z",
+            url="https://swapi.dev/api/people/1/",
+        )
+
+    def test_suggestions_are_served_without_queries(self):
+        self.client.get(self.url, {"q": "l"})
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {"q": "sky", "kind": "character"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"],
+            [
+                {
+                    "kind": "character",
+                    "id": self.luke.pk,
+                    "label": "Luke Skywalker",
+                    "matched": "Luke Skywalker",
+                }
+            ],
+        )
+
+    def suggested_ids(self):
+        response = self.client.get(self.url, {"q": "l", "kind": "character"})
+        return [item["id"] for item in response.data["results"]]
+
+    def test_writes_refresh_the_index_in_the_background(self):
+        self.client.get(self.url, {"q": "l"})
+        luke_pk = self.luke.pk
+        leia = self.create_character("Leia Organa")
+        self.luke.delete()
+
+        # The rebuild runs inline here instead of in a thread
+        with mock.patch.object(
+            autocomplete, "_start_rebuild", side_effect=autocomplete._rebuild
+        ) as rebuild:
+            self.assertEqual(self.suggested_ids(), [luke_pk])
+            self.assertEqual(self.suggested_ids(), [leia.pk])
+        rebuild.assert_called_once_with("character")
+
+    def test_one_rebuild_runs_at_a_time(self):
+        self.client.get(self.url, {"q": "l"})
+        self.create_character("Leia Organa")
+        with autocomplete._locks["character"], mock.patch.object(
+            autocomplete, "_start_rebuild"
+        ) as rebuild:
+            self.assertEqual(self.suggested_ids(), [self.luke.pk])
+        rebuild.assert_not_called()
+
+    def test_invalid_parameters(self):
+        response = self.client.get(self.url, {"q": "l", "kind": "planet"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {"q": "l", "limit": "0"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["results"], [])
@@ -0,0 +1,146 @@
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api import changes
+from api.models import ChangeLogEntry, Character, Starship
+from api.signals import batched_writes, bulk_sync, rebuild_derived_data
+
+
+def create_character(name="Luke Skywalker"):
+    return Character.objects.create(
+        name=name,
+        species=[],
+        vehicles=[],
+        created="2014-12-09T13:50:51.644000Z",
+        edited="2014-12-20T21:17:56.891000Z",
+        url="https://swapi.dev/api/people/1/",
+    )
+
+
+class ChangeFeedTest(APITestCase):
+    url = reverse("changes")
+
+    def feed(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_writes_append_upserts_and_tombstones(self):
+        character = create_character()
+        feed = self.feed()
+        self.assertEqual(
+            [(c["kind"], c["id"], c["action"]) for c in feed["results"]],
+            [("character", character.pk, "upsert")],
+        )
+        self.assertEqual(feed["results"][0]["data"]["name"], "Luke Skywalker")
+
+        character.save()
+        self.assertEqual(self.feed(since=feed["last_seq"])["results"], [])
+
+        pk = character.pk
+        character.delete()
+        feed = self.feed(since=feed["last_seq"])
+        self.assertEqual(
+            feed["results"],
+            [
+                {
+                    "seq": feed["last_seq"],
+                    "kind": "character",
+                    "id": pk,
+                    "action": "delete",
+                    "data": None,
+                }
+            ],
+        )
+
+    def test_pages_are_keyed_on_the_sequence_number(self):
+        for name in ("Luke Skywalker", "Leia Organa", "Han Solo"):
+            create_character(name)
+        names = []
+        feed = self.feed(limit=2)
+        while True:
+            names += [change["data"]["name"] for change in feed["results"]]
+            if feed["next"] is None:
+                break
+            self.assertIn(f"since={feed['last_seq']}", feed["next"])
+            feed = self.client.get(feed["next"]).json()
+        self.assertEqual(names, ["Luke Skywalker", "Leia Organa", "Han Solo"])
+
+    def test_syncs_log_only_what_changed(self):
+        with bulk_sync():
+            luke = create_character()
+            leia = create_character("Leia Organa")
+        logged = list(ChangeLogEntry.objects.values_list("object_id", flat=True))
+        self.assertCountEqual(logged, [luke.pk, leia.pk])
+
+        with bulk_sync():
+            Character.objects.filter(pk=luke.pk).update(name="Luke")
+        rebuild_derived_data()
+        logged = list(ChangeLogEntry.objects.values_list("object_id", flat=True))
+        self.assertEqual(logged[2:], [luke.pk])
+
+    def test_batched_writes_log_each_document_once(self):
+        starship = Starship.objects.create(
+            name="X-wing",
+            created="2014-12-12T11:19:05.340000Z",
+            edited="2014-12-20T21:17:50.309000Z",
+            url="https://swapi.dev/api/starships/12/",
+        )
+        last_seq = changes.last_seq()
+        with batched_writes():
+            luke = create_character()
+            luke.name = "Luke"
+            luke.save()
+            luke.starships.add(starship)
+            self.assertEqual(changes.last_seq(), last_seq)
+        entries = ChangeLogEntry.objects.filter(seq__gt=last_seq)
+        self.assertCountEqual(
+            entries.values_list("kind", "object_id"),
+            [("character", luke.pk), ("starship", starship.pk)],
+        )
+        self.assertEqual(len(set(entries.values_list("created", flat=True))), 1)
+
+    def test_invalid_parameters_are_rejected(self):
+        for params in ({"since": "-1"}, {"since": "x"}, {"limit": "0"}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CompactionTest(APITestCase):
+    url = reverse("changes")
+
+    def test_superseded_entries_are_dropped(self):
+        character = create_character()
+        character.name = "Rey"
+        character.save()
+        compaction = changes.compact()
+        self.assertEqual(compaction.superseded, 1)
+        self.assertEqual(ChangeLogEntry.objects.count(), 1)
+
+        results = self.client.get(self.url).json()["results"]
+        self.assertEqual([change["data"]["name"] for change in results], ["Rey"])
+
+    def test_clients_behind_dropped_tombstones_start_over(self):
+        create_character("Leia Organa")
+        character = create_character()
+        character.delete()
+        tombstone = ChangeLogEntry.objects.get(deleted=True)
+        ChangeLogEntry.objects.filter(pk=tombstone.pk).update(
+            created=timezone.now() - timedelta(days=31)
+        )
+        compaction = changes.compact(tombstone_days=30)
+        self.assertEqual(compaction.expired, 1)
+        self.assertEqual(compaction.expired_through, tombstone.seq)
+
+        response = self.client.get(self.url, {"since": 1})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        self.assertEqual(response.json()["horizon"], tombstone.seq)
+
+        response = self.client.get(self.url, {"since": 0})
+        self.assertEqual(
+            [change["data"]["name"] for change in response.json()["results"]],
+            ["Leia Organa"],
+        )
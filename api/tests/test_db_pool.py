@@ -0,0 +1,103 @@
+import threading
+import time
+from io import StringIO
+from unittest import skipIf, skipUnless
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from core.db.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.healthy = True
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    def test_connections_are_reused(self):
+        pool = ConnectionPool(max_size=2)
+        first = pool.getconn(FakeConnection)
+        pool.putconn(first)
+        self.assertIs(pool.getconn(FakeConnection), first)
+        self.assertEqual(pool.stats["opened"], 1)
+        self.assertEqual(pool.stats["reused"], 1)
+
+    def test_waits_for_a_free_connection_then_times_out(self):
+        pool = ConnectionPool(max_size=1, timeout=0.5)
+        connection = pool.getconn(FakeConnection)
+        threading.Timer(0.05, pool.putconn, [connection]).start()
+        self.assertIs(pool.getconn(FakeConnection), connection)
+        self.assertEqual(pool.stats["waits"], 1)
+
+        pool.timeout = 0.01
+        with self.assertRaises(PoolTimeout):
+            pool.getconn(FakeConnection)
+
+    def test_unhealthy_and_closed_connections_are_replaced(self):
+        pool = ConnectionPool(check_after=0, check=lambda conn: conn.healthy)
+        broken = pool.getconn(FakeConnection)
+        pool.putconn(broken)
+        broken.healthy = False
+        replacement = pool.getconn(FakeConnection)
+        self.assertIsNot(replacement, broken)
+        self.assertTrue(broken.closed)
+
+        pool.putconn(replacement, close=True)
+        self.assertTrue(replacement.closed)
+        self.assertEqual((pool.size, pool.idle), (0, 0))
+
+    def test_idle_connections_are_checked_only_after_check_after(self):
+        checked = []
+        pool = ConnectionPool(check_after=60, check=checked.append)
+        pool.putconn(pool.getconn(FakeConnection))
+        pool.getconn(FakeConnection)
+        self.assertEqual(checked, [])
+
+    def test_old_connections_are_retired(self):
+        pool = ConnectionPool(max_lifetime=0.01)
+        old = pool.getconn(FakeConnection)
+        time.sleep(0.02)
+        pool.putconn(old)
+        self.assertTrue(old.closed)
+        self.assertIsNot(pool.getconn(FakeConnection), old)
+
+    def test_fill_and_close(self):
+        pool = ConnectionPool(min_size=3, max_size=5)
+        pool.fill(FakeConnection)
+        self.assertEqual((pool.size, pool.idle), (3, 3))
+        in_use = pool.getconn(FakeConnection)
+        pool.close()
+        self.assertEqual((pool.size, pool.idle), (1, 0))
+        pool.putconn(in_use)
+        self.assertEqual(pool.idle, 1)
+
+    def test_failed_connect_frees_its_slot(self):
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+
+        def refuse():
+            raise ConnectionError("refused")
+
+        with self.assertRaises(ConnectionError):
+            pool.getconn(refuse)
+        self.assertIsInstance(pool.getconn(FakeConnection), FakeConnection)
+
+
+class BenchmarkCommandTest(TestCase):
+    @skipIf(connection.vendor == "postgresql", "the benchmark runs on PostgreSQL")
+    def test_requires_postgresql(self):
+        with self.assertRaisesMessage(CommandError, "PostgreSQL"):
+            call_command("benchmark_db_connections")
+
+    @skipUnless(connection.vendor == "postgresql", "the benchmark needs PostgreSQL")
+    def test_compares_both_backends(self):
+        stdout = StringIO()
+        call_command("benchmark_db_connections", requests=5, stdout=stdout)
+        output = stdout.getvalue()
+        self.assertIn("django.db.backends.postgresql", output)
+        self.assertIn("core.db.backends.pooled_postgresql", output)
+        self.assertIn("Pooling is", output)
@@ -0,0 +1,152 @@
+import json
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api.documents import get_document, rebuild_documents, refresh_documents
+from api.models import Character, Film, RenderedDocument, Starship
+from api.serializers import CharacterSerializer
+from api.signals import bulk_sync
+
+
+def create_character(name="Luke Skywalker"):
+    return Character.objects.create(
+        name=name,
+        species=[],
+        vehicles=[],
+        created="2014-12-09T13:50:51.644000Z",
+        edited="2014-12-20T21:17:56.891000Z",
+        url="https://swapi.dev/api/people/1/",
+    )
+
+
+def create_starship():
+    return Starship.objects.create(
+        name="X-wing",
+        model="T-65 X-wing",
+        manufacturer="Incom Corporation",
+        length="12.5",
+        max_atmosphering_speed="1050",
+        crew="1",
+        passengers="0",
+        cargo_capacity="110",
+        consumables="1 week",
+        hyperdrive_rating="1.0",
+        MGLT="100",
+        starship_class="Starfighter",
+        created="2014-12-12T11:19:05.340000Z",
+        edited="2014-12-20T21:17:50.309000Z",
+        url="https://swapi.dev/api/starships/12/",
+    )
+
+
+def create_film():
+    return Film.objects.create(
+        title="A New Hope",
+        episode_id=4,
+        opening_crawl="It is a period of civil war.",
+        director="George Lucas",
+        producer="Gary Kurtz, Rick McCallum",
+        release_date="1977-05-25",
+        planets=[],
+        species=[],
+        vehicles=[],
+        created="2014-12-10T14:23:31.880000Z",
+        edited="2014-12-20T19:49:45.256000Z",
+        url="https://swapi.dev/api/films/1/",
+    )
+
+
+def document(kind, pk):
+    return json.loads(get_document(kind, pk))
+
+
+class DocumentMaintenanceTest(TestCase):
+    def setUp(self):
+        self.character = create_character()
+        self.starship = create_starship()
+        self.film = create_film()
+
+    def test_documents_match_the_serializer(self):
+        self.starship.pilots.add(self.character)
+        self.assertEqual(
+            document("character", self.character.pk),
+            json.loads(json.dumps(CharacterSerializer(Character.objects.get()).data)),
+        )
+
+    def test_saves_and_relation_changes_re_render_both_sides(self):
+        self.character.name = "Rey"
+        self.character.save()
+        self.assertEqual(document("character", self.character.pk)["name"], "Rey")
+
+        self.starship.pilots.add(self.character)
+        self.film.characters.add(self.character)
+        character = document("character", self.character.pk)
+        self.assertEqual(character["starships"], [self.starship.pk])
+        self.assertEqual((character["film_count"], character["starship_count"]), (1, 1))
+        starship = document("starship", self.starship.pk)
+        self.assertEqual(starship["pilots"], [self.character.pk])
+        film = document("film", self.film.pk)
+        self.assertEqual(film["characters"], [self.character.pk])
+
+        self.character.starships.clear()
+        self.assertEqual(document("character", self.character.pk)["starships"], [])
+        self.assertEqual(document("starship", self.starship.pk)["pilots"], [])
+
+    def test_relation_changes_skip_sides_that_do_not_show_them(self):
+        with mock.patch(
+            "api.signals.refresh_documents", wraps=refresh_documents
+        ) as refresh:
+            self.film.starships.add(self.starship)
+        # Starship documents do not show the films they appear in
+        refresh.assert_called_once_with(Film, [self.film.pk])
+        self.assertEqual(document("film", self.film.pk)["starships"], [self.starship.pk])
+
+    def test_deletes_drop_the_document_and_re_render_related_ones(self):
+        self.starship.pilots.add(self.character)
+        self.film.characters.add(self.character)
+        pk = self.character.pk
+        self.character.delete()
+        self.assertIsNone(get_document("character", pk))
+        self.assertEqual(document("starship", self.starship.pk)["pilots"], [])
+        self.assertEqual(document("film", self.film.pk)["characters"], [])
+
+    def test_bulk_syncs_rebuild_all_documents(self):
+        RenderedDocument.objects.all().delete()
+        with bulk_sync():
+            character = create_character("Leia Organa")
+            self.assertIsNone(get_document("character", character.pk))
+        self.assertEqual(RenderedDocument.objects.count(), 4)
+        self.assertEqual(document("character", character.pk)["name"], "Leia Organa")
+
+        Character.objects.filter(pk=character.pk).delete()
+        rebuild_documents()
+        self.assertIsNone(get_document("character", character.pk))
+
+
+class DocumentDetailViewTest(APITestCase):
+    def setUp(self):
+        self.character = create_character()
+        self.url = reverse("character-detail", args=[self.character.pk])
+
+    def test_detail_reads_return_the_document_with_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/json")
+        body = get_document("character", self.character.pk)
+        self.assertEqual(response.content, body)
+
+    def test_missing_documents_and_other_formats_are_serialized(self):
+        RenderedDocument.objects.all().delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()["name"], "Luke Skywalker")
+
+        response = self.client.get(self.url, HTTP_ACCEPT="text/html")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, "Luke Skywalker")
+
+        response = self.client.get(reverse("character-detail", args=[999]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
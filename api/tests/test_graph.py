@@ -0,0 +1,37 @@
+from django.test import SimpleTestCase
+from api.graph import CoAppearanceGraph
+
+
+class CoAppearanceGraphTest(SimpleTestCase):
+    def setUp(self):
+        # Films 10 and 20 share character 2; film 30 is disconnected
+        self.graph = CoAppearanceGraph(
+            [(10, 1), (10, 2), (20, 2), (20, 3), (20, 4), (30, 5), (30, 6)]
+        )
+
+    def test_co_stars(self):
+        self.assertEqual(self.graph.co_stars(2), [1, 3, 4])
+        self.assertEqual(self.graph.co_stars(99), [])
+
+    def test_shortest_path(self):
+        self.assertEqual(
+            self.graph.shortest_path(1, 4), [(1, None), (2, 10), (4, 20)]
+        )
+        self.assertEqual(self.graph.shortest_path(3, 3), [(3, None)])
+
+    def test_disconnected_characters_have_no_path(self):
+        self.assertIsNone(self.graph.shortest_path(1, 5))
+
+    def test_most_connected(self):
+        self.assertEqual(self.graph.most_connected(2), [(2, 3), (3, 2)])
+
+    def test_incremental_updates(self):
+        self.graph.set_film_members(30, [4, 5])
+        self.assertEqual(
+            self.graph.shortest_path(1, 5),
+            [(1, None), (2, 10), (4, 20), (5, 30)],
+        )
+        self.graph.remove_character(2)
+        self.assertIsNone(self.graph.shortest_path(1, 4))
+        self.graph.remove_film(20)
+        self.assertEqual(self.graph.co_stars(4), [5])
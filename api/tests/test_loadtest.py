@@ -0,0 +1,83 @@
+import json
+import random
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from django.test import LiveServerTestCase, SimpleTestCase
+from api.synthetic import Density, generate
+from loadtest.__main__ import main
+from loadtest.histogram import Histogram
+from loadtest.scenarios import parse_mix
+
+
+class HistogramTest(SimpleTestCase):
+    def test_percentiles_keep_three_significant_figures(self):
+        rng = random.Random(1)
+        values = sorted(rng.randint(0, 60_000_000) for _ in range(10_000))
+        histogram = Histogram()
+        for value in values:
+            histogram.record(value)
+
+        for percentile in (50, 90, 99, 99.9):
+            exact = values[int(len(values) * percentile / 100) - 1]
+            self.assertAlmostEqual(
+                histogram.percentile(percentile), exact, delta=exact * 0.001
+            )
+        self.assertEqual(histogram.percentile(100), values[-1])
+        self.assertLess(len(histogram.counts), 10_000)
+
+    def test_small_values_are_exact_and_merge(self):
+        first, second = Histogram(), Histogram()
+        for value in (1, 2, 3):
+            first.record(value)
+        second.record(1000, count=2)
+        first.merge(second)
+        self.assertEqual(first.total, 5)
+        self.assertEqual(first.percentile(50), 3)
+        self.assertEqual((first.min, first.max), (1, 1000))
+
+
+class ParseMixTest(SimpleTestCase):
+    def test_named_and_custom_mixes(self):
+        self.assertIn("search", parse_mix("search-heavy"))
+        self.assertEqual(parse_mix("search=3,detail"), {"search": 3.0, "detail": 1.0})
+        with self.assertRaises(ValueError):
+            parse_mix("teleport=1")
+        with self.assertRaises(ValueError):
+            parse_mix("search=0")
+
+
+class LoadTestRunTest(LiveServerTestCase):
+    def setUp(self):
+        generate(30, 5, 10, density=Density(cast=(2, 5), fleet=(1, 2)))
+
+    def run_loadtest(self, *args):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "report.json"
+            output = StringIO()
+            with redirect_stdout(output):
+                code = main(
+                    ["--url", self.live_server_url, "--duration", "0.5", "--warmup", "0.1"]
+                    + ["--json", str(path), *args]
+                )
+            return code, output.getvalue(), json.loads(path.read_text())
+
+    def test_closed_loop(self):
+        code, output, report = self.run_loadtest("--clients", "2", "--mix", "mixed")
+        self.assertEqual(code, 0)
+        self.assertIn("p99.9", output)
+        self.assertGreater(report["all"]["count"], 0)
+        self.assertEqual(
+            sum(sum(op["errors"].values()) for op in report["operations"].values()), 0
+        )
+
+    def test_open_loop(self):
+        code, _, report = self.run_loadtest(
+            "--mode", "open", "--rate", "40", "--clients", "2", "--mix", "detail"
+        )
+        self.assertEqual(code, 0)
+        self.assertEqual(report["mode"], "open")
+        # Operations follow the schedule, not the server speed
+        self.assertAlmostEqual(report["all"]["count"], 20, delta=3)
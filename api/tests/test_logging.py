@@ -0,0 +1,129 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+from core.log_config import (
+    JsonFormatter,
+    LogConfig,
+    NonBlockingQueueHandler,
+    RateLimitFilter,
+)
+
+
+class CaptureHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.records.append(record)
+        self.threads.add(threading.current_thread().name)
+
+
+def make_logger(name, *handlers):
+    logger = logging.getLogger(f"test_logging.{name}")
+    logger.propagate = False
+    logger.handlers = list(handlers)
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+
+class JsonFormatterTest(SimpleTestCase):
+    def test_structured_output(self):
+        handler = CaptureHandler()
+        logger = make_logger("json", handler)
+        try:
+            raise ValueError("bad row")
+        except ValueError:
+            logger.exception("Error saving %s", "Luke", extra={"run": 7})
+
+        entry = json.loads(JsonFormatter().format(handler.records[0]))
+        self.assertEqual(entry["level"], "ERROR")
+        self.assertEqual(entry["message"], "Error saving Luke")
+        self.assertEqual(entry["run"], 7)
+        self.assertIn("ValueError: bad row", entry["exc_info"])
+        self.assertTrue(entry["time"].endswith("+00:00"))
+
+
+class RateLimitFilterTest(SimpleTestCase):
+    def test_repeated_call_site_is_suppressed_then_summarized(self):
+        handler = CaptureHandler()
+        handler.addFilter(RateLimitFilter(limit=2, window=0.05))
+        logger = make_logger("rate", handler)
+
+        def log(index):
+            logger.error("Error saving row %s", index)
+
+        for index in range(5):
+            log(index)
+        self.assertEqual(len(handler.records), 2)
+        time.sleep(0.06)
+        log(5)
+        self.assertEqual(len(handler.records), 3)
+        self.assertEqual(
+            handler.records[-1].getMessage(),
+            "Error saving row 5 (3 similar messages suppressed)",
+        )
+
+    def test_record_is_counted_once_across_handlers(self):
+        rate_limit = RateLimitFilter(limit=1, window=60)
+        first, second = CaptureHandler(), CaptureHandler()
+        for handler in (first, second):
+            handler.addFilter(rate_limit)
+        logger = make_logger("shared", first, second)
+        logger.warning("once")
+        self.assertEqual((len(first.records), len(second.records)), (1, 1))
+
+
+class QueueLoggingTest(SimpleTestCase):
+    def test_records_are_written_by_the_listener_thread(self):
+        target = CaptureHandler()
+        queue_handler, listener = LogConfig.start_queue([target], queue_size=100)
+        logger = make_logger("queue", queue_handler)
+        try:
+            raise KeyError("name")
+        except KeyError:
+            logger.exception("Failed %s", "row")
+        logger.info("done")
+        listener.stop()
+
+        self.assertEqual(
+            [record.getMessage() for record in target.records], ["Failed row", "done"]
+        )
+        self.assertIn("KeyError", target.records[0].exc_text)
+        self.assertNotIn(threading.current_thread().name, target.threads)
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = NonBlockingQueueHandler(queue.Queue(1))
+        logger = make_logger("full", handler)
+        for index in range(3):
+            logger.error("storm %s", index)
+        self.assertEqual(handler.dropped, 2)
+
+
+class FileHandlerTest(SimpleTestCase):
+    def file_handler(self, **environ):
+        with tempfile.TemporaryDirectory() as directory:
+            environ["LOG_FILE"] = os.path.join(directory, "app.log")
+            with mock.patch.dict(os.environ, environ):
+                handlers = LogConfig.build_handlers()
+            for handler in handlers:
+                handler.close()
+        return handlers[-1]
+
+    def test_log_file_is_rotated_externally_by_default(self):
+        handler = self.file_handler()
+        self.assertIsInstance(handler, logging.handlers.WatchedFileHandler)
+
+    def test_single_processes_may_rotate_by_size(self):
+        handler = self.file_handler(LOG_MAX_BYTES="1024")
+        self.assertIsInstance(handler, logging.handlers.RotatingFileHandler)
+        self.assertEqual(handler.maxBytes, 1024)
@@ -0,0 +1,52 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.celery import start_metrics
+from core.metrics import observe_phase
+
+
+class MetricsEndpointTest(APITestCase):
+    def test_request_metrics_are_exposed(self):
+        self.client.get(reverse("character-list"))
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.content.decode()
+        self.assertIn(
+            'http_requests_total{method="GET",route="character-list",status="200"}',
+            body,
+        )
+        self.assertIn('db_queries_per_request_count{route="character-list"}', body)
+
+    def test_ingestion_phases_are_exposed(self):
+        with observe_phase("characters"):
+            pass
+        response = self.client.get(reverse("metrics"))
+        self.assertIn(
+            'ingestion_phase_duration_seconds_count{phase="characters"}',
+            response.content.decode(),
+        )
+
+
+class CeleryMetricsTest(SimpleTestCase):
+    def test_workers_clear_their_directory_and_serve_their_metrics(self):
+        with tempfile.TemporaryDirectory() as directory:
+            stale = os.path.join(directory, "counter_7.db")
+            open(stale, "w").close()
+            environ = {
+                "PROMETHEUS_MULTIPROC_DIR": directory,
+                "CELERY_METRICS_PORT": "9100",
+            }
+            with mock.patch.dict(os.environ, environ), mock.patch(
+                "core.metrics.start_http_server"
+            ) as start_http_server:
+                start_metrics()
+            self.assertFalse(os.path.exists(stale))
+        start_http_server.assert_called_once()
+        self.assertEqual(start_http_server.call_args.args, (9100,))
+        self.assertIsNot(start_http_server.call_args.kwargs["registry"], REGISTRY)
@@ -1,5 +1,6 @@
 # api/tests/test_models.py
 from django.test import TestCase
+from api.counts import refresh_all_counts, refresh_character_counts
 from api.models import Character, Film, Starship
 
 
@@ -70,3 +71,109 @@ class StarshipModelTest(TestCase):
 
     def test_starship_string_representation(self):
         self.assertEqual(str(self.starship), "X-wing")
+
+    def test_pilots_are_visible_from_character(self):
+        pilot = Character.objects.create(
+            name="Wedge Antilles",
+            birth_year="21BBY",
+            eye_color="hazel",
+            gender="male",
+            hair_color="brown",
+            height="170",
+            mass="77",
+            skin_color="fair",
+            homeworld="https://swapi.dev/api/planets/22/",
+            species=[],
+            vehicles=[],
+            created="2014-12-12T11:08:06.469000Z",
+            edited="2014-12-20T21:17:50.341000Z",
+            url="https://swapi.dev/api/people/18/",
+        )
+        self.starship.pilots.add(pilot)
+        self.assertEqual(list(pilot.starships.all()), [self.starship])
+
+
+class RelationCountTest(TestCase):
+    def setUp(self):
+        self.character = Character.objects.create(
+            name="Han Solo",
+            birth_year="29BBY",
+            eye_color="brown",
+            gender="male",
+            hair_color="brown",
+            height="180",
+            mass="80",
+            skin_color="fair",
+            homeworld="https://swapi.dev/api/planets/22/",
+            species=[],
+            vehicles=[],
+            created="2014-12-10T16:49:14.582000Z",
+            edited="2014-12-20T21:17:50.334000Z",
+            url="https://swapi.dev/api/people/14/",
+        )
+        self.starship = Starship.objects.create(
+            name="Millennium Falcon",
+            model="YT-1300 light freighter",
+            manufacturer="Corellian Engineering Corporation",
+            cost_in_credits="100000",
+            length="34.37",
+            max_atmosphering_speed="1050",
+            crew="4",
+            passengers="6",
+            cargo_capacity="100000",
+            consumables="2 months",
+            hyperdrive_rating="0.5",
+            MGLT="75",
+            starship_class="Light freighter",
+            created="2014-12-10T16:59:45.094000Z",
+            edited="2014-12-20T21:23:49.880000Z",
+            url="https://swapi.dev/api/starships/10/",
+        )
+        self.film = Film.objects.create(
+            title="A New Hope",
+            episode_id=4,
+            opening_crawl="It is a period of civil war...",
+            director="George Lucas",
+            producer="Gary Kurtz, Rick McCallum",
+            release_date="1977-05-25",
+            planets=[],
+            species=[],
+            vehicles=[],
+            created="2014-12-10T14:23:31.880000Z",
+            edited="2014-12-20T19:49:45.256000Z",
+            url="https://swapi.dev/api/films/1/",
+        )
+
+    def assertCounts(self, film_count, starship_count, pilot_count):
+        self.character.refresh_from_db()
+        self.starship.refresh_from_db()
+        self.assertEqual(self.character.film_count, film_count)
+        self.assertEqual(self.character.starship_count, starship_count)
+        self.assertEqual(self.starship.pilot_count, pilot_count)
+
+    def test_counts_follow_relation_changes(self):
+        self.film.characters.add(self.character)
+        self.character.starships.add(self.starship)
+        self.assertCounts(1, 1, 1)
+        self.starship.pilots.clear()
+        self.assertCounts(1, 0, 0)
+        self.character.films.remove(self.film)
+        self.assertCounts(0, 0, 0)
+
+    def test_counts_follow_deletes(self):
+        self.film.characters.add(self.character)
+        self.starship.pilots.add(self.character)
+        self.film.delete()
+        self.assertCounts(0, 1, 1)
+        self.character.delete()
+        self.starship.refresh_from_db()
+        self.assertEqual(self.starship.pilot_count, 0)
+
+    def test_only_changed_counts_are_rewritten(self):
+        self.film.characters.add(self.character)
+        self.assertEqual(refresh_character_counts(), 0)
+        Character.objects.update(film_count=5)
+        self.assertEqual(refresh_character_counts(), 1)
+        self.assertCounts(1, 0, 0)
+        refresh_all_counts()
+        self.assertEqual(refresh_character_counts([self.character.pk]), 0)
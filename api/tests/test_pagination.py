@@ -0,0 +1,134 @@
+from unittest import mock, skipIf, skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api import pagination
+from api.models import Character, SyncRun
+from api.pagination import (
+    ApproximateCountPaginator,
+    _table_size_key,
+    estimate_count,
+)
+
+
+def create_characters(count):
+    for number in range(1, count + 1):
+        Character.objects.create(
+            name=f"Clone {number}",
+            species=[],
+            vehicles=[],
+            created="2014-12-09T13:50:51.644000Z",
+            edited="2014-12-20T21:17:56.891000Z",
+            url=f"https://swapi.dev/api/people/{number}/",
+        )
+
+
+class ExactCountTest(APITestCase):
+    def setUp(self):
+        create_characters(3)
+        self.url = reverse("character-list")
+
+    def test_small_tables_get_exact_counts(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 3)
+        self.assertFalse(response.data["count_is_approximate"])
+
+    def test_counts_are_cached_until_the_table_changes(self):
+        self.client.get(self.url)
+        # The page and its starships, but no COUNT
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data["count"], 3)
+
+        create_characters(1)
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["count"], 4)
+
+    def test_counts_are_cached_per_filter(self):
+        self.assertEqual(self.client.get(self.url).data["count"], 3)
+        response = self.client.get(self.url, {"search": "Clone 2"})
+        self.assertEqual(response.data["count"], 1)
+
+
+@override_settings(APPROXIMATE_COUNT_THRESHOLD=100)
+class ApproximateCountTest(APITestCase):
+    def setUp(self):
+        create_characters(25)
+        self.url = reverse("character-list")
+        patcher = mock.patch.object(pagination, "estimate_count", return_value=12)
+        self.estimate = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def known_size(size):
+        cache.set(_table_size_key(Character, "default"), size)
+
+    def test_large_estimates_are_returned_as_approximate(self):
+        self.known_size(1000)
+        self.estimate.return_value = 5000
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["count"], 5000)
+        self.assertTrue(response.data["count_is_approximate"])
+        self.assertEqual(len(response.data["results"]), 10)
+
+    def test_only_unfiltered_lists_of_known_large_tables_are_estimated(self):
+        self.estimate.return_value = 5000
+        # The table size is unknown, then known from the exact count
+        for _ in range(2):
+            response = self.client.get(self.url)
+            self.assertEqual(response.data["count"], 25)
+        self.known_size(1000)
+        response = self.client.get(self.url, {"search": "Clone 25"})
+        self.assertEqual(response.data["count"], 1)
+        self.assertFalse(response.data["count_is_approximate"])
+        self.estimate.assert_not_called()
+
+    def test_pages_past_a_low_estimate_are_served_while_rows_remain(self):
+        self.known_size(1000)
+        self.estimate.return_value = 100
+        response = self.client.get(self.url, {"page": 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertIsNone(response.data["next"])
+        self.assertIsNotNone(response.data["previous"])
+
+        response = self.client.get(self.url, {"page": 4})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_small_estimates_and_exact_count_requests_are_counted(self):
+        self.known_size(1000)
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["count"], 25)
+        self.assertFalse(response.data["count_is_approximate"])
+
+        self.estimate.return_value = 5000
+        response = self.client.get(self.url, {"exact_count": "1"})
+        self.assertEqual(response.data["count"], 25)
+        self.assertFalse(response.data["count_is_approximate"])
+        self.assertEqual(response.data["next"].count("exact_count=1"), 1)
+
+
+class ApproximateCountPaginatorTest(TestCase):
+    def test_uncached_models_and_lists_are_counted(self):
+        SyncRun.objects.create()
+        self.assertEqual(ApproximateCountPaginator(SyncRun.objects.all(), 10).count, 1)
+        self.assertEqual(ApproximateCountPaginator([1, 2, 3], 2).num_pages, 2)
+
+    @skipIf(connection.vendor == "postgresql", "PostgreSQL estimates counts")
+    def test_other_databases_do_not_estimate(self):
+        self.assertIsNone(estimate_count(Character.objects.all()))
+
+    @skipUnless(connection.vendor == "postgresql", "only PostgreSQL estimates")
+    def test_postgresql_estimates_from_statistics_and_plans(self):
+        create_characters(20)
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Character._meta.db_table}")
+        self.assertEqual(estimate_count(Character.objects.all()), 20)
+        estimate = estimate_count(Character.objects.filter(name__startswith="Clone"))
+        self.assertIsInstance(estimate, int)
+        self.assertGreaterEqual(estimate, 1)
@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api.models import ProfileReport
+from api.profiling import make_profile_token
+
+
+class ProfilingMiddlewareTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_user(
+            "admiral", password="ackbar", is_staff=True
+        )
+
+    def test_cprofile_for_staff(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("character-list") + "?profile=cprofile")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["X-Profiled-Status"], "200")
+        self.assertIn("function calls", response.content.decode())
+        report = ProfileReport.objects.get(pk=response["X-Profile-Report"])
+        self.assertEqual(report.user, "admiral")
+
+    def test_alloc_with_signed_token(self):
+        url = reverse("film-list") + "?profile=alloc"
+        response = self.client.get(url, HTTP_X_PROFILE_TOKEN=make_profile_token("ops"))
+        self.assertIn("Peak traced memory", response.content.decode())
+        self.assertEqual(ProfileReport.objects.get().user, "token:ops")
+
+    def test_reports_do_not_store_the_profiling_parameters(self):
+        token = make_profile_token("ops")
+        url = reverse("film-list") + f"?page=2&profile=alloc&profile_token={token}"
+        self.client.get(url + "&profile_limit=5")
+        self.assertEqual(ProfileReport.objects.get().path, "/api/films/?page=2")
+
+    def test_ignored_without_permission(self):
+        url = reverse("character-list") + "?profile=cprofile&profile_token=forged"
+        response = self.client.get(url)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertFalse(ProfileReport.objects.exists())
+
+    @override_settings(PROFILE_HISTORY_SIZE=2)
+    def test_reports_are_a_ring_buffer(self):
+        self.client.force_login(self.staff)
+        for _ in range(3):
+            response = self.client.get(reverse("starship-list") + "?profile=cprofile")
+        self.assertEqual(ProfileReport.objects.count(), 2)
+        self.assertTrue(
+            ProfileReport.objects.filter(pk=response["X-Profile-Report"]).exists()
+        )
@@ -0,0 +1,110 @@
+import json
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+from api.models import Character, Film, Starship
+from core.querycheck import QueryInspector, QueryInspectorMiddleware, normalize_sql
+
+
+def make_character(index):
+    return Character.objects.create(
+        name=f"Clone {index}",
+        birth_year="32BBY",
+        eye_color="brown",
+        gender="male",
+        hair_color="black",
+        height="183",
+        mass="80",
+        skin_color="tan",
+        homeworld="https://swapi.dev/api/planets/10/",
+        species=[],
+        vehicles=[],
+        created="2014-12-10T16:49:14.582000Z",
+        edited="2014-12-20T21:17:50.334000Z",
+        url=f"https://swapi.dev/api/people/{index}/",
+    )
+
+
+@pytest.fixture
+def fleet(db):
+    """Five characters piloting one starship and appearing in one film."""
+    characters = [make_character(index) for index in range(5)]
+    starship = Starship.objects.create(
+        name="Republic Attack Gunship",
+        model="Rothana Heavy Engineering",
+        manufacturer="Rothana Heavy Engineering",
+        cost_in_credits="unknown",
+        length="17.4",
+        max_atmosphering_speed="620",
+        crew="6",
+        passengers="30",
+        cargo_capacity="170",
+        consumables="unknown",
+        hyperdrive_rating="unknown",
+        MGLT="unknown",
+        starship_class="assault ship",
+        created="2014-12-20T18:08:42.926000Z",
+        edited="2014-12-20T21:23:49.930000Z",
+        url="https://swapi.dev/api/starships/32/",
+    )
+    starship.pilots.set(characters)
+    film = Film.objects.create(
+        title="Attack of the Clones",
+        episode_id=2,
+        opening_crawl="There is unrest in the Galactic Senate...",
+        director="George Lucas",
+        producer="Rick McCallum",
+        release_date="2002-05-16",
+        planets=[],
+        species=[],
+        vehicles=[],
+        created="2014-12-20T10:57:57.886000Z",
+        edited="2014-12-20T20:18:48.516000Z",
+        url="https://swapi.dev/api/films/5/",
+    )
+    film.characters.set(characters)
+    film.starships.set([starship])
+    return characters
+
+
+def test_normalize_sql_collapses_literals_and_in_lists():
+    assert normalize_sql(
+        "SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x' LIMIT 10"
+    ) == "SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?"
+
+
+@pytest.mark.django_db
+def test_inspector_flags_repeated_queries():
+    characters = [make_character(index) for index in range(3)]
+    with QueryInspector(n_plus_one_threshold=3) as inspector:
+        for character in characters:
+            list(character.starships.all())
+    (repeated,) = inspector.n_plus_one()
+    assert repeated["count"] == 3
+    assert "test_querycheck.py" in repeated["origin"]
+
+
+@pytest.mark.parametrize("name", ["character-list", "film-list", "starship-list"])
+def test_list_endpoints_stay_within_query_budget(client, fleet, query_budget, name):
+    # Count, page and one prefetch per relation, independent of the page size
+    with query_budget(4):
+        response = client.get(reverse(name))
+    assert response.status_code == 200
+
+
+@override_settings(QUERY_INSPECTOR_ENABLED=True)
+def test_middleware_reports_in_header(rf, fleet):
+    request = rf.get("/api/characters/?inspect_queries=1")
+
+    def view(request):
+        from django.http import HttpResponse
+
+        for character in Character.objects.all():
+            list(character.starships.all())
+        return HttpResponse()
+
+    response = QueryInspectorMiddleware(view)(request)
+    report = json.loads(response["X-Query-Report"])
+    assert report["queries"] == 6
+    assert report["n_plus_one"][0]["count"] == 5
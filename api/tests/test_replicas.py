@@ -0,0 +1,113 @@
+import time
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api.models import Character
+from core.db import replicas
+from core.db.replicas import ReplicaRouter, read_from_replica
+
+
+def create_character():
+    return Character.objects.create(
+        name="Luke Skywalker",
+        species=[],
+        vehicles=[],
+        created="2014-12-09T13:50:51.644000Z",
+        edited="2014-12-20T21:17:56.891000Z",
+        url="https://swapi.dev/api/people/1/",
+    )
+
+
+@override_settings(DATABASE_REPLICAS=["replica1", "replica2"])
+class ReplicaRouterTest(SimpleTestCase):
+    def test_reads_go_to_a_replica_only_inside_the_block(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Character))
+        with read_from_replica() as alias:
+            self.assertIn(alias, ["replica1", "replica2"])
+            self.assertEqual(router.db_for_read(Character), alias)
+            self.assertEqual(router.db_for_write(Character), "default")
+        self.assertIsNone(router.db_for_read(Character))
+        self.assertFalse(router.allow_migrate("replica1", "api"))
+        self.assertIsNone(router.allow_migrate("default", "api"))
+
+    def test_nested_blocks_keep_the_chosen_database(self):
+        router = ReplicaRouter()
+        with read_from_replica(alias="replica2"):
+            with read_from_replica(RequestFactory().get("/")) as alias:
+                self.assertEqual(alias, "replica2")
+            with read_from_replica(alias="default"):
+                self.assertEqual(router.db_for_read(Character), "default")
+            self.assertEqual(router.db_for_read(Character), "replica2")
+
+    def test_unsafe_and_pinned_requests_stay_on_the_primary(self):
+        factory = RequestFactory()
+        pinned = factory.get("/", HTTP_X_READ_PRIMARY_UNTIL=str(time.time() + 60))
+        expired = factory.get("/", HTTP_X_READ_PRIMARY_UNTIL=str(time.time() - 1))
+        factory.cookies[replicas.PIN_COOKIE] = str(time.time() + 60)
+        pinned_by_cookie = factory.get("/")
+
+        for request in (factory.post("/"), pinned, pinned_by_cookie):
+            with read_from_replica(request) as alias:
+                self.assertEqual(alias, "default")
+        with read_from_replica(expired) as alias:
+            self.assertNotEqual(alias, "default")
+
+
+# The primary doubles as the replica, to follow which requests use replicas
+@override_settings(DATABASE_REPLICAS=["default"])
+class ReadYourWritesTest(APITestCase):
+    def setUp(self):
+        self.character = create_character()
+        self.url = reverse("character-detail", args=[self.character.pk])
+
+    def test_client_reads_from_the_primary_after_writing(self):
+        with mock.patch.object(
+            replicas.random, "choice", side_effect=lambda aliases: aliases[0]
+        ) as choice:
+            response = self.client.get(reverse("character-list"))
+            self.assertEqual(choice.call_count, 1)
+            self.assertNotIn(replicas.PIN_HEADER, response)
+
+            response = self.client.patch(self.url, {"name": "Rey"}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIn(replicas.PIN_HEADER, response)
+            self.assertIn(replicas.PIN_COOKIE, response.cookies)
+
+            response = self.client.get(self.url)
+            self.assertEqual(response.json()["name"], "Rey")
+            self.assertEqual(choice.call_count, 1)
+
+    def test_failed_writes_do_not_pin(self):
+        response = self.client.patch(self.url, {"name": ""}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn(replicas.PIN_HEADER, response)
+
+
+@skipUnless(
+    settings.DATABASE_REPLICAS and connection.vendor == "postgresql",
+    "set DB_REPLICA_HOSTS to test with a PostgreSQL replica",
+)
+class ReplicaDatabaseTest(APITestCase):
+    """Runs against a real second connection (a TEST MIRROR of the primary).
+
+    The replica connection does not see the test's uncommitted rows, like a
+    replica that has not caught up yet.
+    """
+
+    databases = {"default", *settings.DATABASE_REPLICAS}
+
+    def test_reads_lag_until_the_client_writes(self):
+        character = create_character()
+        url = reverse("character-detail", args=[character.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.patch(url, {"name": "Rey"}, format="json")
+        response = self.client.get(url)
+        self.assertEqual(response.json()["name"], "Rey")
@@ -0,0 +1,60 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core import schema
+
+
+class OpenAPISchemaTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "openapi.json"
+        settings = override_settings(OPENAPI_SCHEMA_FILE=self.path)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_command_renders_the_served_file(self):
+        call_command("render_openapi_schema", stdout=StringIO())
+        document = json.loads(self.path.read_bytes())
+        self.assertEqual(document[schema.HASH_KEY], schema.code_hash())
+        self.assertIn("/characters/", document["paths"])
+
+        with mock.patch.object(schema, "render_schema") as render:
+            response = self.client.get(reverse("schema-json"))
+        render.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, self.path.read_bytes())
+        self.assertIn("Last-Modified", response)
+
+        response = self.client.get(
+            reverse("schema-json"), HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_stale_file_is_replaced_by_a_cached_render(self):
+        self.path.write_text(json.dumps({schema.HASH_KEY: "old", "paths": {}}))
+
+        with mock.patch.object(
+            schema, "render_schema", wraps=schema.render_schema
+        ) as render:
+            first = self.client.get(reverse("schema-json"))
+            second = self.client.get(reverse("schema-json"))
+        self.assertEqual(render.call_count, 1)
+        self.assertIn("/characters/", json.loads(first.content)["paths"])
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first["ETag"], second["ETag"])
+
+    def test_ui_loads_the_static_schema(self):
+        response = self.client.get(reverse("schema-swagger-ui"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(reverse("schema-json"), response.content.decode())
@@ -0,0 +1,227 @@
+import copy
+import json
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Max
+from django.test import TestCase
+from api.models import ChangeLogEntry, Character, Film, Starship, SyncRun
+from api.staging import StagedSync
+
+TIMESTAMPS = {
+    "created": "2014-12-09T13:50:51.644000Z",
+    "edited": "2014-12-20T21:17:56.891000Z",
+}
+
+
+def character(pk, name):
+    return {
+        "name": name,
+        "birth_year": "19BBY",
+        "eye_color": "blue",
+        "gender": "male",
+        "hair_color": "blond",
+        "height": "172",
+        "mass": "77",
+        "skin_color": "fair",
+        "homeworld": "https://swapi.dev/api/planets/1/",
+        "species": [],
+        "vehicles": [],
+        "url": f"https://swapi.dev/api/people/{pk}/",
+        **TIMESTAMPS,
+    }
+
+
+def starship(pk, name, pilots):
+    return {
+        "name": name,
+        "model": "T-65 X-wing",
+        "manufacturer": "Incom Corporation",
+        "cost_in_credits": "149999",
+        "length": "12.5",
+        "max_atmosphering_speed": "1050",
+        "crew": "1",
+        "passengers": "0",
+        "cargo_capacity": "110",
+        "consumables": "1 week",
+        "hyperdrive_rating": "1.0",
+        "MGLT": "100",
+        "starship_class": "Starfighter",
+        "pilots": [f"https://swapi.dev/api/people/{pilot}/" for pilot in pilots],
+        "url": f"https://swapi.dev/api/starships/{pk}/",
+        **TIMESTAMPS,
+    }
+
+
+def film(pk, title, characters, starships):
+    return {
+        "title": title,
+        "episode_id": pk + 3,
+        "opening_crawl": "It is a period of civil war.",
+        "director": "George Lucas",
+        "producer": "Gary Kurtz, Rick McCallum",
+        "release_date": "1977-05-25",
+        "characters": [f"https://swapi.dev/api/people/{c}/" for c in characters],
+        "starships": [f"https://swapi.dev/api/starships/{s}/" for s in starships],
+        "planets": [],
+        "species": [],
+        "vehicles": [],
+        "url": f"https://swapi.dev/api/films/{pk}/",
+        **TIMESTAMPS,
+    }
+
+
+DATASET = {
+    "people/": [character(1, "Luke Skywalker"), character(2, "Leia Organa")],
+    "films/": [film(1, "A New Hope", [1, 2], [12])],
+    "starships/": [starship(12, "X-wing", [1])],
+}
+
+
+class FakeSwapi:
+    """Serves a copy of DATASET that tests may change."""
+
+    def __init__(self):
+        self.data = copy.deepcopy(DATASET)
+
+    def __call__(self, url, *args, **kwargs):
+        response = mock.Mock(status_code=200)
+        results = next(
+            (records for path, records in self.data.items() if url.endswith(path)),
+            [],
+        )
+        response.content = json.dumps({"results": results, "next": None}).encode()
+        response.json.side_effect = lambda: json.loads(response.content)
+        return response
+
+
+class StagedSyncTest(TestCase):
+    def setUp(self):
+        self.swapi = FakeSwapi()
+        patcher = mock.patch(
+            "api.management.commands.fetch_swapi_data.requests.get",
+            side_effect=self.swapi,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sync(self, *args):
+        call_command("fetch_swapi_data", *args, stdout=StringIO(), stderr=StringIO())
+        return SyncRun.objects.latest("pk")
+
+    def snapshot(self):
+        rows = {
+            model: sorted(
+                model.objects.values_list(
+                    *(f.attname for f in model._meta.concrete_fields if f.name != "id")
+                )
+            )
+            for model in (Character, Film, Starship)
+        }
+        rows["cast"] = sorted(
+            Film.characters.through.objects.values_list(
+                "film__title", "character__name"
+            )
+        )
+        rows["pilots"] = sorted(
+            Starship.pilots.through.objects.values_list(
+                "starship__name", "character__name"
+            )
+        )
+        return rows
+
+    def test_matches_the_per_row_sync(self):
+        self.sync()
+        per_row = self.snapshot()
+        for model in (Film, Starship, Character):
+            model.objects.all().delete()
+
+        run = self.sync("--staging")
+        self.assertEqual(run.status, "succeeded")
+        self.assertEqual(self.snapshot(), per_row)
+        self.assertEqual(
+            run.phases["publish"]["merged"]["api.Character"],
+            {"updated": 0, "inserted": 2},
+        )
+        film = Film.objects.get()
+        self.assertEqual(
+            sorted(film.characters.values_list("name", flat=True)),
+            ["Leia Organa", "Luke Skywalker"],
+        )
+        self.assertEqual(Character.objects.get(name="Luke Skywalker").film_count, 1)
+
+    def test_resync_updates_only_what_changed(self):
+        self.sync("--staging")
+        last_seq = ChangeLogEntry.objects.aggregate(Max("seq"))["seq__max"] or 0
+        self.swapi.data["people/"][1]["eye_color"] = "brown"
+        self.swapi.data["starships/"][0]["pilots"] = []
+
+        run = self.sync("--staging")
+        merged = run.phases["publish"]["merged"]
+        self.assertEqual(merged["api.Character"], {"updated": 1, "inserted": 0})
+        self.assertEqual(merged["api.Film"], {"updated": 0, "inserted": 0})
+        self.assertEqual(Character.objects.count(), 2)
+        self.assertEqual(Character.objects.get(name="Leia Organa").eye_color, "brown")
+        self.assertFalse(Starship.objects.get().pilots.exists())
+        # Derived data is rebuilt, and only the changed objects are logged
+        self.assertEqual(
+            set(
+                ChangeLogEntry.objects.filter(seq__gt=last_seq).values_list(
+                    "kind", flat=True
+                )
+            ),
+            {"character", "starship"},
+        )
+
+    def test_invalid_records_are_rejected(self):
+        del self.swapi.data["people/"][0]["height"]
+        self.swapi.data["films/"][0]["release_date"] = "soon"
+
+        run = self.sync("--staging")
+        self.assertEqual(run.status, "succeeded")
+        self.assertEqual(run.error_count, 2)
+        self.assertIn("Luke Skywalker", run.errors[0])
+        self.assertEqual(
+            list(Character.objects.values_list("name", flat=True)), ["Leia Organa"]
+        )
+        self.assertFalse(Film.objects.exists())
+
+    def test_failed_publish_changes_nothing(self):
+        self.swapi.data["films/"].append(film(1, "A Newer Hope", [], []))
+
+        run = self.sync("--staging")
+        self.assertEqual(run.status, "failed")
+        self.assertFalse(Character.objects.exists())
+        self.assertFalse(Film.objects.exists())
+
+    def test_derived_data_is_rebuilt_after_the_publish_commits(self):
+        with mock.patch(
+            "api.management.commands.fetch_swapi_data.rebuild_derived_data",
+            side_effect=DatabaseError("boom"),
+        ):
+            run = self.sync("--staging")
+        self.assertEqual(run.status, "failed")
+        self.assertEqual(Character.objects.count(), 2)
+        self.assertFalse(ChangeLogEntry.objects.exists())
+
+    def test_relations_to_unstaged_objects_resolve_to_live_rows(self):
+        luke = Character.objects.create(**character(1, "Luke Skywalker"))
+        Character.objects.create(**character(1, "Luke (clone)"))
+        Character.objects.create(**character(11, "Anakin Skywalker"))
+        with StagedSync() as staged:
+            staged.stage(Starship, [starship(12, "X-wing", [1, 9])])
+            staged.publish()
+        self.assertEqual(list(Starship.objects.get().pilots.all()), [luke])
+
+    def test_staging_tables_are_dropped(self):
+        with StagedSync() as staged:
+            staged.stage(Character, [character(1, "Luke Skywalker")])
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) FROM staging_api_character")
+                self.assertEqual(cursor.fetchone(), (1,))
+
+        with self.assertRaises(DatabaseError), transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) FROM staging_api_character")
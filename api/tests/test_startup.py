@@ -0,0 +1,63 @@
+import json
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.urls import resolve
+import core
+from api.management.commands.startup_report import parse_importtime, summarize
+from core.warmup import warm_up
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     django.utils
+import time:       300 |        420 |   django.conf
+import time:        80 |        500 | django
+Booting...
+import time:        50 |         50 | json
+"""
+
+
+class WarmUpTest(SimpleTestCase):
+    def test_builds_lazy_views_and_freezes(self):
+        with mock.patch("gc.freeze") as freeze:
+            elapsed = warm_up()
+        freeze.assert_called_once_with()
+        self.assertGreater(elapsed, 0)
+        # The documentation view was built ahead of its first request
+        swagger = resolve("/swagger/").func
+        with mock.patch("drf_yasg.views.get_schema_view") as get_schema_view:
+            swagger.warm_up()
+        get_schema_view.assert_not_called()
+
+    def test_celery_worker_skips_http_state(self):
+        with mock.patch("core.warmup._warm_views") as warm_views:
+            warm_up(http=False, freeze=False)
+        warm_views.assert_not_called()
+
+    def test_celery_app_is_loaded_on_demand(self):
+        self.assertEqual(core.celery_app.main, "core")
+
+
+class StartupReportTest(SimpleTestCase):
+    def test_parse_and_summarize(self):
+        imports = parse_importtime(IMPORTTIME.splitlines())
+        self.assertEqual(imports[0], ("django.utils", 120, 120, 2))
+        self.assertEqual(imports[2], ("django", 80, 500, 0))
+
+        summary = summarize(imports, top=1)
+        self.assertEqual(summary["total_ms"], 0.55)
+        self.assertEqual(summary["modules"], 4)
+        self.assertEqual(summary["packages"], [("django", 0.5)])
+        self.assertEqual(summary["direct"], [("django", 0.5)])
+
+    def test_command_boots_a_fresh_interpreter(self):
+        out = StringIO()
+        call_command("startup_report", "--json", "--top", "5", stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertGreater(report["boot_s"], 0)
+        self.assertGreater(report["warm_up_s"], 0)
+        self.assertEqual(len(report["requests"]), 2)
+        self.assertIn("django", dict(report["packages"]))
+        self.assertLessEqual(len(report["direct"]), 5)
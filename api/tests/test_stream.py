@@ -0,0 +1,111 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from api import stream
+from api.models import ChangeLogEntry, Character
+from api.sync import SyncRecorder
+
+
+def create_character(name="Luke Skywalker"):
+    return Character.objects.create(
+        name=name,
+        species=[],
+        vehicles=[],
+        created="2014-12-09T13:50:51.644000Z",
+        edited="2014-12-20T21:17:56.891000Z",
+        url="https://swapi.dev/api/people/1/",
+    )
+
+
+def record_sync():
+    with SyncRecorder() as recorder:
+        pass
+    return recorder.run
+
+
+async def next_message(messages):
+    return await asyncio.wait_for(anext(messages), 5)
+
+
+def change_message(seq, object_id, action):
+    return (
+        f"id: {seq}\nevent: change\n"
+        f'data: {{"seq":{seq},"kind":"character","id":{object_id},'
+        f'"action":"{action}"}}\n\n'
+    ).encode()
+
+
+@override_settings(STREAM_BACKEND="memory")
+class EventStreamTest(TestCase):
+    async def open(self, **headers):
+        response = await self.async_client.get(reverse("stream"), headers=headers)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        messages = aiter(response.streaming_content)
+        self.assertEqual(await next_message(messages), b"retry: 3000\n\n")
+        return messages
+
+    async def write(self, function, *args):
+        def run():
+            # On the thread owning the test's connection, which holds the
+            # publishing callbacks
+            with self.captureOnCommitCallbacks(execute=True):
+                return function(*args)
+
+        result = await sync_to_async(run)()
+        seq = await ChangeLogEntry.objects.values_list("seq", flat=True).alast()
+        return result, seq
+
+    async def test_saves_deletes_and_syncs_are_pushed(self):
+        messages = await self.open()
+        character, seq = await self.write(create_character)
+        self.assertEqual(
+            await next_message(messages), change_message(seq, character.pk, "upsert")
+        )
+        pk = character.pk
+        _, seq = await self.write(character.delete)
+        self.assertEqual(
+            await next_message(messages), change_message(seq, pk, "delete")
+        )
+
+        run, _ = await self.write(record_sync)
+        self.assertEqual(
+            await next_message(messages),
+            f'event: sync\ndata: {{"run":{run.pk},"status":"succeeded"}}\n\n'.encode(),
+        )
+
+    async def test_reconnecting_clients_receive_what_they_missed(self):
+        _, seen = await self.write(create_character, "Leia Organa")
+        han, missed = await self.write(create_character, "Han Solo")
+        messages = await self.open(**{"Last-Event-ID": str(seen)})
+        self.assertEqual(
+            await next_message(messages), change_message(missed, han.pk, "upsert")
+        )
+
+        luke, seq = await self.write(create_character)
+        self.assertEqual(
+            await next_message(messages), change_message(seq, luke.pk, "upsert")
+        )
+
+    @override_settings(STREAM_HEARTBEAT_SECONDS=0.01)
+    async def test_idle_streams_send_keepalives(self):
+        messages = await self.open()
+        self.assertEqual(await next_message(messages), b": keepalive\n\n")
+
+    async def test_slow_connections_are_closed(self):
+        messages = await self.open()
+        for _ in range(stream.QUEUE_SIZE + 1):
+            stream.publish("sync", {})
+        with self.assertRaises(StopAsyncIteration):
+            while True:
+                self.assertTrue((await next_message(messages)).startswith(b"event"))
+
+    async def test_invalid_event_ids_are_rejected(self):
+        response = await self.async_client.get(
+            reverse("stream"), headers={"Last-Event-ID": "x"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_wsgi_requests_are_refused(self):
+        self.assertEqual(self.client.get(reverse("stream")).status_code, 503)
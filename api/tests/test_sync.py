@@ -0,0 +1,82 @@
+import json
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api.models import Character, SyncRun
+
+CHARACTER = {
+    "name": "Luke Skywalker",
+    "birth_year": "19BBY",
+    "eye_color": "blue",
+    "gender": "male",
+    "hair_color": "blond",
+    "height": "172",
+    "mass": "77",
+    "skin_color": "fair",
+    "homeworld": "https://swapi.dev/api/planets/1/",
+    "species": [],
+    "vehicles": [],
+    "created": "2014-12-09T13:50:51.644000Z",
+    "edited": "2014-12-20T21:17:56.891000Z",
+    "url": "https://swapi.dev/api/people/1/",
+}
+
+
+def fake_swapi(url, *args, **kwargs):
+    """Serves one character and no films or starships."""
+    response = mock.Mock(status_code=200)
+    results = [CHARACTER] if url.endswith("people/") else []
+    response.content = json.dumps({"results": results, "next": None}).encode()
+    response.json.side_effect = lambda: json.loads(response.content)
+    return response
+
+
+@mock.patch(
+    "api.management.commands.fetch_swapi_data.requests.get", side_effect=fake_swapi
+)
+class SyncRunTest(APITestCase):
+    def test_run_is_recorded(self, _):
+        call_command("fetch_swapi_data", stdout=StringIO())
+
+        run = SyncRun.objects.get()
+        self.assertEqual(run.status, "succeeded")
+        self.assertIsNotNone(run.finished)
+        self.assertGreater(run.duration_ms, 0)
+        self.assertEqual(run.http_requests, 3)
+        self.assertGreater(run.sql_queries, 0)
+        self.assertIsNotNone(run.peak_memory_kb)
+        characters = run.phases["characters"]
+        self.assertEqual(characters["http_requests"], 1)
+        self.assertEqual(characters["row_delta"], 1)
+        self.assertGreater(characters["write_ms"], 0)
+        self.assertEqual(set(run.phases), {"characters", "films", "starships"})
+
+    def test_errors_are_recorded(self, _):
+        with mock.patch.object(
+            Character.objects, "update_or_create", side_effect=RuntimeError("boom")
+        ):
+            call_command("fetch_swapi_data", stdout=StringIO(), stderr=StringIO())
+
+        run = SyncRun.objects.get()
+        self.assertEqual(run.status, "failed")
+        self.assertEqual(run.error_count, 1)
+        self.assertIn("boom", run.errors[0])
+
+    def test_endpoint_compares_with_previous_run(self, _):
+        call_command("fetch_swapi_data", stdout=StringIO())
+        call_command("fetch_swapi_data", stdout=StringIO())
+
+        response = self.client.get(reverse("sync-run-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        latest, first = response.data["results"]
+        self.assertEqual(latest["previous_duration_ms"], first["duration_ms"])
+        self.assertIsNone(first["previous_duration_ms"])
+
+        response = self.client.get(reverse("sync-run-list"), {"status": "failed"})
+        self.assertEqual(response.data["count"], 0)
+        response = self.client.get(reverse("sync-run-list"), {"status": "bogus"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,61 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from api.models import Character, Film, StatSummary, Starship
+from api.synthetic import Density, clear, generate
+
+
+class SyntheticDataTest(TestCase):
+    def test_generate_creates_rows_and_relations(self):
+        generate(50, 5, 20, density=Density(cast=(3, 6), fleet=(1, 2), pilots=(1, 1)))
+
+        self.assertEqual(Character.objects.count(), 50)
+        self.assertEqual(Film.objects.count(), 5)
+        self.assertEqual(Starship.objects.count(), 20)
+        for film in Film.objects.all():
+            self.assertTrue(3 <= film.characters.count() <= 6)
+            self.assertTrue(1 <= film.starships.count() <= 2)
+        self.assertEqual(Starship.pilots.through.objects.count(), 20)
+        # Derived data is rebuilt once at the end
+        self.assertEqual(
+            sum(Starship.objects.values_list("pilot_count", flat=True)), 20
+        )
+        self.assertTrue(StatSummary.objects.exists())
+
+    def test_generate_is_reproducible_and_appends(self):
+        generate(10, 2, 5, seed=7)
+        first = list(Film.objects.values_list("characters", flat=True))
+        clear()
+        self.assertFalse(Character.objects.exists())
+
+        generate(10, 2, 5, seed=7)
+        generate(10, 2, 5, seed=7)
+        self.assertEqual(Character.objects.count(), 20)
+        self.assertEqual(Film.objects.count(), 4)
+        self.assertEqual(len(first), Film.characters.through.objects.count() / 2)
+
+    def test_skewed_relations_favor_the_first_rows(self):
+        generate(200, 40, 1, density=Density(cast=(10, 10), skew=1.5))
+        counts = list(
+            Character.objects.order_by("pk").values_list("film_count", flat=True)
+        )
+        self.assertGreater(sum(counts[:20]), sum(counts[-100:]))
+
+    def test_command(self):
+        out = StringIO()
+        call_command(
+            "generate_synthetic_data",
+            "--characters=20",
+            "--films=3",
+            "--starships=4",
+            "--cast=2:3",
+            "--clear",
+            stdout=out,
+        )
+        self.assertEqual(Character.objects.count(), 20)
+        self.assertIn("Successfully generated", out.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command("generate_synthetic_data", "--cast=5:2", stdout=out)
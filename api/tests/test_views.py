@@ -1,7 +1,14 @@
+from unittest import mock
+
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
+from api import graph
 from api.models import Character, Film, Starship
+from api.stats import schedule_refresh, stats_reading
+from api.tasks import refresh_stats_later
+from api.versions import get_version
 
 
 class CharacterViewSetTest(APITestCase):
@@ -36,6 +43,37 @@ class CharacterViewSetTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn("Luke Skywalker", [c["name"] for c in response.json()["results"]])
 
+    def test_character_exposes_piloted_starships(self):
+        starship = Starship.objects.create(
+            name="X-wing",
+            model="T-65 X-wing",
+            manufacturer="Incom Corporation",
+            cost_in_credits="149999",
+            length="12.5",
+            max_atmosphering_speed="1050",
+            crew="1",
+            passengers="0",
+            cargo_capacity="110",
+            consumables="1 week",
+            hyperdrive_rating="1.0",
+            MGLT="100",
+            starship_class="Starfighter",
+            created="2014-12-12T11:19:05.340000Z",
+            edited="2014-12-20T21:17:50.309000Z",
+            url="https://swapi.dev/api/starships/12/",
+        )
+        starship.pilots.add(self.character)
+        url = reverse("character-detail", kwargs={"pk": self.character.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["starships"], [starship.pk])
+
+    def test_order_characters_by_film_count(self):
+        url = reverse("character-list") + "?ordering=-film_count"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("film_count", response.json()["results"][0])
+
     def test_character_not_found(self):
         url = reverse(
             "character-detail", kwargs={"pk": 999}
@@ -138,3 +176,157 @@ class StarshipViewSetTest(APITestCase):
         invalid_data = {"name": ""}  # Name should not be empty
         response = self.client.post(url, invalid_data)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class StatsViewTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Populate database with characters so the gender stat has buckets
+        for name, gender in [("Leia Organa", "female"), ("Luke Skywalker", "male")]:
+            cls.create_character(name, gender)
+
+    @classmethod
+    def create_character(cls, name, gender):
+        with cls.captureOnCommitCallbacks(execute=True):
+            return Character.objects.create(
+                name=name,
+                birth_year="19BBY",
+                eye_color="brown",
+                gender=gender,
+                hair_color="brown",
+                height="150",
+                mass="49",
+                skin_color="light",
+                homeworld="https://swapi.dev/api/planets/2/",
+                species=[],
+                vehicles=[],
+                created="2014-12-09T13:50:51.644000Z",
+                edited="2014-12-20T21:17:56.891000Z",
+                url="https://swapi.dev/api/people/5/",
+            )
+
+    def test_list_stats(self):
+        response = self.client.get(reverse("stats-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("gender-distribution", response.json())
+
+    def test_gender_distribution_is_refreshed_on_write(self):
+        url = reverse("stats-detail", kwargs={"kind": "gender-distribution"})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted((r["key"], r["value"]) for r in response.json()["results"]),
+            [("female", 1), ("male", 1)],
+        )
+
+    def test_only_stats_reading_the_model_are_refreshed_after_commit(self):
+        with mock.patch("api.signals.schedule_refresh") as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                Character.objects.filter(name="Leia Organa").get().save()
+                refresh.assert_not_called()
+        refresh.assert_called_once_with({"gender-distribution"})
+        self.assertEqual(
+            stats_reading(Character, deleted=True),
+            {"gender-distribution", "characters-per-film", "pilots-per-starship-class"},
+        )
+
+    @override_settings(STATS_REFRESH_DELAY=10)
+    def test_refreshes_are_coalesced_into_one_task(self):
+        with mock.patch("api.tasks.refresh_stats_later.apply_async") as apply_async:
+            schedule_refresh({"gender-distribution"})
+            schedule_refresh({"gender-distribution", "films-per-director"})
+        self.assertEqual(
+            apply_async.call_args_list,
+            [
+                mock.call((["gender-distribution"],), countdown=10),
+                mock.call((["films-per-director"],), countdown=10),
+            ],
+        )
+        refresh_stats_later(["gender-distribution"])
+        with mock.patch("api.tasks.refresh_stats_later.apply_async") as apply_async:
+            schedule_refresh({"gender-distribution"})
+        apply_async.assert_called_once()
+
+    def test_unknown_stat(self):
+        url = reverse("stats-detail", kwargs={"kind": "midichlorians"})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class GraphViewTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Luke and Leia share one film, Han and Leia another
+        cls.luke, cls.leia, cls.han = [
+            Character.objects.create(
+                name=name,
+                birth_year="19BBY",
+                eye_color="brown",
+                gender="male",
+                hair_color="brown",
+                height="180",
+                mass="80",
+                skin_color="fair",
+                homeworld="https://swapi.dev/api/planets/1/",
+                species=[],
+                vehicles=[],
+                created="2014-12-09T13:50:51.644000Z",
+                edited="2014-12-20T21:17:56.891000Z",
+                url=f"https://swapi.dev/api/people/{index}/",
+            )
+            for index, name in enumerate(["Luke Skywalker", "Leia Organa", "Han Solo"])
+        ]
+        for episode_id, cast in [(4, [cls.luke, cls.leia]), (5, [cls.leia, cls.han])]:
+            film = Film.objects.create(
+                title=f"Episode {episode_id}",
+                episode_id=episode_id,
+                opening_crawl="...",
+                director="George Lucas",
+                producer="Gary Kurtz",
+                release_date="1977-05-25",
+                planets=[],
+                species=[],
+                vehicles=[],
+                created="2014-12-10T14:23:31.880000Z",
+                edited="2014-12-20T19:49:45.256000Z",
+                url=f"https://swapi.dev/api/films/{episode_id}/",
+            )
+            film.characters.set(cast)
+
+    def test_co_stars(self):
+        url = reverse("graph-co-stars", kwargs={"pk": self.leia.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(c["name"] for c in response.json()["results"]),
+            ["Han Solo", "Luke Skywalker"],
+        )
+
+    def test_degrees_of_separation(self):
+        url = reverse("graph-degrees") + f"?from={self.luke.pk}&to={self.han.pk}"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["degrees"], 2)
+
+    def test_degrees_of_separation_requires_both_characters(self):
+        response = self.client.get(reverse("graph-degrees") + f"?from={self.luke.pk}")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_most_connected(self):
+        response = self.client.get(reverse("graph-most-connected"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"][0]["name"], "Leia Organa")
+
+    def test_writes_are_published_once_committed(self):
+        url = reverse("graph-co-stars", kwargs={"pk": self.leia.pk})
+        self.client.get(url)
+        version = get_version(graph.VERSION_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.han.delete()
+            self.assertEqual(get_version(graph.VERSION_KEY), version)
+        self.assertGreater(get_version(graph.VERSION_KEY), version)
+
+        response = self.client.get(url)
+        self.assertEqual(
+            [c["name"] for c in response.json()["results"]], ["Luke Skywalker"]
+        )
@@ -0,0 +1,114 @@
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from api.models import Film, VoteTally
+from api.votes import flush_votes, get_vote_buffer
+
+
+@override_settings(VOTE_BUFFER_BACKEND="memory")
+class VoteTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.films = [
+            Film.objects.create(
+                title=title,
+                episode_id=episode_id,
+                opening_crawl="...",
+                director="George Lucas",
+                producer="Gary Kurtz",
+                release_date="1977-05-25",
+                planets=[],
+                species=[],
+                vehicles=[],
+                created="2014-12-10T14:23:31.880000Z",
+                edited="2014-12-20T19:49:45.256000Z",
+                url=f"https://swapi.dev/api/films/{episode_id}/",
+            )
+            for episode_id, title in [(4, "A New Hope"), (5, "The Empire Strikes Back")]
+        ]
+
+    def setUp(self):
+        get_vote_buffer().clear()
+        self.clients = {}
+
+    def vote(self, film, client_id, address=None):
+        """Votes as the client `client_id`, which keeps its cookies."""
+        if client_id not in self.clients:
+            self.clients[client_id] = APIClient(
+                REMOTE_ADDR=f"10.0.0.{len(self.clients)}"
+            )
+        url = reverse("film-vote", kwargs={"pk": film.pk})
+        extra = {"REMOTE_ADDR": address} if address else {}
+        return self.clients[client_id].post(url, **extra)
+
+    def test_votes_are_deduplicated_per_client(self):
+        self.assertEqual(self.vote(self.films[0], "a").status_code, status.HTTP_202_ACCEPTED)
+        response = self.vote(self.films[0], "a")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.json()["counted"])
+
+    def test_clients_cannot_choose_their_identity(self):
+        url = reverse("film-vote", kwargs={"pk": self.films[0].pk})
+        self.client.cookies["voter"] = "ip:10.9.9.9"
+        response = self.client.post(url, HTTP_X_CLIENT_ID="a")
+        self.assertTrue(response.json()["counted"])
+        self.client.cookies.clear()
+        response = self.client.post(url, HTTP_X_CLIENT_ID="b")
+        self.assertFalse(response.json()["counted"])
+
+    def test_the_voter_cookie_outlives_address_changes(self):
+        self.vote(self.films[0], "a")
+        response = self.vote(self.films[0], "a", address="10.1.1.1")
+        self.assertFalse(response.json()["counted"])
+        response = self.vote(self.films[0], "b", address="10.1.1.1")
+        self.assertTrue(response.json()["counted"])
+
+    def test_vote_for_missing_object(self):
+        response = self.client.post(reverse("film-vote", kwargs={"pk": 999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_flush_persists_buffered_votes(self):
+        for client_id in ("a", "b", "c"):
+            self.vote(self.films[1], client_id)
+        self.assertFalse(VoteTally.objects.exists())
+        self.assertEqual(flush_votes(), 3)
+        self.vote(self.films[1], "d")
+        self.assertEqual(flush_votes(), 1)
+        tally = VoteTally.objects.get(kind="film", object_id=self.films[1].pk)
+        self.assertEqual(tally.votes, 4)
+
+    def test_overlapping_flushes_do_not_double_count(self):
+        self.vote(self.films[1], "a")
+        buffer = get_vote_buffer()
+        token = buffer.lock_flush(60)
+        self.assertEqual(flush_votes(), 0)
+        buffer.unlock_flush(token)
+        self.assertEqual(flush_votes(), 1)
+        self.assertEqual(flush_votes(), 0)
+        tally = VoteTally.objects.get(kind="film", object_id=self.films[1].pk)
+        self.assertEqual(tally.votes, 1)
+
+    def test_leaderboard_includes_unflushed_votes(self):
+        self.vote(self.films[0], "a")
+        for client_id in ("a", "b"):
+            self.vote(self.films[1], client_id)
+        flush_votes()
+        self.vote(self.films[0], "b")
+        self.vote(self.films[0], "c")
+        response = self.client.get(reverse("leaderboard", kwargs={"kind": "film"}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(r["name"], r["votes"]) for r in response.json()["results"]],
+            [("A New Hope", 3), ("The Empire Strikes Back", 2)],
+        )
+
+    def test_leaderboard_is_seeded_from_tallies(self):
+        VoteTally.objects.create(kind="film", object_id=self.films[0].pk, votes=7)
+        self.vote(self.films[0], "a")
+        response = self.client.get(reverse("leaderboard", kwargs={"kind": "film"}))
+        self.assertEqual(response.json()["results"][0]["votes"], 8)
+
+    def test_unknown_leaderboard(self):
+        response = self.client.get(reverse("leaderboard", kwargs={"kind": "planet"}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
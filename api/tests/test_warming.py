@@ -0,0 +1,109 @@
+import json
+from io import StringIO
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from api import tasks, warming
+from api.models import Character
+
+CHARACTER = {
+    "name": "Luke Skywalker",
+    "birth_year": "19BBY",
+    "eye_color": "blue",
+    "gender": "male",
+    "hair_color": "blond",
+    "height": "172",
+    "mass": "77",
+    "skin_color": "fair",
+    "homeworld": "https://swapi.dev/api/planets/1/",
+    "species": [],
+    "vehicles": [],
+    "created": "2014-12-09T13:50:51.644000Z",
+    "edited": "2014-12-20T21:17:56.891000Z",
+    "url": "https://swapi.dev/api/people/1/",
+}
+
+
+@override_settings(ACCESS_STATS_BACKEND="memory", ACCESS_STATS_SAMPLE_RATE=1)
+class CacheWarmingTest(TestCase):
+    def setUp(self):
+        self.stats = warming.get_access_stats()
+        self.stats.clear()
+        Character.objects.create(**CHARACTER)
+
+    def test_reads_are_counted_per_signature(self):
+        url = reverse("character-list")
+        self.client.get(url, {"search": "Luke", "page": "1", "profile": "cpu"})
+        self.client.get(url, {"page": "1", "search": "Luke"})
+        self.client.get(reverse("character-detail", args=[999]))
+        self.client.get(reverse("sync-run-list"))
+
+        self.assertEqual(
+            self.stats.top(10), [("/api/characters/?page=1&search=Luke", 2)]
+        )
+
+    def test_unsampled_reads_are_not_counted(self):
+        with override_settings(ACCESS_STATS_SAMPLE_RATE=0):
+            self.client.get(reverse("character-list"))
+        self.assertEqual(self.stats.top(10), [])
+
+    @mock.patch.object(warming, "SIGNATURE_TRIM_MARGIN", 2)
+    @mock.patch.object(warming, "MAX_SIGNATURES", 3)
+    def test_new_signatures_survive_until_the_margin_fills(self):
+        for path in ("/a/", "/a/", "/b/", "/b/", "/c/", "/d/", "/e/"):
+            self.stats.record(path)
+        self.assertEqual(len(self.stats.top(10)), 5)
+
+        self.stats.record("/f/")
+        self.assertEqual(
+            [path for path, _ in self.stats.top(10)][:2], ["/a/", "/b/"]
+        )
+        self.assertEqual(len(self.stats.top(10)), 3)
+
+    def test_replaying_fills_the_count_cache(self):
+        url = f"{reverse('character-list')}?search=Luke"
+        self.stats.record(url)
+        self.stats.record("/api/no-such-page/")
+
+        self.assertEqual(warming.warm_caches(), {"default": 2})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.data["count"], 1)
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries))
+
+    def test_replicas_behind_the_primary_are_skipped(self):
+        self.stats.record(reverse("character-list"))
+        seqs = {"default": 5, "replica1": 4, "replica2": 5}
+        with mock.patch.object(
+            warming.changes, "last_seq", side_effect=lambda using: seqs[using]
+        ), mock.patch.object(warming, "_replay", return_value=200) as replay:
+            warmed = warming.warm_caches(aliases=["replica1", "replica2"])
+
+        self.assertEqual(warmed, {"replica1": None, "replica2": 1})
+        replay.assert_called_once()
+
+    def test_successful_syncs_schedule_warming(self):
+        def fake_swapi(url, *args, **kwargs):
+            results = [CHARACTER] if url.endswith("people/") else []
+            response = mock.Mock(status_code=200)
+            response.content = json.dumps({"results": results, "next": None}).encode()
+            response.json.side_effect = lambda: json.loads(response.content)
+            return response
+
+        with mock.patch(
+            "api.management.commands.fetch_swapi_data.requests.get",
+            side_effect=fake_swapi,
+        ), mock.patch.object(tasks.warm_caches_after_sync, "delay") as delay:
+            tasks.fetch_swapi_data_periodically()
+            delay.assert_called_once_with()
+
+            with mock.patch(
+                "api.management.commands.fetch_swapi_data.Character.objects"
+                ".update_or_create",
+                side_effect=RuntimeError("boom"),
+            ), mock.patch("sys.stderr", StringIO()):
+                tasks.fetch_swapi_data_periodically()
+            delay.assert_called_once_with()
@@ -1,13 +1,52 @@
 from rest_framework.routers import DefaultRouter
 from django.urls import path, include
 
-from .views import CharacterViewSet, FilmViewSet, StarshipViewSet
+from .views import (
+    AutocompleteView,
+    ChangeFeedView,
+    CharacterViewSet,
+    CoStarsView,
+    DegreesOfSeparationView,
+    FilmViewSet,
+    LeaderboardView,
+    MostConnectedView,
+    StarshipViewSet,
+    StatsView,
+    SyncRunViewSet,
+    stream_events,
+)
 
 router = DefaultRouter()
 router.register(r"characters", CharacterViewSet)
 router.register(r"films", FilmViewSet)
 router.register(r"starships", StarshipViewSet)
+router.register(r"sync-runs", SyncRunViewSet, basename="sync-run")
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path("changes/", ChangeFeedView.as_view(), name="changes"),
+    path("stream/", stream_events, name="stream"),
+    path("stats/", StatsView.as_view(), name="stats-list"),
+    path("stats/<str:kind>/", StatsView.as_view(), name="stats-detail"),
+    path(
+        "leaderboard/<str:kind>/",
+        LeaderboardView.as_view(),
+        name="leaderboard",
+    ),
+    path(
+        "graph/characters/<int:pk>/co-stars/",
+        CoStarsView.as_view(),
+        name="graph-co-stars",
+    ),
+    path(
+        "graph/degrees/",
+        DegreesOfSeparationView.as_view(),
+        name="graph-degrees",
+    ),
+    path(
+        "graph/most-connected/",
+        MostConnectedView.as_view(),
+        name="graph-most-connected",
+    ),
 ]
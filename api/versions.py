@@ -0,0 +1,47 @@
+"""
+Shared version counters for in-process indexes.
+
+Some read paths are served from indexes built inside each worker process. When
+the underlying data changes, the writer bumps a named counter in the shared
+cache; every worker compares it with the version its index was built from and
+rebuilds when they differ.
+
+Functions:
+    get_version: Returns the current value of a named counter.
+    get_versions: Returns the current values of several counters at once.
+    bump_version: Increments a named counter and returns the new value.
+    table_version_name: Returns the name of the counter of a model's table.
+"""
+
+from django.core.cache import cache
+
+KEY_PREFIX = "data-version:"
+
+
+def get_version(name):
+    """Returns the current value of the counter `name`, starting at 0."""
+    return cache.get_or_set(f"{KEY_PREFIX}{name}", 0, timeout=None)
+
+
+def get_versions(names):
+    """Returns a dict of the current values of the counters `names`, in one read."""
+    keys = {f"{KEY_PREFIX}{name}": name for name in names}
+    found = cache.get_many(keys)
+    return {name: found.get(key, 0) for key, name in keys.items()}
+
+
+def bump_version(name):
+    """Increments the counter `name` and returns its new value."""
+    key = f"{KEY_PREFIX}{name}"
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # The key was evicted between add() and incr(); start over from 1.
+        cache.set(key, 1, timeout=None)
+        return 1
+
+
+def table_version_name(model):
+    """Returns the name of the counter bumped after writes to `model`'s table."""
+    return f"table:{model._meta.label_lower}"
@@ -7,24 +7,60 @@ and detailed exception handling.
 
 Classes:
     StandardResultsSetPagination: Configures pagination settings for API responses.
+    ReplicaReadMixin: Serves a viewset's safe requests from a read replica.
+    BatchedWriteMixin: Renders the documents touched by a write once.
+    VoteMixin: Adds a buffered `vote` action to a viewset.
     CharacterViewSet: API viewset to manage `Character` resources with custom error handling.
     FilmViewSet: API viewset to manage `Film` resources with custom error handling.
     StarshipViewSet: API viewset to manage `Starship` resources with custom error handling.
+    StatsView: API view exposing precomputed aggregate statistics.
+    CoStarsView: API view listing the characters who shared a film with one.
+    DegreesOfSeparationView: API view finding a chain of shared films between two characters.
+    MostConnectedView: API view ranking characters by number of co-stars.
+    LeaderboardView: API view listing the most voted characters, films or starships.
+    AutocompleteView: API view suggesting characters, films and starships by prefix.
+    ChangeFeedView: API view listing the changes since a change log sequence number.
+    SyncRunViewSet: Read-only API viewset exposing the `fetch_swapi_data` run history.
+
+Functions:
+    stream_events: Streams data changes as server-sent events.
 """
 
-from rest_framework import viewsets, filters
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.exceptions import APIException, ValidationError
+import json
+
+from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, NotFound, ValidationError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.views import APIView
+from django.db.models import F, Window
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.db.models.functions import Lag
 from django.shortcuts import get_object_or_404
-from .models import Character, Film, Starship
-from .serializers import CharacterSerializer, FilmSerializer, StarshipSerializer
-
-
-class StandardResultsSetPagination(PageNumberPagination):
+from core.db import replicas
+from . import autocomplete, changes, documents, graph, stream, votes
+from .pagination import ApproximateCountPagination
+from .models import Character, Film, Starship, SyncRun
+from .signals import batched_writes
+from .serializers import (
+    CharacterSerializer,
+    FilmSerializer,
+    StarshipSerializer,
+    SyncRunSerializer,
+)
+from .stats import STATS, get_stat
+
+
+class StandardResultsSetPagination(ApproximateCountPagination):
     """
     Configures pagination settings for API responses.
 
+    ``count`` may be an estimate on large tables, as flagged by
+    ``count_is_approximate``; see :mod:`api.pagination`.
+
     Attributes:
         page_size (int): Default number of records to display per page.
         page_size_query_param (str): Parameter to customize the page size in requests.
@@ -36,30 +72,157 @@ class StandardResultsSetPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class CharacterViewSet(viewsets.ModelViewSet):
+# Signed cookie keeping the identity an anonymous client first voted under
+VOTER_COOKIE = "voter"
+VOTER_COOKIE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def _client_id(request):
+    """
+    Identify the client casting a vote.
+
+    Authenticated users are identified by their user ID. Anonymous clients are
+    identified by their IP address, which their first vote stores in a signed
+    `voter` cookie so that it stays theirs when their address changes. Clients
+    cannot choose an identity: without a valid cookie they fall back to their
+    IP address.
+    """
+    if request.user and request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    client_id = request.get_signed_cookie(VOTER_COOKIE, default=None, salt=VOTER_COOKIE)
+    return client_id or f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+def _document_response(request, kind, pk):
+    """
+    Serve a detail read from the document pre-rendered by :mod:`api.documents`.
+
+    :return: The stored JSON, or None if the client asked for another format or
+        no document is stored, in which case the view serializes the object.
+    """
+    if not isinstance(request.accepted_renderer, JSONRenderer) or (
+        "indent" in request.accepted_media_type
+    ):
+        return None
+    body = documents.get_document(kind, pk)
+    if body is None:
+        return None
+    return HttpResponse(body, content_type=request.accepted_renderer.media_type)
+
+
+class ReplicaReadMixin:
+    """
+    Serves a viewset's safe requests from a read replica.
+
+    Clients that wrote within ``REPLICA_STICKY_SECONDS`` keep reading from the
+    primary, see :mod:`core.db.replicas`.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with replicas.read_from_replica(request):
+            return super().dispatch(request, *args, **kwargs)
+
+
+class BatchedWriteMixin:
+    """
+    Renders the documents touched by a write once.
+
+    Creates, updates and deletes run in :func:`api.signals.batched_writes`, so
+    saving a row and then its relations re-renders each document once and logs
+    the changes in a single insert.
+    """
+
+    def perform_create(self, serializer):
+        with batched_writes():
+            super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        with batched_writes():
+            super().perform_update(serializer)
+
+    def perform_destroy(self, instance):
+        with batched_writes():
+            super().perform_destroy(instance)
+
+
+class VoteMixin:
+    """
+    Adds a `vote` action to a viewset.
+
+    Votes go into the vote buffer from :mod:`api.votes` and are flushed to the
+    database in batches, so voting never waits on a row lock.
+
+    Attributes:
+        vote_kind (str): The kind under which the viewset's objects are voted.
+    """
+
+    vote_kind = None
+
+    @action(detail=True, methods=["post"])
+    def vote(self, request, pk=None):
+        """
+        Vote for an object. Each client is counted once per object.
+
+        :raises NotFound: If the object does not exist.
+        :return: HTTP 202 if the vote was counted, HTTP 200 if the client had
+            already voted for the object.
+        """
+        model = self.get_queryset().model
+        if not str(pk).isdigit() or not model.objects.filter(pk=pk).exists():
+            raise NotFound(f"{model.__name__} {pk} does not exist.")
+        client_id = _client_id(request)
+        counted = votes.record_vote(self.vote_kind, int(pk), client_id)
+        response = Response(
+            {"counted": counted},
+            status=status.HTTP_202_ACCEPTED if counted else status.HTTP_200_OK,
+        )
+        if client_id.startswith("ip:"):
+            response.set_signed_cookie(
+                VOTER_COOKIE,
+                client_id,
+                salt=VOTER_COOKIE,
+                max_age=VOTER_COOKIE_MAX_AGE,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class CharacterViewSet(
+    ReplicaReadMixin, BatchedWriteMixin, VoteMixin, viewsets.ModelViewSet
+):
     """
     API viewset to manage `Character` resources with custom error handling.
 
     Attributes:
-        queryset (QuerySet): Queryset of all `Character` records.
+        queryset (QuerySet): Queryset of all `Character` records, with their related
+            IDs prefetched so list pages run a fixed number of queries.
         serializer_class (Serializer): Serializer class for Character.
         pagination_class (Pagination): Pagination configuration.
         filter_backends (list): List of filter backends to apply.
         search_fields (list): Fields to apply search filters.
+        ordering_fields (list): Fields accepted by the `ordering` query parameter.
+        vote_kind (str): Kind under which characters are voted.
     """
 
-    queryset = Character.objects.all()
+    queryset = Character.objects.prefetch_related("starships")
     serializer_class = CharacterSerializer
     pagination_class = StandardResultsSetPagination
-    filter_backends = [filters.SearchFilter]
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ["name"]
+    ordering_fields = ["name", "film_count", "starship_count"]
+    vote_kind = "character"
 
     def retrieve(self, request, *args, **kwargs):
         """
         Retrieve a single character by ID.
 
-        :return: Serialized data of a single Character object.
+        :return: The pre-rendered document, or serialized data of a single
+            Character object.
         """
+        response = _document_response(request, "character", kwargs["pk"])
+        if response is not None:
+            return response
         obj = get_object_or_404(Character, pk=kwargs["pk"])
         serializer = self.get_serializer(obj)
         return Response(serializer.data)
@@ -73,7 +236,7 @@ class CharacterViewSet(viewsets.ModelViewSet):
         obj = get_object_or_404(Character, pk=kwargs["pk"])
         serializer = self.get_serializer(obj, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        self.perform_update(serializer)
         return Response(serializer.data)
 
     def destroy(self, request, *args, **kwargs):
@@ -83,7 +246,7 @@ class CharacterViewSet(viewsets.ModelViewSet):
         :return: HTTP 204 status code upon successful deletion.
         """
         obj = get_object_or_404(Character, pk=kwargs["pk"])
-        obj.delete()
+        self.perform_destroy(obj)
         return Response(status=204)
 
     def create(self, request, *args, **kwargs):
@@ -104,30 +267,39 @@ class CharacterViewSet(viewsets.ModelViewSet):
             )
 
 
-class FilmViewSet(viewsets.ModelViewSet):
+class FilmViewSet(
+    ReplicaReadMixin, BatchedWriteMixin, VoteMixin, viewsets.ModelViewSet
+):
     """
     API viewset to manage `Film` resources with custom error handling.
 
     Attributes:
-        queryset (QuerySet): Queryset of all `Film` records.
+        queryset (QuerySet): Queryset of all `Film` records, with their related
+            IDs prefetched so list pages run a fixed number of queries.
         serializer_class (Serializer): Serializer class for Film.
         pagination_class (Pagination): Pagination configuration.
         filter_backends (list): List of filter backends to apply.
         search_fields (list): Fields to apply search filters.
+        vote_kind (str): Kind under which films are voted.
     """
 
-    queryset = Film.objects.all()
+    queryset = Film.objects.prefetch_related("characters", "starships")
     serializer_class = FilmSerializer
     pagination_class = StandardResultsSetPagination
     filter_backends = [filters.SearchFilter]
     search_fields = ["title"]
+    vote_kind = "film"
 
     def retrieve(self, request, *args, **kwargs):
         """
         Retrieve a single film by ID.
 
-        :return: Serialized data of a single Film object.
+        :return: The pre-rendered document, or serialized data of a single
+            Film object.
         """
+        response = _document_response(request, "film", kwargs["pk"])
+        if response is not None:
+            return response
         obj = get_object_or_404(Film, pk=kwargs["pk"])
         serializer = self.get_serializer(obj)
         return Response(serializer.data)
@@ -141,7 +313,7 @@ class FilmViewSet(viewsets.ModelViewSet):
         obj = get_object_or_404(Film, pk=kwargs["pk"])
         serializer = self.get_serializer(obj, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        self.perform_update(serializer)
         return Response(serializer.data)
 
     def destroy(self, request, *args, **kwargs):
@@ -151,7 +323,7 @@ class FilmViewSet(viewsets.ModelViewSet):
         :return: HTTP 204 status code upon successful deletion.
         """
         obj = get_object_or_404(Film, pk=kwargs["pk"])
-        obj.delete()
+        self.perform_destroy(obj)
         return Response(status=204)
 
     def create(self, request, *args, **kwargs):
@@ -170,30 +342,41 @@ class FilmViewSet(viewsets.ModelViewSet):
             raise APIException(f"An error occurred while creating the film: {str(e)}")
 
 
-class StarshipViewSet(viewsets.ModelViewSet):
+class StarshipViewSet(
+    ReplicaReadMixin, BatchedWriteMixin, VoteMixin, viewsets.ModelViewSet
+):
     """
     API viewset to manage `Starship` resources with custom error handling.
 
     Attributes:
-        queryset (QuerySet): Queryset of all `Starship` records.
+        queryset (QuerySet): Queryset of all `Starship` records, with their related
+            IDs prefetched so list pages run a fixed number of queries.
         serializer_class (Serializer): Serializer class for Starship.
         pagination_class (Pagination): Pagination configuration.
         filter_backends (list): List of filter backends to apply.
         search_fields (list): Fields to apply search filters.
+        ordering_fields (list): Fields accepted by the `ordering` query parameter.
+        vote_kind (str): Kind under which starships are voted.
     """
 
-    queryset = Starship.objects.all()
+    queryset = Starship.objects.prefetch_related("pilots")
     serializer_class = StarshipSerializer
     pagination_class = StandardResultsSetPagination
-    filter_backends = [filters.SearchFilter]
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ["name"]
+    ordering_fields = ["name", "pilot_count"]
+    vote_kind = "starship"
 
     def retrieve(self, request, *args, **kwargs):
         """
         Retrieve a single starship by ID.
 
-        :return: Serialized data of a single Starship object.
+        :return: The pre-rendered document, or serialized data of a single
+            Starship object.
         """
+        response = _document_response(request, "starship", kwargs["pk"])
+        if response is not None:
+            return response
         obj = get_object_or_404(Starship, pk=kwargs["pk"])
         serializer = self.get_serializer(obj)
         return Response(serializer.data)
@@ -207,7 +390,7 @@ class StarshipViewSet(viewsets.ModelViewSet):
         obj = get_object_or_404(Starship, pk=kwargs["pk"])
         serializer = self.get_serializer(obj, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        self.perform_update(serializer)
         return Response(serializer.data)
 
     def destroy(self, request, *args, **kwargs):
@@ -217,7 +400,7 @@ class StarshipViewSet(viewsets.ModelViewSet):
         :return: HTTP 204 status code upon successful deletion.
         """
         obj = get_object_or_404(Starship, pk=kwargs["pk"])
-        obj.delete()
+        self.perform_destroy(obj)
         return Response(status=204)
 
     def create(self, request, *args, **kwargs):
@@ -236,3 +419,385 @@ class StarshipViewSet(viewsets.ModelViewSet):
             raise APIException(
                 f"An error occurred while creating the starship: {str(e)}"
             )
+
+
+class StatsView(APIView):
+    """
+    API view exposing precomputed aggregate statistics.
+
+    Statistics are read from summary rows maintained by :mod:`api.stats`, so a
+    request costs one indexed lookup regardless of the size of the dataset.
+    """
+
+    def get(self, request, kind=None, format=None):
+        """
+        List the available statistics, or return the buckets of one of them.
+
+        :raises NotFound: If the requested statistic does not exist.
+        :return: Statistic names with their URLs, or the buckets of `kind`.
+        """
+        if kind is None:
+            return Response(
+                {
+                    name: reverse(
+                        "stats-detail", kwargs={"kind": name}, request=request
+                    )
+                    for name in STATS
+                }
+            )
+        try:
+            results = get_stat(kind)
+        except KeyError:
+            raise NotFound(f"Unknown statistic '{kind}'.")
+        return Response({"kind": kind, "results": results})
+
+
+def _character_names(character_ids):
+    """Returns a mapping of character primary keys to names."""
+    return dict(
+        Character.objects.filter(pk__in=character_ids).values_list("pk", "name")
+    )
+
+
+def _character_id_param(request, name):
+    """
+    Read a required character primary key from the query string.
+
+    :raises ValidationError: If the parameter is missing or not an integer.
+    :raises NotFound: If no character has that primary key.
+    """
+    try:
+        character_id = int(request.query_params[name])
+    except (KeyError, ValueError):
+        raise ValidationError({name: "A character ID is required."})
+    if not Character.objects.filter(pk=character_id).exists():
+        raise NotFound(f"Character {character_id} does not exist.")
+    return character_id
+
+
+class CoStarsView(APIView):
+    """
+    API view listing the characters who shared a film with one.
+
+    Served from the in-process co-appearance graph in :mod:`api.graph`.
+    """
+
+    def get(self, request, pk, format=None):
+        """
+        List the co-stars of a character.
+
+        :raises NotFound: If the character does not exist.
+        :return: The co-stars ordered by ID.
+        """
+        character = get_object_or_404(Character, pk=pk)
+        co_stars = graph.get_graph().co_stars(character.pk)
+        names = _character_names(co_stars)
+        return Response(
+            {
+                "character": character.pk,
+                "count": len(co_stars),
+                "results": [{"id": pk, "name": names.get(pk)} for pk in co_stars],
+            }
+        )
+
+
+class DegreesOfSeparationView(APIView):
+    """
+    API view finding a chain of shared films between two characters.
+
+    Query parameters `from` and `to` take character IDs. The chain is found with
+    a bidirectional breadth-first search over the co-appearance graph.
+    """
+
+    def get(self, request, format=None):
+        """
+        Find a shortest chain of shared films between two characters.
+
+        :raises ValidationError: If `from` or `to` is missing or invalid.
+        :raises NotFound: If either character does not exist.
+        :return: The degrees of separation and the chain, or nulls when the
+            characters are not connected.
+        """
+        source = _character_id_param(request, "from")
+        target = _character_id_param(request, "to")
+        path = graph.get_graph().shortest_path(source, target)
+        if path is None:
+            return Response({"from": source, "to": target, "degrees": None, "path": None})
+        names = _character_names([pk for pk, _ in path])
+        return Response(
+            {
+                "from": source,
+                "to": target,
+                "degrees": len(path) - 1,
+                "path": [
+                    {"id": pk, "name": names.get(pk), "via_film": film}
+                    for pk, film in path
+                ],
+            }
+        )
+
+
+class MostConnectedView(APIView):
+    """
+    API view ranking characters by number of distinct co-stars.
+
+    The optional `limit` query parameter caps the number of results (default 10,
+    maximum 100).
+    """
+
+    def get(self, request, format=None):
+        """
+        List the most connected characters.
+
+        :raises ValidationError: If `limit` is not a positive integer.
+        :return: Characters with their number of co-stars, best first.
+        """
+        try:
+            limit = min(int(request.query_params.get("limit", 10)), 100)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            raise ValidationError({"limit": "Must be a positive integer."})
+        ranked = graph.get_graph().most_connected(limit)
+        names = _character_names([pk for pk, _ in ranked])
+        return Response(
+            {
+                "results": [
+                    {"id": pk, "name": names.get(pk), "connections": connections}
+                    for pk, connections in ranked
+                ]
+            }
+        )
+
+
+class LeaderboardView(APIView):
+    """
+    API view listing the most voted characters, films or starships.
+
+    Served from the vote buffer's sorted set, so it includes votes that have not
+    been flushed to the database yet and never sorts the tallies table. The
+    optional `limit` query parameter caps the results (default 10, maximum 100).
+    """
+
+    def get(self, request, kind, format=None):
+        """
+        List the most voted objects of a kind.
+
+        :raises NotFound: If `kind` is not votable.
+        :raises ValidationError: If `limit` is not a positive integer.
+        :return: Objects with their vote counts, most voted first.
+        """
+        model = votes.VOTABLE_MODELS.get(kind)
+        if model is None:
+            raise NotFound(f"Unknown leaderboard '{kind}'.")
+        try:
+            limit = min(int(request.query_params.get("limit", 10)), 100)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            raise ValidationError({"limit": "Must be a positive integer."})
+        ranked = votes.leaderboard(kind, limit)
+        objects = model.objects.in_bulk([pk for pk, _ in ranked])
+        return Response(
+            {
+                "kind": kind,
+                "results": [
+                    {"id": pk, "name": str(objects[pk]), "votes": count}
+                    for pk, count in ranked
+                    if pk in objects
+                ],
+            }
+        )
+
+
+class AutocompleteView(APIView):
+    """
+    API view suggesting characters, films and starships as a name is typed.
+
+    Served from the in-process prefix index in :mod:`api.autocomplete`, without
+    querying the database. Query parameters: `q`, the text typed so far; `kind`,
+    to restrict the suggestions to `character`, `film` or `starship`; and
+    `limit` (default 10, maximum 50).
+    """
+
+    def get(self, request, format=None):
+        """
+        Suggest the objects whose name, title or model starts with `q`.
+
+        :raises ValidationError: If `kind` is unknown or `limit` is not a
+            positive integer.
+        :return: The suggestions, best first.
+        """
+        query = request.query_params.get("q", "")
+        kind = request.query_params.get("kind")
+        if kind is not None and kind not in autocomplete.INDEXED_FIELDS:
+            raise ValidationError(
+                {"kind": f"Must be one of {', '.join(autocomplete.INDEXED_FIELDS)}."}
+            )
+        try:
+            limit = min(int(request.query_params.get("limit", 10)), 50)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            raise ValidationError({"limit": "Must be a positive integer."})
+        results = autocomplete.suggest(
+            query, kinds=[kind] if kind else None, limit=limit
+        )
+        return Response({"query": query, "results": results})
+
+
+class ChangeFeedView(APIView):
+    """
+    API view listing the changes to characters, films and starships in order.
+
+    Served from the change log in :mod:`api.changes` with keyset pagination:
+    clients pass the `last_seq` of their previous response as `since`. Upserts
+    carry the current document of the object, deletions are tombstones. The
+    optional `limit` query parameter caps the changes per response (default
+    500, maximum 1000).
+    """
+
+    def get(self, request, format=None):
+        """
+        List the changes after a sequence number.
+
+        :raises ValidationError: If `since` or `limit` is not a valid integer.
+        :return: The changes in order, the `last_seq` to resume from and the
+            `next` page, or HTTP 410 if tombstones after `since` were dropped.
+        """
+        try:
+            since = int(request.query_params.get("since", 0))
+            if since < 0:
+                raise ValueError
+        except ValueError:
+            raise ValidationError({"since": "Must be a non-negative integer."})
+        try:
+            limit = min(int(request.query_params.get("limit", 500)), 1000)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            raise ValidationError({"limit": "Must be a positive integer."})
+        horizon = changes.horizon()
+        if 0 < since < horizon:
+            return Response(
+                {
+                    "detail": "Changes after this sequence number were compacted; "
+                    "mirror again from since=0.",
+                    "horizon": horizon,
+                },
+                status=status.HTTP_410_GONE,
+            )
+
+        entries = changes.changes_since(since, limit + 1)
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+        bodies = {
+            kind: documents.get_documents(
+                kind, [e.object_id for e in entries if e.kind == kind and not e.deleted]
+            )
+            for kind in {entry.kind for entry in entries}
+        }
+        results = []
+        for entry in entries:
+            data = None
+            if not entry.deleted:
+                body = bodies[entry.kind].get(entry.object_id)
+                if body is None:
+                    # Deleted since; its tombstone follows later in the log.
+                    continue
+                data = json.loads(body)
+            results.append(
+                {
+                    "seq": entry.seq,
+                    "kind": entry.kind,
+                    "id": entry.object_id,
+                    "action": "delete" if entry.deleted else "upsert",
+                    "data": data,
+                }
+            )
+        last_seq = entries[-1].seq if entries else since
+        next_url = None
+        if has_more:
+            next_url = reverse("changes", request=request) + (
+                f"?since={last_seq}&limit={limit}"
+            )
+        return Response({"last_seq": last_seq, "next": next_url, "results": results})
+
+
+async def stream_events(request):
+    """
+    Stream data changes as server-sent events, see :mod:`api.stream`.
+
+    Only served on the ASGI entry point: a WSGI worker would be tied up for the
+    whole life of the connection.
+
+    :return: A `text/event-stream` response resuming after `Last-Event-ID` (or
+        the `last_event_id` query parameter), HTTP 400 if that is not a sequence
+        number, or HTTP 503 under WSGI.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"detail": "The event stream is only served over ASGI."}, status=503
+        )
+    last_event_id = request.headers.get("Last-Event-ID") or request.GET.get(
+        "last_event_id"
+    )
+    if last_event_id is not None:
+        if not last_event_id.isdigit():
+            return JsonResponse(
+                {"last_event_id": "Must be a sequence number."}, status=400
+            )
+        last_event_id = int(last_event_id)
+    response = StreamingHttpResponse(
+        stream.event_stream(last_event_id), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # Keeps nginx from buffering the events
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+class SyncRunViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Read-only API viewset exposing the `fetch_swapi_data` run history.
+
+    Every run carries `previous_duration_ms`, the duration of the run before it
+    with the same `limit`, so slow syncs stand out. The optional `status` query
+    parameter filters the runs; the comparison is then made among those runs.
+
+    Attributes:
+        queryset (QuerySet): Queryset of all `SyncRun` records, newest first.
+        serializer_class (Serializer): Serializer class for SyncRun.
+        pagination_class (Pagination): Pagination configuration.
+        filter_backends (list): List of filter backends to apply.
+        ordering_fields (list): Fields accepted by the `ordering` query parameter.
+    """
+
+    queryset = SyncRun.objects.all()
+    serializer_class = SyncRunSerializer
+    pagination_class = StandardResultsSetPagination
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ["started", "duration_ms", "sql_queries", "http_requests"]
+
+    def get_queryset(self):
+        """
+        Filter by `status` and annotate the previous run's duration.
+
+        :raises ValidationError: If `status` is not a known status.
+        :return: The annotated queryset.
+        """
+        queryset = super().get_queryset()
+        if getattr(self, "swagger_fake_view", False):
+            return queryset
+        status_filter = self.request.query_params.get("status")
+        if status_filter is not None:
+            if status_filter not in dict(SyncRun.STATUS_CHOICES):
+                raise ValidationError({"status": "Unknown status."})
+            queryset = queryset.filter(status=status_filter)
+        return queryset.annotate(
+            previous_duration_ms=Window(
+                Lag("duration_ms"),
+                partition_by=[F("limit")],
+                order_by=[F("started").asc(), F("pk").asc()],
+            )
+        )
@@ -0,0 +1,352 @@
+"""
+Buffered voting on favorite characters, films and starships.
+
+A vote never touches the database on the request path. It is recorded in a
+vote buffer, which deduplicates votes per client, increments a pending counter
+and updates a leaderboard sorted by score. A periodic Celery task drains the
+pending counters and adds them to :class:`~api.models.VoteTally` rows in one
+batch, so popular items see no row-lock contention however many votes arrive.
+Flushes hold a lock from the drain until the counts are acknowledged, so that
+overlapping runs never add the same counts twice.
+
+The buffer is Redis in deployments and a process-local structure in tests,
+selected by the ``VOTE_BUFFER_BACKEND`` setting (``"redis"`` or ``"memory"``).
+
+Classes:
+    RedisVoteBuffer: Vote buffer shared by all workers through Redis.
+    InMemoryVoteBuffer: Process-local vote buffer for tests and development.
+
+Functions:
+    get_vote_buffer: Returns the configured vote buffer.
+    record_vote: Records a vote from a client.
+    flush_votes: Moves the pending votes into the database.
+    leaderboard: Returns the most voted objects of a kind.
+"""
+
+import threading
+import uuid
+from collections import Counter, defaultdict
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import Character, Film, Starship, VoteTally
+
+VOTABLE_MODELS = {
+    "character": Character,
+    "film": Film,
+    "starship": Starship,
+}
+
+
+class InMemoryVoteBuffer:
+    """Process-local vote buffer with the same interface as :class:`RedisVoteBuffer`."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """Forgets every vote, voter and leaderboard."""
+        with self._lock:
+            self._voters = defaultdict(set)
+            self._pending = Counter()
+            self._flushing = None
+            self._scores = defaultdict(Counter)
+            self._seeded = set()
+            self._flush_token = None
+
+    def lock_flush(self, timeout):
+        """
+        Take the flush lock unless another flush holds it.
+
+        :param timeout: Ignored; the lock lives as long as the process.
+        :return: A token for :meth:`unlock_flush`, or None if the lock is held.
+        """
+        with self._lock:
+            if self._flush_token is not None:
+                return None
+            self._flush_token = uuid.uuid4().hex
+            return self._flush_token
+
+    def unlock_flush(self, token):
+        """Release the flush lock if `token` still holds it."""
+        with self._lock:
+            if self._flush_token == token:
+                self._flush_token = None
+
+    def record(self, kind, object_id, client_id):
+        """
+        Count a vote unless the client already voted for the object.
+
+        :return: True if the vote was counted, False if it was a duplicate.
+        """
+        with self._lock:
+            voters = self._voters[(kind, object_id)]
+            if client_id in voters:
+                return False
+            voters.add(client_id)
+            self._pending[(kind, object_id)] += 1
+            self._scores[kind][object_id] += 1
+            return True
+
+    def drain(self):
+        """
+        Take the pending counts for flushing.
+
+        Counts stay reserved until :meth:`ack` is called, and a later drain
+        returns them again if the previous flush never acknowledged them.
+
+        :return: Mapping of ``(kind, object_id)`` to the number of new votes.
+        """
+        with self._lock:
+            if self._flushing is None:
+                self._flushing, self._pending = self._pending, Counter()
+            return dict(self._flushing)
+
+    def ack(self):
+        """Discard the counts returned by the last :meth:`drain`."""
+        with self._lock:
+            self._flushing = None
+
+    def has_leaderboard(self, kind):
+        """Returns whether the leaderboard of `kind` has been seeded."""
+        return kind in self._seeded
+
+    def seed_leaderboard(self, kind, scores):
+        """
+        Rebuild the leaderboard of `kind` from persisted ``(object_id, votes)``
+        pairs plus the votes that have not been flushed yet.
+        """
+        with self._lock:
+            totals = Counter(dict(scores))
+            for counts in (self._pending, self._flushing or {}):
+                for (voted_kind, object_id), votes in counts.items():
+                    if voted_kind == kind:
+                        totals[object_id] += votes
+            self._scores[kind] = totals
+            self._seeded.add(kind)
+
+    def leaderboard(self, kind, limit):
+        """Returns up to `limit` ``(object_id, votes)`` pairs, most voted first."""
+        return self._scores[kind].most_common(limit)
+
+
+class RedisVoteBuffer:
+    """
+    Vote buffer shared by all workers through Redis.
+
+    Keys:
+        ``votes:voters:<kind>:<id>``: Set of client IDs that voted for an object.
+        ``votes:pending``: Hash of ``<kind>:<id>`` to votes not yet flushed.
+        ``votes:flushing``: The pending hash while it is being flushed.
+        ``votes:flush_lock``: Token of the flush in progress, if any.
+        ``votes:leaderboard:<kind>``: Sorted set of object IDs by total votes.
+    """
+
+    PENDING_KEY = "votes:pending"
+    FLUSHING_KEY = "votes:flushing"
+    FLUSH_LOCK_KEY = "votes:flush_lock"
+
+    # Dedupe, count and rank in a single atomic round trip.
+    RECORD_SCRIPT = """
+    if redis.call('SADD', KEYS[1], ARGV[1]) == 1 then
+        redis.call('HINCRBY', KEYS[2], ARGV[2], 1)
+        redis.call('ZINCRBY', KEYS[3], 1, ARGV[3])
+        return 1
+    end
+    return 0
+    """
+
+    # Release the lock only if it still holds our token, not a later flush's.
+    UNLOCK_SCRIPT = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, url):
+        self._redis = redis.Redis.from_url(url)
+        self._record = self._redis.register_script(self.RECORD_SCRIPT)
+        self._unlock = self._redis.register_script(self.UNLOCK_SCRIPT)
+
+    def lock_flush(self, timeout):
+        """
+        Take the flush lock unless another flush holds it.
+
+        :param timeout: Seconds after which the lock expires, in case its
+            holder dies before releasing it.
+        :return: A token for :meth:`unlock_flush`, or None if the lock is held.
+        """
+        token = uuid.uuid4().hex
+        if self._redis.set(self.FLUSH_LOCK_KEY, token, nx=True, px=timeout * 1000):
+            return token
+        return None
+
+    def unlock_flush(self, token):
+        """Release the flush lock if `token` still holds it."""
+        self._unlock(keys=[self.FLUSH_LOCK_KEY], args=[token])
+
+    @staticmethod
+    def _leaderboard_key(kind):
+        return f"votes:leaderboard:{kind}"
+
+    def record(self, kind, object_id, client_id):
+        """
+        Count a vote unless the client already voted for the object.
+
+        :return: True if the vote was counted, False if it was a duplicate.
+        """
+        return bool(
+            self._record(
+                keys=[
+                    f"votes:voters:{kind}:{object_id}",
+                    self.PENDING_KEY,
+                    self._leaderboard_key(kind),
+                ],
+                args=[client_id, f"{kind}:{object_id}", object_id],
+            )
+        )
+
+    def drain(self):
+        """
+        Take the pending counts for flushing.
+
+        The pending hash is renamed atomically, so votes recorded during the
+        flush go into a fresh hash. A flushing hash left behind by a failed
+        flush is returned again instead of being overwritten.
+
+        :return: Mapping of ``(kind, object_id)`` to the number of new votes.
+        """
+        if not self._redis.exists(self.FLUSHING_KEY):
+            try:
+                self._redis.rename(self.PENDING_KEY, self.FLUSHING_KEY)
+            except redis.ResponseError:
+                # Nothing was voted since the last flush.
+                return {}
+        counts = {}
+        for field, value in self._redis.hgetall(self.FLUSHING_KEY).items():
+            kind, object_id = field.decode().split(":")
+            counts[(kind, int(object_id))] = int(value)
+        return counts
+
+    def ack(self):
+        """Discard the counts returned by the last :meth:`drain`."""
+        self._redis.delete(self.FLUSHING_KEY)
+
+    def has_leaderboard(self, kind):
+        """Returns whether the leaderboard of `kind` has been seeded."""
+        return bool(self._redis.exists(f"{self._leaderboard_key(kind)}:seeded"))
+
+    def seed_leaderboard(self, kind, scores):
+        """
+        Rebuild the leaderboard of `kind` from persisted ``(object_id, votes)``
+        pairs plus the votes that have not been flushed yet.
+        """
+        key = self._leaderboard_key(kind)
+        if not self._redis.set(f"{key}:seeded", 1, nx=True):
+            return
+        totals = Counter(dict(scores))
+        for hash_key in (self.PENDING_KEY, self.FLUSHING_KEY):
+            for field, value in self._redis.hgetall(hash_key).items():
+                voted_kind, object_id = field.decode().split(":")
+                if voted_kind == kind:
+                    totals[int(object_id)] += int(value)
+        if totals:
+            self._redis.zadd(key, totals)
+
+    def leaderboard(self, kind, limit):
+        """Returns up to `limit` ``(object_id, votes)`` pairs, most voted first."""
+        return [
+            (int(member), int(score))
+            for member, score in self._redis.zrevrange(
+                self._leaderboard_key(kind), 0, limit - 1, withscores=True
+            )
+        ]
+
+
+_buffers = {}
+_buffers_lock = threading.Lock()
+
+
+def get_vote_buffer():
+    """Returns the vote buffer selected by the ``VOTE_BUFFER_BACKEND`` setting."""
+    backend = settings.VOTE_BUFFER_BACKEND
+    with _buffers_lock:
+        if backend not in _buffers:
+            if backend == "redis":
+                _buffers[backend] = RedisVoteBuffer(settings.VOTE_REDIS_URL)
+            elif backend == "memory":
+                _buffers[backend] = InMemoryVoteBuffer()
+            else:
+                raise ValueError(f"Unknown vote buffer backend '{backend}'")
+        return _buffers[backend]
+
+
+def record_vote(kind, object_id, client_id):
+    """
+    Record a vote for an object on behalf of a client.
+
+    :param kind: One of the keys of :data:`VOTABLE_MODELS`.
+    :param object_id: Primary key of the voted object.
+    :param client_id: Identifier used to deduplicate votes of the same client.
+    :return: True if the vote was counted, False if the client already voted.
+    """
+    return get_vote_buffer().record(kind, object_id, client_id)
+
+
+def flush_votes():
+    """
+    Add the buffered votes to the persisted tallies in one transaction.
+
+    The flush lock is held from the drain until the counts are acknowledged, so
+    a flush overlapping a slow one returns without draining the same counts.
+
+    :return: Number of votes flushed.
+    """
+    buffer = get_vote_buffer()
+    token = buffer.lock_flush(settings.VOTE_FLUSH_LOCK_SECONDS)
+    if token is None:
+        return 0
+    try:
+        counts = buffer.drain()
+        if counts:
+            with transaction.atomic():
+                VoteTally.objects.bulk_create(
+                    [VoteTally(kind=kind, object_id=pk) for kind, pk in counts],
+                    ignore_conflicts=True,
+                )
+                for (kind, pk), votes in counts.items():
+                    VoteTally.objects.filter(kind=kind, object_id=pk).update(
+                        votes=F("votes") + votes
+                    )
+        buffer.ack()
+    finally:
+        buffer.unlock_flush(token)
+    return sum(counts.values())
+
+
+def leaderboard(kind, limit=10):
+    """
+    Return the most voted objects of a kind, including votes not yet flushed.
+
+    The leaderboard is served from the buffer's sorted set. It is seeded from
+    the persisted tallies and the pending votes the first time it is read after
+    the buffer was reset; from then on every recorded vote updates it.
+
+    :param kind: One of the keys of :data:`VOTABLE_MODELS`.
+    :param limit: Maximum number of entries.
+    :return: List of ``(object_id, votes)`` pairs, most voted first.
+    """
+    buffer = get_vote_buffer()
+    if not buffer.has_leaderboard(kind):
+        buffer.seed_leaderboard(
+            kind,
+            VoteTally.objects.filter(kind=kind, votes__gt=0).values_list(
+                "object_id", "votes"
+            ),
+        )
+    return buffer.leaderboard(kind, limit)
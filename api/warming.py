@@ -0,0 +1,278 @@
+"""
+Access statistics and cache warming after a sync.
+
+A ``fetch_swapi_data`` run drops the cached list counts (see
+:mod:`api.pagination`) and, on large datasets, pushes the pages that requests
+read out of the databases' buffer caches. The first wave of traffic after the
+nightly sync then pays for all of it at once. Once a sync has succeeded,
+:func:`warm_caches` replays the most requested read signatures so that this
+cost falls on a background worker instead.
+
+:class:`AccessStatsMiddleware` samples ``ACCESS_STATS_SAMPLE_RATE`` of the
+successful ``GET`` requests to the character, film, starship and statistics
+endpoints. It counts them per signature, the path and its sorted query string,
+in a sorted set per day that expires after ``ACCESS_STATS_DAYS``. The counts
+live in Redis in deployments and in process in tests, selected by
+``ACCESS_STATS_BACKEND`` (``"redis"`` or ``"memory"``).
+
+Signatures are replayed through the views without the middleware, on every
+replica (or the primary if none is configured), which warms the shared count
+cache and each database's buffers. Replicas that have not yet replayed the
+latest change-log entry are skipped and reported, so that they are not warmed
+with, and do not cache counts of, the data from before the sync. Per-process
+state such as the graph index is not warmed.
+
+Classes:
+    InMemoryAccessStats: Process-local access statistics for tests and development.
+    RedisAccessStats: Access statistics shared by all workers through Redis.
+    AccessStatsMiddleware: Counts sampled request signatures.
+
+Functions:
+    get_access_stats: Returns the configured access statistics.
+    signature: Returns the signature of a request.
+    warm_caches: Replays the most requested signatures.
+"""
+
+import logging
+import random
+import threading
+from collections import Counter, defaultdict
+from datetime import timedelta
+from urllib.parse import urlencode
+
+import redis
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.test import RequestFactory
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+
+from core.db import replicas
+
+from . import changes
+
+logger = logging.getLogger(__name__)
+
+# Read endpoints whose requests are counted and replayed
+WARMABLE_ROUTES = (
+    "character-list",
+    "character-detail",
+    "film-list",
+    "film-detail",
+    "starship-list",
+    "starship-detail",
+    "stats-list",
+    "stats-detail",
+)
+# Diagnostic parameters that do not change what a request reads
+IGNORED_PARAMS = (
+    "inspect_queries",
+    "profile",
+    "profile_limit",
+    "profile_sort",
+    "profile_token",
+)
+MAX_SIGNATURE_LENGTH = 300
+# Signatures kept per day; the least requested ones are dropped beyond that
+MAX_SIGNATURES = 10000
+# Signatures allowed past MAX_SIGNATURES before trimming, so new ones get a
+# chance to be requested again before they are the least requested
+SIGNATURE_TRIM_MARGIN = 1000
+
+
+def _days():
+    """The dates whose counts are kept, today first."""
+    today = timezone.now().date()
+    return [today - timedelta(days=n) for n in range(settings.ACCESS_STATS_DAYS)]
+
+
+class InMemoryAccessStats:
+    """Process-local access statistics, like :class:`RedisAccessStats`."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """Forgets every count."""
+        with self._lock:
+            self._counts = defaultdict(Counter)
+
+    def record(self, path):
+        """Counts one request with the signature `path` today."""
+        with self._lock:
+            counts = self._counts[_days()[0]]
+            counts[path] += 1
+            if len(counts) > MAX_SIGNATURES + SIGNATURE_TRIM_MARGIN:
+                kept = counts.most_common(MAX_SIGNATURES)
+                counts.clear()
+                counts.update(dict(kept))
+
+    def top(self, limit):
+        """Returns up to `limit` ``(signature, count)`` pairs, most requested first."""
+        with self._lock:
+            totals = Counter()
+            for day in _days():
+                totals.update(self._counts[day])
+        return totals.most_common(limit)
+
+
+class RedisAccessStats:
+    """
+    Access statistics shared by all workers through Redis.
+
+    Keys:
+        ``access:<date>``: Sorted set of the signatures requested on a day.
+    """
+
+    def __init__(self, url):
+        self._redis = redis.Redis.from_url(url, socket_connect_timeout=1)
+
+    @staticmethod
+    def _key(day):
+        return f"access:{day.isoformat()}"
+
+    def record(self, path):
+        """
+        Counts one request with the signature `path` today, in one round trip.
+
+        Trimming takes a second one, only once the margin past
+        :data:`MAX_SIGNATURES` has filled up.
+        """
+        key = self._key(_days()[0])
+        pipeline = self._redis.pipeline(transaction=False)
+        pipeline.zincrby(key, 1, path)
+        pipeline.zcard(key)
+        pipeline.expire(key, timedelta(days=settings.ACCESS_STATS_DAYS))
+        _, size, _ = pipeline.execute()
+        if size > MAX_SIGNATURES + SIGNATURE_TRIM_MARGIN:
+            self._redis.zremrangebyrank(key, 0, -MAX_SIGNATURES - 1)
+
+    def top(self, limit):
+        """Returns up to `limit` ``(signature, count)`` pairs, most requested first."""
+        totals = Counter()
+        for day in _days():
+            # A signature popular over the period is near the top of some day
+            for member, score in self._redis.zrevrange(
+                self._key(day), 0, limit * 2 - 1, withscores=True
+            ):
+                totals[member.decode()] += int(score)
+        return totals.most_common(limit)
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def get_access_stats():
+    """Returns the access statistics selected by ``ACCESS_STATS_BACKEND``."""
+    backend = settings.ACCESS_STATS_BACKEND
+    with _stats_lock:
+        if backend not in _stats:
+            if backend == "redis":
+                _stats[backend] = RedisAccessStats(settings.ACCESS_STATS_REDIS_URL)
+            elif backend == "memory":
+                _stats[backend] = InMemoryAccessStats()
+            else:
+                raise ValueError(f"Unknown access stats backend '{backend}'")
+        return _stats[backend]
+
+
+def signature(request):
+    """
+    Return the signature of a request: its path and sorted query string.
+
+    :param request: A Django request.
+    :return: The signature, or None if the request is not worth replaying.
+    """
+    match = request.resolver_match
+    if match is None or match.view_name not in WARMABLE_ROUTES:
+        return None
+    params = sorted(
+        (name, value)
+        for name, values in request.GET.lists()
+        if name not in IGNORED_PARAMS
+        for value in values
+    )
+    path = request.path + (f"?{urlencode(params)}" if params else "")
+    return path if len(path) <= MAX_SIGNATURE_LENGTH else None
+
+
+class AccessStatsMiddleware:
+    """Counts a sample of the successful read requests per signature.
+
+    Failing to reach the statistics never fails the request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            request.method == "GET"
+            and response.status_code == 200
+            and random.random() < settings.ACCESS_STATS_SAMPLE_RATE
+        ):
+            key = signature(request)
+            if key is not None:
+                try:
+                    get_access_stats().record(key)
+                except redis.RedisError as error:
+                    logger.warning("Could not record access statistics: %s", error)
+        return response
+
+
+def _host():
+    """A host name accepted by ``ALLOWED_HOSTS``, for the links in responses."""
+    for host in settings.ALLOWED_HOSTS:
+        if host and host != "*":
+            return host.lstrip(".")
+    return "localhost"
+
+
+def _replay(factory, path):
+    """Serves a GET of `path` without the middleware; returns the status code."""
+    try:
+        match = resolve(path.split("?", 1)[0])
+    except Resolver404:
+        return 404
+    request = factory.get(path, HTTP_ACCEPT="application/json", HTTP_HOST=_host())
+    response = match.func(request, *match.args, **match.kwargs)
+    if hasattr(response, "render"):
+        response.render()
+    return response.status_code
+
+
+def warm_caches(limit=None, aliases=None):
+    """
+    Replay the most requested signatures on every database serving reads.
+
+    :param limit: The number of signatures; defaults to ``CACHE_WARMING_TOP_N``.
+    :param aliases: The databases to warm; defaults to every replica, or the
+        primary if none is configured.
+    :return: The number of replayed requests per alias, or None for the
+        replicas that are behind the primary and were skipped.
+    """
+    limit = settings.CACHE_WARMING_TOP_N if limit is None else limit
+    aliases = aliases or settings.DATABASE_REPLICAS or [DEFAULT_DB_ALIAS]
+    signatures = [path for path, _ in get_access_stats().top(limit)]
+    latest = changes.last_seq(using=DEFAULT_DB_ALIAS)
+    factory = RequestFactory()
+    warmed = {}
+    for alias in aliases:
+        if changes.last_seq(using=alias) < latest:
+            logger.info("Not warming %s, which is behind the primary", alias)
+            warmed[alias] = None
+            continue
+        with replicas.read_from_replica(alias=alias):
+            for path in signatures:
+                try:
+                    status = _replay(factory, path)
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception("Could not replay %s", path)
+                    continue
+                if status != 200:
+                    logger.debug("Replaying %s returned %s", path, status)
+        warmed[alias] = len(signatures)
+    return warmed
@@ -1,3 +1,11 @@
-from .celery import app as celery_app
-
 __all__ = ("celery_app",)
+
+
+def __getattr__(name):
+    # Celery and kombu take a large share of the boot time, and web workers never
+    # use the app, so it is only imported by what needs it.
+    if name == "celery_app":
+        from .celery import app
+
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
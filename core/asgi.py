@@ -2,6 +2,8 @@
 ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Run it with ``uvicorn core.asgi:application`` to serve the ``/api/stream/``
+server-sent events, which WSGI workers refuse.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -1,6 +1,8 @@
 from __future__ import absolute_import, unicode_literals
 import os
+import shutil
 from celery import Celery
+from celery.signals import worker_init, worker_process_shutdown
 
 # Set the default Django settings module for the 'celery' program
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
@@ -10,3 +12,41 @@ app = Celery("core")
 # Load task modules from all registered Django app configs.
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
+
+
+@worker_init.connect
+def start_metrics(**kwargs):
+    """
+    Start the worker with an empty Prometheus multiprocess directory, and serve
+    the metrics of its pool on ``CELERY_METRICS_PORT`` if set.
+    """
+    directory = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+    port = os.getenv("CELERY_METRICS_PORT")
+    if port:
+        from core.metrics import (  # pylint: disable=import-outside-toplevel
+            start_metrics_server,
+        )
+
+        start_metrics_server(int(port))
+
+
+@worker_process_shutdown.connect
+def drop_process_metrics(pid, **kwargs):
+    """Drop the live gauges of a pool process that exits."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import (  # pylint: disable=import-outside-toplevel
+            multiprocess,
+        )
+
+        multiprocess.mark_process_dead(pid)
+
+
+@worker_init.connect
+def warm_up_worker(**kwargs):
+    """Warm the main worker process before it forks the pool processes."""
+    from core.warmup import warm_up  # pylint: disable=import-outside-toplevel
+
+    warm_up(http=False)
@@ -0,0 +1,130 @@
+"""
+PostgreSQL backend keeping connections in a per-process pool.
+
+With Django's own backend every request opens a connection, paying for the TCP
+and authentication handshakes, and closes it at the end. This backend keeps
+the connections of each process in a :class:`~core.db.pool.ConnectionPool`:
+closing a connection gives it back to the pool, rolled back if a transaction
+was left open, and the next request of any thread checks it out again.
+
+The pool is configured with ``OPTIONS["pool"]``:
+
+    ``min_size``: Connections kept open, opened on first use (default 0).
+    ``max_size``: Connections open at once per process (default 10).
+    ``timeout``: Seconds to wait for a free connection (default 10).
+    ``max_lifetime``: Seconds after which a connection is replaced (default 3600).
+    ``check_after``: Seconds a connection may stay idle before it is checked
+    with ``SELECT 1`` on checkout (default 30; 0 checks every checkout).
+
+Keep ``CONN_MAX_AGE`` at 0 so connections go back to the pool after every
+request. A connection never crosses a fork: the idle connections are closed
+before a process forks, e.g. a preloaded gunicorn master, and each child
+process starts its own pool.
+
+Classes:
+    DatabaseWrapper: The pooled PostgreSQL database wrapper.
+"""
+
+import os
+import threading
+
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+
+from core.db.pool import ConnectionPool
+
+# The libpq transaction status of a connection outside any transaction, the same
+# in psycopg2 and psycopg 3
+TRANSACTION_STATUS_IDLE = 0
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def close_pools():
+    """Close the idle connections of every pool of this process."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+
+
+def _forget_pools():
+    # The child must neither use nor close its parent's connections
+    _pools.clear()
+
+
+os.register_at_fork(before=close_pools, after_in_child=_forget_pools)
+
+
+def _is_usable(connection):
+    if connection.closed:
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        if connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+            connection.rollback()
+    except base.Database.Error:
+        return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """A PostgreSQL database wrapper taking its connections from a pool."""
+
+    _pool = None
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop("pool", None)
+        return params
+
+    @property
+    def pool(self):
+        """The pool of this process for this database, created on first use."""
+        # Test databases change NAME, and connect to a pool of their own
+        key = (self.alias, self.settings_dict["NAME"])
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                options = self.settings_dict["OPTIONS"].get("pool") or {}
+                pool = _pools[key] = ConnectionPool(check=_is_usable, **options)
+        return pool
+
+    def get_new_connection(self, conn_params):
+        connect = super().get_new_connection
+        if self.alias == NO_DB_ALIAS:
+            # Administrative connections, e.g. to create the test database
+            return connect(conn_params)
+        # Given back to the pool it came from, even if NAME changes meanwhile
+        self._pool = self.pool
+        connection = self._pool.getconn(lambda: connect(conn_params))
+        self._pool.fill(lambda: connect(conn_params))
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        if self._pool is None:
+            super()._close()
+            return
+        connection = self.connection
+        # Connections closed inside atomic() stay referenced by this wrapper
+        broken = bool(connection.closed) or self.in_atomic_block
+        if not broken and (
+            connection.info.transaction_status != TRANSACTION_STATUS_IDLE
+        ):
+            try:
+                connection.rollback()
+            except base.Database.Error:
+                broken = True
+        self._pool.putconn(connection, close=broken)
+
+    def close_pool(self):
+        """Close the idle connections of this database's pool."""
+        self.pool.close()
+
+    def _nodb_cursor(self):
+        # Dropping the test database fails while pooled connections are open
+        self.close_pool()
+        return super()._nodb_cursor()
@@ -0,0 +1,173 @@
+"""
+A thread-safe pool of database connections.
+
+The pool is independent of the database driver: connections are opened by a
+callable passed to :meth:`ConnectionPool.getconn` and checked by an optional
+``check`` callable, so the pooled PostgreSQL backend supplies both. Idle
+connections are reused newest first, which lets surplus connections age out.
+
+Classes:
+    PoolTimeout: Raised when no connection became free in time.
+    ConnectionPool: Hands out and takes back connections.
+"""
+
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    """No connection became available within the pool's timeout."""
+
+
+class ConnectionPool:
+    """Hands out at most `max_size` connections and keeps idle ones for reuse.
+
+    Attributes:
+        min_size (int): Connections kept open even when idle.
+        max_size (int): Connections open at once, idle or in use.
+        timeout (float): Seconds :meth:`getconn` waits for a free connection.
+        max_lifetime (float): Seconds after which a connection is replaced.
+        check_after (float): Seconds a connection may stay idle before it is
+            checked on checkout; ``0`` checks on every checkout.
+        check (callable): Returns whether a connection is usable.
+    """
+
+    def __init__(
+        self,
+        min_size=0,
+        max_size=10,
+        timeout=10.0,
+        max_lifetime=3600.0,
+        check_after=30.0,
+        check=None,
+    ):
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+        self.check = check
+        self._idle = []  # (connection, returned_at), newest last
+        self._opened = {}  # id(connection) -> opened_at
+        self._reserved = 0  # Connections being opened
+        self._condition = threading.Condition()
+        self.stats = {"opened": 0, "reused": 0, "discarded": 0, "waits": 0}
+
+    @property
+    def size(self):
+        """Number of open connections, idle or in use."""
+        return len(self._opened) + self._reserved
+
+    @property
+    def idle(self):
+        """Number of idle connections."""
+        return len(self._idle)
+
+    def getconn(self, connect):
+        """
+        Check out a connection, opening one with `connect` if none is idle.
+
+        :param connect: Opens a new connection; called without arguments.
+        :return: A connection, which must be given back with :meth:`putconn`.
+        :raises PoolTimeout: If `max_size` connections stayed in use for
+            `timeout` seconds.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._condition:
+                idle = self._wait_for_idle_or_room(deadline)
+            if idle is None:
+                return self._open(connect)
+            connection, returned_at = idle
+            # Checked outside the lock, as the check is a round trip
+            if (
+                self.check is None
+                or time.monotonic() - returned_at < self.check_after
+                or self.check(connection)
+            ):
+                self.stats["reused"] += 1
+                return connection
+            with self._condition:
+                self._discard(connection)
+                self._condition.notify()
+
+    def putconn(self, connection, close=False):
+        """
+        Give back a connection checked out with :meth:`getconn`.
+
+        :param connection: The connection.
+        :param close: Whether to close it instead of keeping it for reuse, e.g.
+            because it is broken or in an unknown state.
+        """
+        now = time.monotonic()
+        with self._condition:
+            opened_at = self._opened.get(id(connection))
+            if opened_at is None:
+                return  # Not ours, e.g. checked out before the pool was closed
+            if close or now - opened_at >= self.max_lifetime:
+                self._discard(connection)
+            else:
+                self._idle.append((connection, now))
+            self._condition.notify()
+
+    def fill(self, connect):
+        """Open connections until `min_size` are open."""
+        while True:
+            with self._condition:
+                if self.size >= self.min_size:
+                    return
+                self._reserved += 1
+            self.putconn(self._open(connect))
+
+    def close(self):
+        """Close the idle connections; connections in use are closed on return."""
+        with self._condition:
+            while self._idle:
+                self._discard(self._idle.pop()[0])
+
+    def _wait_for_idle_or_room(self, deadline):
+        """Pops an idle connection, or reserves room to open one (None).
+
+        Must be called holding the lock.
+        """
+        while True:
+            while self._idle:
+                connection, returned_at = self._idle.pop()
+                if time.monotonic() - self._opened[id(connection)] < self.max_lifetime:
+                    return connection, returned_at
+                self._discard(connection)
+            if self.size < self.max_size:
+                self._reserved += 1
+                return None
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise PoolTimeout(
+                    f"No database connection became free in {self.timeout}s "
+                    f"({self.max_size} in use)"
+                )
+            self.stats["waits"] += 1
+            self._condition.wait(remaining)
+
+    def _open(self, connect):
+        try:
+            connection = connect()
+        except BaseException:
+            with self._condition:
+                self._reserved -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._reserved -= 1
+            self._opened[id(connection)] = time.monotonic()
+            self.stats["opened"] += 1
+        return connection
+
+    def _discard(self, connection):
+        del self._opened[id(connection)]
+        self.stats["discarded"] += 1
+        try:
+            connection.close()
+        except Exception:  # pylint: disable=broad-exception-caught
+            pass
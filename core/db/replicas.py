@@ -0,0 +1,132 @@
+"""
+Read-replica routing with read-your-writes stickiness.
+
+Everything reads from and writes to the primary (``default``) database, except
+code running inside :func:`read_from_replica`. There, reads go to one of the
+``DATABASE_REPLICAS`` aliases, picked at random once per block so that the
+queries of one request see the same snapshot. The API viewsets serve their safe
+requests that way (:class:`api.views.ReplicaReadMixin`); ingestion, Celery
+tasks, the admin and all writes stay on the primary.
+
+Replicas lag behind the primary. So that a client reads its own writes,
+:class:`ReadYourWritesMiddleware` pins it to the primary for
+``REPLICA_STICKY_SECONDS`` after every successful unsafe request. The pin is sent
+as a cookie for browsers and as a response header which other clients send
+back as a request header.
+
+Classes:
+    ReplicaRouter: Database router sending reads to the selected replica.
+    ReadYourWritesMiddleware: Pins clients that wrote to the primary.
+
+Functions:
+    read_from_replica: Routes the reads made inside it to a replica.
+    pinned_to_primary: Whether a request must read from the primary.
+"""
+
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = "read_primary_until"
+PIN_HEADER = "X-Read-Primary-Until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_replica = ContextVar("replica", default=None)
+
+
+def pinned_to_primary(request):
+    """
+    Whether `request` comes from a client that wrote recently.
+
+    :param request: A Django or DRF request.
+    :return: True until the time sent in the pin cookie or header has passed.
+    """
+    value = request.COOKIES.get(PIN_COOKIE) or request.headers.get(PIN_HEADER)
+    try:
+        return float(value) > time.time()
+    except (TypeError, ValueError):
+        return False
+
+
+@contextmanager
+def read_from_replica(request=None, alias=None):
+    """
+    Route the reads made inside the block to a randomly chosen replica.
+
+    Nothing changes if no replica is configured, or if `request` is given and is
+    unsafe or pinned to the primary. Blocks nested in another keep its replica.
+
+    :param request: The request being served, if any.
+    :param alias: Read from this database instead of a random replica.
+    :return: The alias reads go to inside the block.
+    """
+    replicas = settings.DATABASE_REPLICAS
+    if alias is None:
+        if not replicas or (
+            request is not None
+            and (request.method not in SAFE_METHODS or pinned_to_primary(request))
+        ):
+            yield _replica.get() or DEFAULT_DB_ALIAS
+            return
+        alias = _replica.get() or random.choice(replicas)
+    token = _replica.set(alias)
+    try:
+        yield _replica.get()
+    finally:
+        _replica.reset(token)
+
+
+class ReplicaRouter:
+    """Sends reads to the replica chosen by :func:`read_from_replica`.
+
+    Writes, and reads outside :func:`read_from_replica`, go to ``default``.
+    Replicas are never migrated: they copy the primary's schema.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _replica.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReadYourWritesMiddleware:
+    """Pins a client to the primary for a while after it wrote.
+
+    Successful requests with an unsafe method get a cookie and a header holding
+    the time until which the client's reads go to the primary. Nothing is added
+    when no replica is configured.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            window = settings.REPLICA_STICKY_SECONDS
+            until = f"{time.time() + window:.3f}"
+            response.set_cookie(
+                PIN_COOKIE, until, max_age=window, httponly=True, samesite="Lax"
+            )
+            response[PIN_HEADER] = until
+        return response
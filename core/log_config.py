@@ -1,6 +1,132 @@
+import atexit
+import json
 import logging
 import logging.handlers
 import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+# Attributes every LogRecord has; anything else was passed with ``extra=``
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {
+    "message",
+    "asctime",
+    "rate_limited",
+}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line.
+
+    The object holds the UTC timestamp, level, logger, message, source location,
+    process and thread, the formatted exception if any, and every attribute passed
+    with ``extra=``.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "location": f"{record.module}:{record.lineno}",
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets through at most `limit` records per call site every `window` seconds.
+
+    Error storms, such as one failure per row of a sync, repeat the same log call.
+    Records past the limit are dropped before any formatting or I/O, and the first
+    record of the next window reports how many were suppressed.
+
+    Attributes:
+        limit (int): Records allowed per call site and window.
+        window (float): Length of the window in seconds.
+    """
+
+    def __init__(self, limit=10, window=60.0):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        # A record reaching several handlers sharing this filter is counted once
+        decision = getattr(record, "rate_limited", None)
+        if decision is not None:
+            return not decision
+        record.rate_limited = not self._allow(record)
+        return not record.rate_limited
+
+    def _allow(self, record):
+        key = (record.pathname, record.lineno, record.levelno)
+        now = time.monotonic()
+        with self._lock:
+            started, count, suppressed = self._sites.get(key, (now, 0, 0))
+            if now - started >= self.window:
+                started, count = now, 0
+            if count >= self.limit:
+                self._sites[key] = (started, count, suppressed + 1)
+                return False
+            self._sites[key] = (started, count + 1, 0 if count == 0 else suppressed)
+        if count == 0 and suppressed:
+            record.suppressed = suppressed
+            record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+        return True
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room, so the records queued before shutdown are still written
+        try:
+            self.queue.put(self._sentinel, timeout=5)
+        except queue.Full:
+            pass
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """A QueueHandler that never blocks and keeps exceptions structured.
+
+    When the queue is full the record is dropped and counted in `dropped`, instead
+    of blocking the caller or printing a traceback for every record.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Merge the arguments now, as they may change before the listener runs,
+        # but keep the traceback separate so formatters can place it.
+        record = logging.makeLogRecord(vars(record))
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
 
 
 class LogConfig:
@@ -10,12 +136,36 @@ class LogConfig:
     logging to output both to the console and to a specified log file, with predefined
     formats and levels for each.
 
+    In the default ``queue`` mode, log calls only put the record on an in-memory queue;
+    a background listener thread formats and writes them, so request threads never
+    wait on disk or console I/O. The ``sync`` mode writes from the calling thread.
+    With ``LOG_FILE_FORMAT=json`` the file holds one JSON object per line.
+    Repeated records from one call site are rate limited.
+
+    Every gunicorn and Celery worker appends to the same file, so by default it
+    is rotated externally, e.g. by logrotate, and reopened by each process once
+    it was moved. Rotating by size from inside the application is only safe for
+    a single process, as every process would rotate the file on its own and
+    clobber the others' files; set ``LOG_MAX_BYTES`` to enable it.
+
+    ``LOG_FILE`` and the attributes from ``LOG_MODE`` on can be overridden with the
+    environment variable of the same name, read when logging is set up.
+
     Attributes:
         LOG_FORMAT (str): The format for log messages.
         DATE_FORMAT (str): The date format for log messages.
         LOG_FILE (str): The path to the log file.
         LOG_LEVEL_CONSOLE (int): The logging level for console output.
         LOG_LEVEL_FILE (int): The logging level for file output.
+        LOG_MODE (str): ``queue`` (background writer) or ``sync``.
+        LOG_FILE_FORMAT (str): ``json`` or ``text`` for the log file.
+        LOG_CONSOLE_FORMAT (str): ``json`` or ``text`` for the console.
+        LOG_MAX_BYTES (int): Size at which a single process rotates the log
+            file; 0 leaves rotation to an external tool.
+        LOG_BACKUP_COUNT (int): Number of files kept when rotating by size.
+        LOG_QUEUE_SIZE (int): Records buffered before new ones are dropped.
+        LOG_RATE_LIMIT (int): Records allowed per call site and window.
+        LOG_RATE_WINDOW (float): Length of the rate limiting window in seconds.
     """
 
     LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
@@ -23,39 +173,137 @@ class LogConfig:
     LOG_FILE = os.path.join("logs", "app.log")
     LOG_LEVEL_CONSOLE = logging.INFO
     LOG_LEVEL_FILE = logging.WARNING
+    LOG_MODE = "queue"
+    LOG_FILE_FORMAT = "json"
+    LOG_CONSOLE_FORMAT = "text"
+    LOG_MAX_BYTES = 0
+    LOG_BACKUP_COUNT = 5
+    LOG_QUEUE_SIZE = 10000
+    LOG_RATE_LIMIT = 10
+    LOG_RATE_WINDOW = 60.0
+
+    _configured = False
+    _listener = None
 
     @staticmethod
-    def setup_logging():
-        """Sets up the application-wide logging configuration.
+    def setting(name):
+        """Returns the attribute `name`, overridden by the environment if set."""
+        default = getattr(LogConfig, name)
+        value = os.getenv(name)
+        return default if value is None else type(default)(value)
 
-        Configures the root logger to output messages to the console and a file, `app.log`,
-        by default. The console output level is set to INFO, and the file output level
-        is set to WARNING. Both outputs use a common format that includes the timestamp,
-        log level, and message.
+    @staticmethod
+    def _formatter(kind):
+        if kind == "json":
+            return JsonFormatter()
+        return logging.Formatter(LogConfig.LOG_FORMAT, LogConfig.DATE_FORMAT)
+
+    @staticmethod
+    def _file_handler(log_file):
+        max_bytes = LogConfig.setting("LOG_MAX_BYTES")
+        if max_bytes:
+            return logging.handlers.RotatingFileHandler(
+                log_file,
+                maxBytes=max_bytes,
+                backupCount=LogConfig.setting("LOG_BACKUP_COUNT"),
+            )
+        return logging.handlers.WatchedFileHandler(log_file)
+
+    @staticmethod
+    def build_handlers():
+        """Creates the console and file handlers.
 
         Exception Handling:
-            Handles any IOError exceptions (e.g., file access permissions) that might occur
-            when setting up the file handler.
+            Handles any IOError exceptions (e.g., file access permissions) that
+            might occur when setting up the file handler; logging then goes to the
+            console only.
         """
-        # Ensure the logs directory exists
-        os.makedirs("logs", exist_ok=True)
-
-        # Configure root logger
-        logging.basicConfig(
-            level=LogConfig.LOG_LEVEL_CONSOLE,
-            format=LogConfig.LOG_FORMAT,
-            datefmt=LogConfig.DATE_FORMAT,
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(LogConfig.LOG_LEVEL_CONSOLE)
+        console_handler.setFormatter(
+            LogConfig._formatter(LogConfig.setting("LOG_CONSOLE_FORMAT"))
         )
+        handlers = [console_handler]
 
+        log_file = LogConfig.setting("LOG_FILE")
         try:
-            # Create and configure file handler
-            file_handler = logging.FileHandler(LogConfig.LOG_FILE)
+            # Ensure the logs directory exists
+            os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+            file_handler = LogConfig._file_handler(log_file)
             file_handler.setLevel(LogConfig.LOG_LEVEL_FILE)
-            file_handler.setFormatter(logging.Formatter(LogConfig.LOG_FORMAT))
-            logging.getLogger("").addHandler(file_handler)
+            file_handler.setFormatter(
+                LogConfig._formatter(LogConfig.setting("LOG_FILE_FORMAT"))
+            )
+            handlers.append(file_handler)
         except IOError as e:
-            logging.error("Failed to configure file handler for logging: %s", e)
+            console_handler.handle(
+                logging.makeLogRecord(
+                    {
+                        "levelno": logging.ERROR,
+                        "levelname": "ERROR",
+                        "msg": f"Failed to configure file handler for logging: {e}",
+                    }
+                )
+            )
+        return handlers
+
+    @staticmethod
+    def start_queue(handlers, queue_size=None):
+        """Starts a background listener writing to `handlers`.
+
+        :param handlers: The handlers the listener thread writes to.
+        :param queue_size: Records buffered before new ones are dropped.
+        :return: The ``(queue_handler, listener)`` pair; attach the handler to a
+            logger and stop the listener to flush the queue.
+        """
+        log_queue = queue.Queue(queue_size or LogConfig.setting("LOG_QUEUE_SIZE"))
+        queue_handler = NonBlockingQueueHandler(log_queue)
+        listener = _QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        return queue_handler, listener
+
+    @staticmethod
+    def _restart_after_fork():
+        """Gives a forked child, e.g. a preloaded gunicorn worker, its own writer."""
+        listener = LogConfig._listener
+        if listener is None:
+            return
+        log_queue = queue.Queue(LogConfig.setting("LOG_QUEUE_SIZE"))
+        for handler in logging.getLogger("").handlers:
+            if isinstance(handler, NonBlockingQueueHandler):
+                handler.queue = log_queue
+        listener.queue = log_queue
+        listener._thread = None  # pylint: disable=protected-access
+        listener.start()
+
+    @staticmethod
+    def setup_logging():
+        """Sets up the application-wide logging configuration.
+
+        Configures the root logger to output messages to the console and a file,
+        `app.log`, by default. The console output level is set to INFO, and the
+        file output level is set to WARNING. Calling it again has no effect.
+        """
+        if LogConfig._configured:
+            return
+        LogConfig._configured = True
+
+        root = logging.getLogger("")
+        root.setLevel(LogConfig.LOG_LEVEL_CONSOLE)
+        rate_limit = RateLimitFilter(
+            LogConfig.setting("LOG_RATE_LIMIT"), LogConfig.setting("LOG_RATE_WINDOW")
+        )
+        handlers = LogConfig.build_handlers()
 
+        if LogConfig.setting("LOG_MODE") == "sync":
+            for handler in handlers:
+                handler.addFilter(rate_limit)
+                root.addHandler(handler)
+            return
 
-# Initialize the logging setup
-LogConfig.setup_logging()
+        queue_handler, LogConfig._listener = LogConfig.start_queue(handlers)
+        # Filtering before the queue keeps suppressed records off it entirely
+        queue_handler.addFilter(rate_limit)
+        root.addHandler(queue_handler)
+        atexit.register(LogConfig._listener.stop)
+        os.register_at_fork(after_in_child=LogConfig._restart_after_fork)
@@ -0,0 +1,166 @@
+"""
+Prometheus instrumentation for the project.
+
+Collects per-route request latency, status codes, response sizes and SQL query
+counts and time, plus the phase timings of ``fetch_swapi_data``, and exposes
+them on ``/metrics`` in the Prometheus text format.
+
+When the ``PROMETHEUS_MULTIPROC_DIR`` environment variable is set, every process
+writes its samples to that directory and ``/metrics`` aggregates the samples of
+all gunicorn workers (see ``gunicorn.conf.py``). Otherwise the metrics of the
+current process are reported. Each container needs a directory of its own,
+since process IDs repeat across containers. Celery workers have no HTTP server,
+so they serve the metrics of their pool on ``CELERY_METRICS_PORT`` with
+:func:`start_metrics_server` (see ``core/celery.py``), and each container is
+scraped separately.
+
+Classes:
+    MetricsMiddleware: Records request and SQL metrics for every request.
+
+Functions:
+    observe_phase: Context manager timing an ingestion phase.
+    metrics_view: Renders all metrics in the Prometheus text format.
+    start_metrics_server: Serves all metrics on a port of their own.
+"""
+
+import os
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time spent handling a request.",
+    ["method", "route"],
+)
+REQUESTS = Counter(
+    "http_requests",
+    "Requests handled, by response status.",
+    ["method", "route", "status"],
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Size of the response body.",
+    ["route"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, float("inf")),
+)
+DB_QUERIES = Histogram(
+    "db_queries_per_request",
+    "SQL queries executed while handling a request.",
+    ["route"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, float("inf")),
+)
+DB_QUERY_TIME = Histogram(
+    "db_query_duration_seconds_per_request",
+    "Time spent in SQL queries while handling a request.",
+    ["route"],
+)
+INGESTION_PHASE = Histogram(
+    "ingestion_phase_duration_seconds",
+    "Time spent in a phase of fetch_swapi_data.",
+    ["phase"],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, float("inf")),
+)
+
+
+class QueryTimer:
+    """Database execute wrapper counting queries and the time spent in them."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+def _route(request):
+    """Returns a low-cardinality label for the view that handled `request`."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "<unmatched>"
+    return match.view_name or match.route or "<unnamed>"
+
+
+class MetricsMiddleware:
+    """
+    Records latency, status, response size and SQL metrics for every request.
+
+    Routes are labelled with the URL name of the view (e.g. ``character-list``),
+    so the label set stays bounded whatever the request path.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        route = _route(request)
+        REQUEST_LATENCY.labels(request.method, route).observe(elapsed)
+        REQUESTS.labels(request.method, route, str(response.status_code)).inc()
+        if not response.streaming:
+            RESPONSE_SIZE.labels(route).observe(len(response.content))
+        DB_QUERIES.labels(route).observe(timer.count)
+        DB_QUERY_TIME.labels(route).observe(timer.duration)
+        return response
+
+
+@contextmanager
+def observe_phase(phase):
+    """
+    Time a phase of the ingestion and record it in ``ingestion_phase_duration_seconds``.
+
+    :param phase: Name of the phase, e.g. ``characters``.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        INGESTION_PHASE.labels(phase).observe(time.perf_counter() - start)
+
+
+def _registry():
+    """The registry of every process sharing the multiprocess directory, if any."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def metrics_view(request):
+    """Renders the collected metrics in the Prometheus text format."""
+    return HttpResponse(generate_latest(_registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+def start_metrics_server(port):
+    """
+    Serve the collected metrics on `port` from a background thread.
+
+    :param port: The TCP port to listen on.
+    """
+    start_http_server(port, registry=_registry())
@@ -0,0 +1,250 @@
+"""
+N+1 and slow-query detection for development and tests.
+
+:class:`QueryInspector` wraps the database connections, records every executed
+statement with its duration and the project stack frame that issued it, and
+produces a report that:
+
+* groups statements by normalized shape (literals and ``IN`` lists collapsed),
+* flags shapes repeated at least ``QUERY_INSPECTOR_N_PLUS_ONE_THRESHOLD`` times
+  as likely N+1 queries, with the frame that issued them,
+* captures ``EXPLAIN`` output for statements slower than
+  ``QUERY_INSPECTOR_SLOW_MS`` milliseconds.
+
+:class:`QueryInspectorMiddleware` runs the inspector for requests that ask for it
+with ``?inspect_queries=1`` or an ``X-Inspect-Queries: 1`` header, logs the
+report and returns a summary in the ``X-Query-Report`` response header. It is
+only active when the ``QUERY_INSPECTOR_ENABLED`` setting is true (``DEBUG`` by
+default). Tests use the ``query_budget`` fixture from ``api/tests/conftest.py``.
+
+Classes:
+    QueryInspector: Context manager recording the queries executed inside it.
+    QueryInspectorMiddleware: Runs the inspector for opted-in requests.
+
+Functions:
+    normalize_sql: Reduces a statement to its shape.
+"""
+
+import json
+import logging
+import os
+import re
+import time
+import traceback
+from collections import defaultdict
+from contextlib import ExitStack
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?|[-\w'.]+)\s*,?)+\)", re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+# Frames from these files are skipped when looking for the origin of a query
+_IGNORED_PATHS = (
+    "/django/",
+    "/rest_framework/",
+    "/site-packages/",
+    __file__,
+    os.path.join("core", "metrics.py"),
+)
+
+
+def normalize_sql(sql):
+    """
+    Reduce a statement to its shape, so repeated queries compare equal.
+
+    :param sql: The SQL statement with ``%s`` placeholders.
+    :return: The statement with literals replaced by ``?`` and ``IN`` lists
+        collapsed to ``IN (...)``.
+    """
+    shape = _STRING.sub("?", sql)
+    shape = _IN_LIST.sub("IN (...)", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = shape.replace("%s", "?")
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def _origin():
+    """Returns ``file:line in function`` of the innermost project frame."""
+    for frame in reversed(traceback.extract_stack()):
+        if not any(path in frame.filename for path in _IGNORED_PATHS):
+            return f"{frame.filename}:{frame.lineno} in {frame.name}"
+    return "<unknown>"
+
+
+@dataclass
+class QueryRecord:
+    """A statement executed inside a :class:`QueryInspector`."""
+
+    alias: str
+    sql: str
+    params: object
+    duration: float
+    origin: str
+
+
+class QueryInspector:
+    """
+    Context manager recording the queries executed on every connection inside it.
+
+    :param n_plus_one_threshold: Repetitions of one shape flagged as N+1.
+    :param slow_ms: Duration above which a statement is explained.
+    """
+
+    def __init__(self, n_plus_one_threshold=None, slow_ms=None):
+        self.n_plus_one_threshold = n_plus_one_threshold or getattr(
+            settings, "QUERY_INSPECTOR_N_PLUS_ONE_THRESHOLD", 3
+        )
+        self.slow_ms = slow_ms if slow_ms is not None else getattr(
+            settings, "QUERY_INSPECTOR_SLOW_MS", 100
+        )
+        self.queries = []
+        self._stack = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(
+                connection.execute_wrapper(self._wrapper(connection.alias))
+            )
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def _wrapper(self, alias):
+        def record(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                self.queries.append(
+                    QueryRecord(
+                        alias, sql, params, time.perf_counter() - start, _origin()
+                    )
+                )
+
+        return record
+
+    @property
+    def total_time(self):
+        """Total time spent in the recorded statements, in seconds."""
+        return sum(query.duration for query in self.queries)
+
+    def n_plus_one(self):
+        """
+        Group repeated statements by shape.
+
+        :return: List of ``{"shape", "count", "origin"}`` dictionaries for shapes
+            repeated at least ``n_plus_one_threshold`` times, most repeated first.
+        """
+        shapes = defaultdict(list)
+        for query in self.queries:
+            shapes[normalize_sql(query.sql)].append(query)
+        return sorted(
+            (
+                {"shape": shape, "count": len(queries), "origin": queries[0].origin}
+                for shape, queries in shapes.items()
+                if len(queries) >= self.n_plus_one_threshold
+            ),
+            key=lambda item: -item["count"],
+        )
+
+    def slow_queries(self, explain=True):
+        """
+        List the statements slower than ``slow_ms``.
+
+        Must be called after the inspector exited, so the ``EXPLAIN`` statements
+        are not recorded themselves.
+
+        :param explain: Whether to capture the plan of each slow ``SELECT``.
+        :return: List of ``{"sql", "ms", "origin", "plan"}`` dictionaries.
+        """
+        slow = []
+        for query in self.queries:
+            ms = query.duration * 1000
+            if ms < self.slow_ms:
+                continue
+            plan = None
+            if explain and query.sql.lstrip().upper().startswith("SELECT"):
+                plan = self._explain(query)
+            slow.append(
+                {
+                    "sql": query.sql,
+                    "ms": round(ms, 2),
+                    "origin": query.origin,
+                    "plan": plan,
+                }
+            )
+        return slow
+
+    @staticmethod
+    def _explain(query):
+        connection = connections[query.alias]
+        prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(prefix + query.sql, query.params)
+                return "\n".join(" ".join(map(str, row)) for row in cursor.fetchall())
+        except Exception as e:  # pylint: disable=broad-except
+            return f"EXPLAIN failed: {e}"
+
+    def report(self, explain=True):
+        """Returns the full report as a dictionary."""
+        return {
+            "queries": len(self.queries),
+            "time_ms": round(self.total_time * 1000, 2),
+            "n_plus_one": self.n_plus_one(),
+            "slow": self.slow_queries(explain=explain),
+        }
+
+
+class QueryInspectorMiddleware:
+    """
+    Runs a :class:`QueryInspector` for requests that opt in.
+
+    The full report is logged, at WARNING level when N+1 or slow queries were
+    found. A summary is returned in the ``X-Query-Report`` response header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "QUERY_INSPECTOR_ENABLED", settings.DEBUG)
+
+    def __call__(self, request):
+        if not self.enabled or not (
+            request.GET.get("inspect_queries") == "1"
+            or request.headers.get("X-Inspect-Queries") == "1"
+        ):
+            return self.get_response(request)
+
+        with QueryInspector() as inspector:
+            response = self.get_response(request)
+        report = inspector.report()
+        level = logging.INFO
+        if report["n_plus_one"] or report["slow"]:
+            level = logging.WARNING
+        logger.log(
+            level, "Query report for %s %s: %s", request.method, request.path, report
+        )
+        response["X-Query-Report"] = json.dumps(
+            {
+                "queries": report["queries"],
+                "time_ms": report["time_ms"],
+                "n_plus_one": [
+                    {"count": item["count"], "origin": item["origin"]}
+                    for item in report["n_plus_one"]
+                ],
+                "slow": [
+                    {"ms": item["ms"], "origin": item["origin"]}
+                    for item in report["slow"]
+                ],
+            }
+        )
+        return response
@@ -0,0 +1,176 @@
+"""
+Pre-generated, cached OpenAPI schema.
+
+Generating the schema introspects every viewset and serializer, so it is done
+once: ``python manage.py render_openapi_schema`` writes it to
+``OPENAPI_SCHEMA_FILE`` at build time, stamped with a hash of the code
+(:func:`code_hash`). :func:`openapi_view` serves that file with ``ETag`` and
+``Last-Modified`` validators as long as the stamp matches the running code.
+Otherwise it renders the schema once and keeps it in the cache under the code
+hash, so a stale or missing file never serves an outdated schema.
+
+Swagger UI and ReDoc load the schema from this view (``SPEC_URL``). drf_yasg's
+generator and UI views are only imported when first used, keeping them out of
+worker boot.
+
+Functions:
+    code_hash: Identifies the version of the code the schema describes.
+    render_schema: Generates the schema as JSON bytes.
+    openapi_view: Serves the schema with HTTP validators.
+    ui_view: Creates a documentation UI view that loads drf_yasg on first use.
+"""
+
+import hashlib
+import json
+import os
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from drf_yasg import openapi
+
+API_INFO = openapi.Info(
+    title="One with the Force API",
+    default_version="v1",
+    description="API for Star Wars characters, films, and starships",
+)
+HASH_KEY = "x-code-hash"
+# The packages whose code shapes the schema
+SOURCE_PACKAGES = ("api", "core")
+# UI pages are cached until the code changes
+UI_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+@lru_cache(maxsize=None)
+def code_hash():
+    """
+    Identify the version of the code the schema describes.
+
+    :return: ``SCHEMA_VERSION`` from the environment if set (e.g. the commit
+        SHA of a release), otherwise a hash of the project's Python sources.
+    """
+    version = os.getenv("SCHEMA_VERSION")
+    if version:
+        return version
+    digest = hashlib.sha256()
+    for package in SOURCE_PACKAGES:
+        for path in sorted((Path(settings.BASE_DIR) / package).rglob("*.py")):
+            digest.update(str(path.relative_to(settings.BASE_DIR)).encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def render_schema():
+    """
+    Generate the OpenAPI schema.
+
+    :return: The schema as JSON bytes, stamped with :func:`code_hash`.
+    """
+    # pylint: disable=import-outside-toplevel
+    from drf_yasg.codecs import OpenAPICodecJson
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    generator = OpenAPISchemaGenerator(API_INFO)
+    schema = generator.get_schema(request=None, public=True)
+    schema[HASH_KEY] = code_hash()
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+def _etag(content):
+    return f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+
+
+@lru_cache(maxsize=4)
+def _read_file(path, mtime):
+    """Returns ``(content, etag)`` of `path` if it matches the code, else None."""
+    content = Path(path).read_bytes()
+    try:
+        stamp = json.loads(content).get(HASH_KEY)
+    except ValueError:
+        return None
+    return (content, _etag(content)) if stamp == code_hash() else None
+
+
+def _load():
+    """Returns ``(content, etag, last_modified)`` of the current schema."""
+    path = settings.OPENAPI_SCHEMA_FILE
+    try:
+        mtime = int(os.stat(path).st_mtime)
+    except OSError:
+        mtime = None
+    if mtime is not None:
+        loaded = _read_file(str(path), mtime)
+        if loaded is not None:
+            return (*loaded, mtime)
+
+    key = f"openapi-schema:{code_hash()}"
+    cached = cache.get(key)
+    if cached is None:
+        content = render_schema()
+        cached = (content, _etag(content), int(time.time()))
+        cache.set(key, cached, None)
+    return cached
+
+
+@require_safe
+def openapi_view(request):
+    """
+    Serve the OpenAPI schema as JSON.
+
+    Answers ``If-None-Match`` and ``If-Modified-Since`` with 304 Not Modified.
+    """
+    content, etag, last_modified = _load()
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        response = HttpResponse(content, content_type="application/json")
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = "public, max-age=0, must-revalidate"
+    return response
+
+
+def ui_view(renderer):
+    """
+    Create a Swagger UI or ReDoc view that imports drf_yasg on first use.
+
+    The returned view has a ``warm_up()`` method building the underlying view, which
+    :func:`core.warmup.warm_up` calls before workers are forked.
+
+    :param renderer: ``"swagger"`` or ``"redoc"``.
+    :return: The view function.
+    """
+    built = []
+
+    def warm_up():
+        if not built:
+            # pylint: disable=import-outside-toplevel
+            from drf_yasg.views import get_schema_view
+            from rest_framework import permissions
+
+            schema_view = get_schema_view(
+                API_INFO, public=True, permission_classes=[permissions.AllowAny]
+            )
+            built.append(
+                schema_view.with_ui(
+                    renderer,
+                    cache_timeout=UI_CACHE_TIMEOUT,
+                    cache_kwargs={"key_prefix": f"openapi-ui:{code_hash()}"},
+                )
+            )
+        return built[0]
+
+    def view(request, *args, **kwargs):
+        return warm_up()(request, *args, **kwargs)
+
+    # Like the drf_yasg view it stands for, left to DRF's own CSRF checks
+    view.csrf_exempt = True
+    view.warm_up = warm_up
+    return view
@@ -50,15 +50,31 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.metrics.MetricsMiddleware",
+    "api.warming.AccessStatsMiddleware",
+    "core.querycheck.QueryInspectorMiddleware",
+    "core.db.replicas.ReadYourWritesMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "api.profiling.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# N+1 and slow-query detection for requests sent with ?inspect_queries=1
+QUERY_INSPECTOR_ENABLED = os.getenv("QUERY_INSPECTOR_ENABLED", str(DEBUG)) == "True"
+QUERY_INSPECTOR_N_PLUS_ONE_THRESHOLD = int(
+    os.getenv("QUERY_INSPECTOR_N_PLUS_ONE_THRESHOLD", "3")
+)
+QUERY_INSPECTOR_SLOW_MS = float(os.getenv("QUERY_INSPECTOR_SLOW_MS", "100"))
+
+# On-demand profiling with ?profile=cprofile|alloc for staff or signed tokens
+PROFILE_TOKEN_MAX_AGE = int(os.getenv("PROFILE_TOKEN_MAX_AGE", "3600"))
+PROFILE_HISTORY_SIZE = int(os.getenv("PROFILE_HISTORY_SIZE", "50"))
+
 ROOT_URLCONF = "core.urls"
 
 TEMPLATES = [
@@ -85,29 +101,140 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 10,
 }
 
+# List counts: unfiltered lists of tables known to hold at least this many rows
+# get the planner's estimate as an approximate count; exact counts are cached for
+# EXACT_COUNT_CACHE_TTL seconds and table sizes for TABLE_SIZE_CACHE_TTL seconds.
+APPROXIMATE_COUNT_THRESHOLD = int(os.getenv("APPROXIMATE_COUNT_THRESHOLD", "10000"))
+EXACT_COUNT_CACHE_TTL = int(os.getenv("EXACT_COUNT_CACHE_TTL", "300"))
+TABLE_SIZE_CACHE_TTL = int(os.getenv("TABLE_SIZE_CACHE_TTL", "3600"))
+
 CELERY_BROKER_URL = "redis://redis:6379/0"
 CELERY_BEAT_SCHEDULE = {
     "fetch-swapi-data-every-day": {
         "task": "api.tasks.fetch_swapi_data_periodically",
         "schedule": 86400,  # every 24 hours
     },
+    "flush-votes": {
+        "task": "api.tasks.flush_votes_periodically",
+        "schedule": 5,  # every 5 seconds
+    },
+    "compact-change-log": {
+        "task": "api.tasks.compact_change_log_periodically",
+        "schedule": 86400,  # every 24 hours
+    },
+}
+# Background work that must not delay syncs runs on its own worker
+CELERY_TASK_ROUTES = {
+    "api.tasks.warm_caches_after_sync": {"queue": "low"},
+}
+
+# Tombstones of deleted objects stay in the change log for this many days
+CHANGE_LOG_TOMBSTONE_DAYS = int(os.getenv("CHANGE_LOG_TOMBSTONE_DAYS", "30"))
+
+# /api/stream/ events go through Redis pub/sub ("redis") or stay in process
+# ("memory"). Streams send a keepalive comment when idle and end after
+# STREAM_MAX_SECONDS, after which clients reconnect with Last-Event-ID.
+STREAM_BACKEND = os.getenv("STREAM_BACKEND", "redis")
+STREAM_REDIS_URL = os.getenv("STREAM_REDIS_URL", "redis://redis:6379/3")
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+STREAM_MAX_SECONDS = float(os.getenv("STREAM_MAX_SECONDS", "300"))
+
+# A sample of the API reads is counted per request signature in Redis ("redis")
+# or in process ("memory"). After a successful sync, the CACHE_WARMING_TOP_N
+# most requested signatures are replayed; replicas still behind the primary are
+# retried after CACHE_WARMING_RETRY_SECONDS.
+ACCESS_STATS_BACKEND = os.getenv("ACCESS_STATS_BACKEND", "redis")
+ACCESS_STATS_REDIS_URL = os.getenv("ACCESS_STATS_REDIS_URL", "redis://redis:6379/4")
+ACCESS_STATS_SAMPLE_RATE = float(os.getenv("ACCESS_STATS_SAMPLE_RATE", "0.1"))
+ACCESS_STATS_DAYS = int(os.getenv("ACCESS_STATS_DAYS", "2"))
+CACHE_WARMING_TOP_N = int(os.getenv("CACHE_WARMING_TOP_N", "200"))
+CACHE_WARMING_RETRY_SECONDS = int(os.getenv("CACHE_WARMING_RETRY_SECONDS", "60"))
+
+# Statistics read by a write are refreshed by a Celery task this many seconds
+# after it commits, once for all the writes meanwhile; 0 refreshes them inline
+STATS_REFRESH_DELAY = int(os.getenv("STATS_REFRESH_DELAY", "10"))
+
+# Votes are buffered in Redis ("redis") or in process memory ("memory")
+VOTE_BUFFER_BACKEND = os.getenv("VOTE_BUFFER_BACKEND", "redis")
+VOTE_REDIS_URL = os.getenv("VOTE_REDIS_URL", "redis://redis:6379/2")
+# Only one flush runs at a time; the lock expires if its holder dies mid-flush
+VOTE_FLUSH_LOCK_SECONDS = int(os.getenv("VOTE_FLUSH_LOCK_SECONDS", "300"))
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+# Shared Redis cache when CACHE_URL is set, per-process memory cache otherwise
+CACHE_URL = os.getenv("CACHE_URL")
+CACHES = {
+    "default": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+        if CACHE_URL
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    )
 }
 
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-# Databae configuration using individual environment variables
+# Databae configuration using individual environment variables. Connections are
+# pooled per process (core.db.backends.pooled_postgresql) unless DB_POOL=False,
+# and go back to the pool after every request. Statements running longer than
+# DB_STATEMENT_TIMEOUT milliseconds are cancelled (0 disables the limit).
+DB_POOL = os.getenv("DB_POOL", "True") == "True"
+DB_STATEMENT_TIMEOUT = int(os.getenv("DB_STATEMENT_TIMEOUT", "30000"))
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": (
+            "core.db.backends.pooled_postgresql"
+            if DB_POOL
+            else "django.db.backends.postgresql"
+        ),
         "NAME": os.getenv("DB_NAME"),
         "USER": os.getenv("DB_USER"),
         "PASSWORD": os.getenv("DB_PASSWORD"),
         "HOST": os.getenv("DB_HOST"),
         "PORT": os.getenv("DB_PORT"),
+        "CONN_MAX_AGE": 0,
+        "OPTIONS": {
+            "options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT}",
+        },
     }
 }
+if DB_POOL:
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "3600")),
+        "check_after": float(os.getenv("DB_POOL_CHECK_AFTER", "30")),
+    }
+
+# Read replicas, as a comma-separated list of HOST or HOST:PORT sharing the
+# primary's name and credentials. The API viewsets read from them, except for
+# clients pinned to the primary for REPLICA_STICKY_SECONDS after a write. Tests
+# run against the primary's test database through TEST MIRROR.
+DB_REPLICA_HOSTS = [
+    host.strip() for host in os.getenv("DB_REPLICA_HOSTS", "").split(",") if host.strip()
+]
+DATABASE_REPLICAS = []
+for index, replica in enumerate(DB_REPLICA_HOSTS, 1):
+    host, _, port = replica.partition(":")
+    alias = f"replica{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ["core.db.replicas.ReplicaRouter"]
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "5"))
 
 
 # Password validation
@@ -146,6 +273,14 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+# OpenAPI schema rendered at build time by `manage.py render_openapi_schema`
+# and served by core.schema.openapi_view; the Swagger UI and ReDoc load it too.
+OPENAPI_SCHEMA_FILE = Path(
+    os.getenv("OPENAPI_SCHEMA_FILE", BASE_DIR / "build" / "openapi.json")
+)
+SWAGGER_SETTINGS = {"SPEC_URL": "schema-json"}
+REDOC_SETTINGS = {"SPEC_URL": "schema-json"}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
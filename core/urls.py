@@ -17,29 +17,17 @@ Including another URLconf
 
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
 
-# Swagger schema view configuration
-schema_view = get_schema_view(
-    openapi.Info(
-        title="One with the Force API",
-        default_version="v1",
-        description="API for Star Wars characters, films, and starships",
-    ),
-    public=True,
-    permission_classes=[permissions.AllowAny],
-)
+from core.metrics import metrics_view
+from core.schema import openapi_view, ui_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("api.urls")),
-    # Swagger documentation views
-    path(
-        "swagger/",
-        schema_view.with_ui("swagger", cache_timeout=0),
-        name="schema-swagger-ui",
-    ),
-    path("redoc/", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"),
+    path("metrics", metrics_view, name="metrics"),
+    path("openapi.json", openapi_view, name="schema-json"),
+    # Swagger documentation views. The UI pages load the schema from
+    # `openapi.json`; responses are cached until the code changes.
+    path("swagger/", ui_view("swagger"), name="schema-swagger-ui"),
+    path("redoc/", ui_view("redoc"), name="schema-redoc"),
 ]
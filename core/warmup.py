@@ -0,0 +1,115 @@
+"""
+Application warm-up before worker processes are forked.
+
+Django and DRF build much of their state lazily, on the first request each
+worker serves: the URL resolvers, the fields of every serializer, the DRF
+renderer and parser classes, translation catalogs and compiled templates. With
+``preload_app`` gunicorn imports the application once in the master process;
+:func:`warm_up` then builds that state there, so every worker inherits it
+instead of paying for it on its first request.
+
+Finally the surviving objects are moved to the permanent generation with
+:func:`gc.freeze`. The garbage collector writes to every object it examines, so
+without this each collection in a worker would copy the pages it shares with
+the master.
+
+Functions:
+    warm_up: Builds the lazily created state of the application.
+"""
+
+import gc
+import logging
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import translation
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+# Templates rendered by the browsable API and the documentation pages
+TEMPLATES = (
+    "rest_framework/api.html",
+    "rest_framework/pagination/numbers.html",
+    "drf-yasg/swagger-ui.html",
+    "drf-yasg/redoc.html",
+)
+# Lazily imported DRF settings used on every request
+API_SETTINGS = (
+    "DEFAULT_RENDERER_CLASSES",
+    "DEFAULT_PARSER_CLASSES",
+    "DEFAULT_AUTHENTICATION_CLASSES",
+    "DEFAULT_PERMISSION_CLASSES",
+    "DEFAULT_THROTTLE_CLASSES",
+    "DEFAULT_CONTENT_NEGOTIATION_CLASS",
+    "DEFAULT_METADATA_CLASS",
+    "DEFAULT_VERSIONING_CLASS",
+    "DEFAULT_PAGINATION_CLASS",
+    "DEFAULT_FILTER_BACKENDS",
+    "EXCEPTION_HANDLER",
+)
+
+
+def _views(patterns):
+    """Yields the view callbacks of `patterns`, following includes."""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _views(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            yield pattern.callback
+
+
+def _warm_views(resolver):
+    """Builds the lazy parts of every routed view and its serializer.
+
+    :return: The number of serializers whose fields were built.
+    """
+    serializers = set()
+    for callback in _views(resolver.url_patterns):
+        if hasattr(callback, "warm_up"):
+            callback.warm_up()
+        serializer_class = getattr(
+            getattr(callback, "cls", None), "serializer_class", None
+        )
+        if serializer_class is not None and serializer_class not in serializers:
+            serializers.add(serializer_class)
+            # Building the fields introspects the model and its relations
+            _ = serializer_class().fields
+    return len(serializers)
+
+
+def warm_up(http=True, freeze=True):
+    """
+    Build the lazily created state of the application.
+
+    Nothing here queries the database or goes through the middleware, so warming
+    up records no metrics. Database connections opened by any of it are closed, as
+    a connection must not be shared with forked processes.
+
+    :param http: Whether to warm the URL resolvers, views, serializers, DRF
+        settings and templates; a Celery worker only needs the rest.
+    :param freeze: Whether to finish with :func:`gc.freeze`, which only helps
+        right before forking.
+    :return: The time warming up took, in seconds.
+    """
+    started = time.perf_counter()
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext("warm up")  # Loads the catalogs
+
+    if http:
+        resolver = get_resolver()
+        _ = resolver.reverse_dict  # Populates the resolvers for reverse()
+        count = _warm_views(resolver)
+        for name in API_SETTINGS:
+            getattr(api_settings, name)
+        for name in TEMPLATES:
+            get_template(name)
+        logger.debug("Warmed up %s serializers", count)
+
+    connections.close_all()
+    if freeze:
+        gc.freeze()
+    return time.perf_counter() - started
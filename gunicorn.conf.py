@@ -0,0 +1,67 @@
+"""
+Gunicorn configuration for the One With The Force API.
+
+Loaded automatically by ``gunicorn core.wsgi:application`` from the working
+directory. Settings can be overridden on the command line.
+
+By default the application is preloaded: the master imports and warms it up
+(:func:`core.warmup.warm_up`) once, and the workers it forks share that memory
+and serve their first request without building it again. Set
+``GUNICORN_PRELOAD=false`` to have each worker load the code itself, e.g. to
+pick up code changes with a ``HUP`` reload.
+"""
+
+import os
+import shutil
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", "1"))
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+
+def on_starting(server):
+    """
+    Start every run with an empty Prometheus multiprocess directory. The
+    directory must not be shared with other containers, see ``core.metrics``.
+    """
+    directory = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+def when_ready(server):
+    """Warm up the preloaded application before the first worker is forked."""
+    if server.cfg.preload_app:
+        from core.warmup import warm_up
+
+        server.log.info("Warmed up the application in %.0f ms", warm_up() * 1000)
+
+
+def post_worker_init(worker):
+    """
+    Warm up each worker before it accepts requests: the whole application
+    without preloading, and always the autocomplete index, which is read from
+    the database and so is not built before forking.
+    """
+    if not worker.cfg.preload_app:
+        from core.warmup import warm_up
+
+        warm_up(freeze=False)
+
+    from api import autocomplete
+
+    try:
+        for kind in autocomplete.INDEXED_FIELDS:
+            autocomplete.get_index(kind)
+    except Exception as error:  # pylint: disable=broad-except
+        # The index is built on the first lookup instead
+        worker.log.warning("Could not build the autocomplete index: %s", error)
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of a worker that exited."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,11 @@
+"""
+HTTP load generator for the deployed API.
+
+Run ``python -m loadtest --help`` for the options. The package only depends on
+``requests``, so it can run from the API image against a docker-compose stack.
+
+Modules:
+    histogram: Log-linear latency histogram with HdrHistogram-style percentiles.
+    scenarios: Traffic mixes and the operations they are made of.
+    runner: Closed-loop and open-loop drivers and the report.
+"""
@@ -0,0 +1,98 @@
+"""
+Command line entry point: ``python -m loadtest``.
+
+Examples::
+
+    # 32 concurrent clients as fast as the server allows
+    python -m loadtest --mix search-heavy --clients 32 --duration 60
+
+    # 200 operations/s with Poisson arrivals, latency corrected for queueing
+    python -m loadtest --mode open --rate 200 --arrival poisson --clients 64
+
+    # A custom mix, with the report also written as JSON
+    python -m loadtest --mix search=3,detail-fanout=1 --json report.json
+"""
+
+import argparse
+import json
+import sys
+
+from .runner import format_report, report_dict, run
+from .scenarios import MIXES, Client, Target, make_rng, parse_mix
+
+
+def _positive(kind):
+    def parse(value):
+        number = kind(value)
+        if number <= 0:
+            raise argparse.ArgumentTypeError(f"must be positive, got {value}")
+        return number
+
+    return parse
+
+
+def _mix(value):
+    try:
+        return parse_mix(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m loadtest",
+        description="Load test the One With The Force API over HTTP.",
+    )
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument(
+        "--mix",
+        type=_mix,
+        default="mixed",
+        help=f"One of {', '.join(MIXES)} or operation=weight,... (default: mixed)",
+    )
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed")
+    parser.add_argument(
+        "--clients",
+        type=_positive(int),
+        default=8,
+        help="Concurrent clients; in open mode, the maximum in flight",
+    )
+    parser.add_argument(
+        "--rate",
+        type=_positive(float),
+        default=50.0,
+        help="Operations per second in open mode",
+    )
+    parser.add_argument("--arrival", choices=["uniform", "poisson"], default="uniform")
+    parser.add_argument("--duration", type=_positive(float), default=30.0)
+    parser.add_argument(
+        "--warmup",
+        type=float,
+        default=5.0,
+        help="Seconds of load before measuring",
+    )
+    parser.add_argument(
+        "--think-time",
+        type=float,
+        default=0.0,
+        help="Pause between operations of a closed-loop client, in seconds",
+    )
+    parser.add_argument("--timeout", type=_positive(float), default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="Also write the report as JSON")
+    return parser
+
+
+def main(argv=None):
+    options = build_parser().parse_args(argv)
+    target = Target.discover(Client(options.url), make_rng(options.seed, "discover"))
+    stats = run(options, target)
+    print(format_report(stats, options))
+    if options.json:
+        with open(options.json, "w", encoding="utf-8") as file:
+            json.dump(report_dict(stats, options), file, indent=2)
+    return 1 if not stats.total().total else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
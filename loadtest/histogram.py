@@ -0,0 +1,104 @@
+"""
+Log-linear latency histogram in the spirit of HdrHistogram.
+
+Values are integers (the load generator records microseconds). Values below
+``2 * 10 ** significant_figures`` are counted exactly; larger values share a
+bucket with neighbours that differ by less than ``10 ** -significant_figures``
+of their magnitude, so percentiles keep the requested precision from
+microseconds to minutes in a few thousand counters.
+
+Classes:
+    Histogram: Records values and reports percentiles.
+"""
+
+import math
+
+DEFAULT_PERCENTILES = (50, 75, 90, 95, 99, 99.9, 99.99, 100)
+
+
+class Histogram:
+    """
+    Records non-negative integer values with bounded relative error.
+
+    :param significant_figures: Decimal digits of precision kept per value.
+    """
+
+    def __init__(self, significant_figures=3):
+        if not 1 <= significant_figures <= 5:
+            raise ValueError("significant_figures must be between 1 and 5")
+        self.significant_figures = significant_figures
+        self.sub_bucket_bits = math.ceil(math.log2(2 * 10**significant_figures))
+        self.sub_bucket_count = 1 << self.sub_bucket_bits
+        self.half_count = self.sub_bucket_count // 2
+        self.counts = {}
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.sum = 0
+
+    def _index(self, value):
+        if value < self.sub_bucket_count:
+            return value
+        shift = value.bit_length() - self.sub_bucket_bits
+        top = value >> shift
+        bucket_offset = (shift - 1) * self.half_count
+        return self.sub_bucket_count + bucket_offset + top - self.half_count
+
+    def _highest_equivalent(self, index):
+        """Returns the largest value counted in the bucket at `index`."""
+        if index < self.sub_bucket_count:
+            return index
+        offset = index - self.sub_bucket_count
+        shift = offset // self.half_count + 1
+        top = offset % self.half_count + self.half_count
+        return (top << shift) + (1 << shift) - 1
+
+    def record(self, value, count=1):
+        """Record `value` `count` times."""
+        value = max(0, int(value))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total += count
+        self.sum += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        """Add the values recorded by `other`, which must use the same precision."""
+        if other.significant_figures != self.significant_figures:
+            raise ValueError("Cannot merge histograms of different precision")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        self.sum += other.sum
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def mean(self):
+        return self.sum / self.total if self.total else 0.0
+
+    def percentile(self, percentile):
+        """
+        Return the value below or at which `percentile` percent of values fall.
+
+        Like HdrHistogram, reports the highest value equivalent to the bucket,
+        never more than the largest value recorded.
+
+        :param percentile: Between 0 and 100.
+        """
+        if not self.total:
+            return 0
+        target = max(1, math.ceil(self.total * percentile / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._highest_equivalent(index), self.max)
+        return self.max
+
+    def percentiles(self, percentiles=DEFAULT_PERCENTILES):
+        """Returns ``{percentile: value}`` for each of `percentiles`."""
+        return {percentile: self.percentile(percentile) for percentile in percentiles}
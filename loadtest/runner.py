@@ -0,0 +1,266 @@
+"""
+Closed-loop and open-loop load drivers.
+
+Closed loop: ``clients`` threads each run one operation after the other (with an
+optional think time), so throughput is whatever the server sustains and latency
+is measured from the moment each operation starts.
+
+Open loop: operations are scheduled at a fixed ``rate`` (uniform or Poisson
+arrivals) and executed by up to ``clients`` threads. Latency is measured from the
+*intended* start time, so when the server or the client pool falls behind, the
+queueing delay shows up in the percentiles instead of being hidden by
+coordinated omission.
+
+Samples taken during the warm-up are discarded. Each thread records into its
+own histograms, which are merged in the report.
+
+Classes:
+    Stats: Per-thread latency histograms and error counts.
+    Schedule: Thread-safe open-loop arrival schedule.
+
+Functions:
+    run: Drives the load and returns the merged :class:`Stats`.
+    format_report: Renders a :class:`Stats` as a text table.
+    report_dict: Renders a :class:`Stats` as a JSON-serializable dictionary.
+"""
+
+import threading
+import time
+from collections import Counter
+
+from .histogram import DEFAULT_PERCENTILES, Histogram
+from .scenarios import OPERATIONS, Client, RequestFailed, chooser, make_rng
+
+
+class Stats:
+    """
+    Latencies (in microseconds) and failures per operation.
+
+    Attributes:
+        latencies (dict): Histogram per operation name.
+        errors (dict): Counter of failure labels per operation name.
+        requests (int): HTTP requests sent during the measurement.
+        bytes (int): Response bytes received during the measurement.
+        duration (float): Length of the measurement in seconds.
+    """
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self.requests = 0
+        self.bytes = 0
+        self.duration = 0.0
+
+    def record(self, operation, micros, error=None):
+        self.latencies.setdefault(operation, Histogram()).record(micros)
+        if error is not None:
+            self.errors.setdefault(operation, Counter())[error] += 1
+
+    def merge(self, other):
+        for operation, histogram in other.latencies.items():
+            self.latencies.setdefault(operation, Histogram()).merge(histogram)
+        for operation, errors in other.errors.items():
+            self.errors.setdefault(operation, Counter()).update(errors)
+        self.requests += other.requests
+        self.bytes += other.bytes
+
+    def total(self):
+        """Returns the histogram of all operations together."""
+        histogram = Histogram()
+        for operation_histogram in self.latencies.values():
+            histogram.merge(operation_histogram)
+        return histogram
+
+
+class Schedule:
+    """
+    Hands out the intended start times of an open-loop run.
+
+    :param start: Monotonic time of the first arrival.
+    :param rate: Arrivals per second.
+    :param poisson: Use exponentially distributed gaps instead of fixed ones.
+    :param rng: Random generator for Poisson gaps.
+    """
+
+    def __init__(self, start, rate, poisson, rng):
+        self._next = start
+        self._rate = rate
+        self._poisson = poisson
+        self._rng = rng
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            intended = self._next
+            if self._poisson:
+                self._next += self._rng.expovariate(self._rate)
+            else:
+                self._next += 1 / self._rate
+            return intended
+
+
+def _worker(index, options, target, schedule, measure_from, stop_at, results):
+    rng = make_rng(options.seed, index)
+    choose = chooser(options.mix, rng)
+    client = Client(options.url, timeout=options.timeout)
+    stats = Stats()
+    # Requests and bytes sent before the measurement started
+    baseline = None
+    while True:
+        if schedule is None:
+            intended = time.monotonic()
+        else:
+            intended = schedule.next()
+            delay = intended - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        if intended >= stop_at:
+            break
+        if intended >= measure_from and baseline is None:
+            baseline = (client.requests, client.bytes)
+
+        name = choose()
+        error = None
+        try:
+            OPERATIONS[name](client, target, rng)
+        except RequestFailed as e:
+            error = e.label
+        except Exception as e:  # pylint: disable=broad-except
+            error = type(e).__name__
+        elapsed = time.monotonic() - intended
+        if intended >= measure_from:
+            stats.record(name, elapsed * 1_000_000, error)
+        if schedule is None and options.think_time:
+            time.sleep(options.think_time)
+
+    if baseline is not None:
+        stats.requests = client.requests - baseline[0]
+        stats.bytes = client.bytes - baseline[1]
+    results[index] = stats
+
+
+def run(options, target):
+    """
+    Drive the load described by `options` against `target`.
+
+    :param options: Namespace with ``url``, ``mix``, ``mode`` (``closed`` or
+        ``open``), ``clients``, ``rate``, ``arrival``, ``duration``, ``warmup``,
+        ``think_time``, ``timeout`` and ``seed``.
+    :param target: :class:`~loadtest.scenarios.Target` sampled beforehand.
+    :return: The merged :class:`Stats` of all threads.
+    """
+    start = time.monotonic()
+    measure_from = start + options.warmup
+    stop_at = measure_from + options.duration
+    schedule = None
+    if options.mode == "open":
+        poisson = options.arrival == "poisson"
+        schedule = Schedule(start, options.rate, poisson, make_rng(options.seed, -1))
+
+    results = [None] * options.clients
+    threads = [
+        threading.Thread(
+            target=_worker,
+            args=(index, options, target, schedule, measure_from, stop_at, results),
+            daemon=True,
+        )
+        for index in range(options.clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = Stats()
+    for result in results:
+        if result is not None:
+            stats.merge(result)
+    stats.duration = options.duration
+    return stats
+
+
+def _row(name, histogram, errors, duration):
+    ms = {p: histogram.percentile(p) / 1000 for p in (50, 90, 99, 99.9)}
+    return (
+        f"{name:<15}{histogram.total:>9}{sum(errors.values()):>8}"
+        f"{histogram.total / duration:>10.1f}{ms[50]:>10.1f}{ms[90]:>10.1f}"
+        f"{ms[99]:>10.1f}{ms[99.9]:>10.1f}{(histogram.max or 0) / 1000:>10.1f}"
+    )
+
+
+def format_report(stats, options):
+    """Renders `stats` as a text table with latencies in milliseconds."""
+    duration = stats.duration or 1
+    total = stats.total()
+    all_errors = Counter()
+    for errors in stats.errors.values():
+        all_errors.update(errors)
+    load = (
+        f"{options.clients} clients, closed loop"
+        if options.mode == "closed"
+        else f"open loop at {options.rate:g}/s ({options.arrival}), "
+        f"up to {options.clients} clients"
+    )
+    lines = [
+        f"{options.url}: {load}, "
+        f"{options.duration:g}s after {options.warmup:g}s warm-up",
+        f"Operations/s: {total.total / duration:.1f}  "
+        f"Requests/s: {stats.requests / duration:.1f}  "
+        f"Received: {stats.bytes / duration / 1024:.1f} KiB/s",
+        "",
+        f"{'operation':<15}{'count':>9}{'errors':>8}{'ops/s':>10}"
+        f"{'p50':>10}{'p90':>10}{'p99':>10}{'p99.9':>10}{'max':>10}",
+    ]
+    for name in sorted(stats.latencies):
+        lines.append(
+            _row(name, stats.latencies[name], stats.errors.get(name, {}), duration)
+        )
+    lines.append(_row("all", total, all_errors, duration))
+    if all_errors:
+        lines.append("")
+        lines.append(
+            "Errors: " + ", ".join(f"{label} x{n}" for label, n in all_errors.items())
+        )
+    lines.append("")
+    lines.append("Percentile distribution (ms):")
+    for percentile, value in total.percentiles().items():
+        lines.append(f"{percentile:>10g}%  {value / 1000:>10.3f}")
+    return "\n".join(lines)
+
+
+def _histogram_dict(histogram, errors=None):
+    return {
+        "count": histogram.total,
+        "errors": dict(errors or {}),
+        "mean_ms": round(histogram.mean / 1000, 3),
+        "min_ms": (histogram.min or 0) / 1000,
+        "max_ms": (histogram.max or 0) / 1000,
+        "percentiles_ms": {
+            str(percentile): value / 1000
+            for percentile, value in histogram.percentiles(DEFAULT_PERCENTILES).items()
+        },
+    }
+
+
+def report_dict(stats, options):
+    """Renders `stats` and the load parameters as a JSON-serializable dictionary."""
+    duration = stats.duration or 1
+    total = stats.total()
+    return {
+        "url": options.url,
+        "mode": options.mode,
+        "mix": options.mix,
+        "clients": options.clients,
+        "rate": options.rate if options.mode == "open" else None,
+        "arrival": options.arrival if options.mode == "open" else None,
+        "duration": options.duration,
+        "warmup": options.warmup,
+        "operations_per_second": total.total / duration,
+        "requests_per_second": stats.requests / duration,
+        "bytes_per_second": stats.bytes / duration,
+        "all": _histogram_dict(total),
+        "operations": {
+            name: _histogram_dict(histogram, stats.errors.get(name))
+            for name, histogram in stats.latencies.items()
+        },
+    }
@@ -0,0 +1,253 @@
+"""
+Traffic mixes for the load generator.
+
+An operation is a function ``operation(client, target, rng)`` issuing one or
+more requests through a :class:`Client`; its latency is measured as a whole, so
+``detail-fanout`` reports the time to load a film and its cast. A mix maps
+operation names to relative weights.
+
+Classes:
+    Client: Thin ``requests`` wrapper counting requests, bytes and failures.
+    Target: IDs and names sampled from the API, used to build requests.
+
+Functions:
+    parse_mix: Parses ``name=weight,...`` or a predefined mix name.
+    chooser: Picks operations from a mix by weight.
+    make_rng: Creates the random generator of a worker.
+"""
+
+import random
+
+import requests
+
+RESOURCES = {"characters": "name", "films": "title", "starships": "name"}
+PAGE_SIZE = 10
+
+
+class RequestFailed(Exception):
+    """Raised when a request fails; `label` is the status code or error class."""
+
+    def __init__(self, label):
+        super().__init__(label)
+        self.label = label
+
+
+class Client:
+    """
+    A keep-alive HTTP session against the API.
+
+    :param base_url: Root of the deployment, e.g. ``http://localhost:8000``.
+    :param timeout: Request timeout in seconds.
+    """
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.requests = 0
+        self.bytes = 0
+
+    def request(self, method, path, **kwargs):
+        """
+        Send a request and return the decoded JSON body, if any.
+
+        :raises RequestFailed: On connection errors and 4xx/5xx responses.
+        """
+        self.requests += 1
+        try:
+            response = self.session.request(
+                method, self.base_url + path, timeout=self.timeout, **kwargs
+            )
+        except requests.RequestException as e:
+            raise RequestFailed(type(e).__name__) from e
+        self.bytes += len(response.content)
+        if response.status_code >= 400:
+            raise RequestFailed(str(response.status_code))
+        if response.content and response.headers.get("Content-Type", "").startswith(
+            "application/json"
+        ):
+            return response.json()
+        return None
+
+    def get(self, path, **params):
+        return self.request("GET", path, params=params or None)
+
+
+class Target:
+    """
+    Samples of the data behind the API, collected before the run.
+
+    Attributes:
+        counts (dict): Number of rows per resource.
+        ids (dict): Sampled primary keys per resource.
+        terms (list): Search terms taken from sampled names and titles.
+    """
+
+    def __init__(self, counts, ids, terms):
+        self.counts = counts
+        self.ids = ids
+        self.terms = terms
+
+    @classmethod
+    def discover(cls, client, rng, pages=5):
+        """
+        Sample the API through `client`.
+
+        Reads the first page of every resource for its count, then `pages`
+        random pages of 100 rows for IDs and search terms.
+        """
+        counts, ids, terms = {}, {}, set()
+        for resource, label in RESOURCES.items():
+            first = client.get(f"/api/{resource}/", page_size=100)
+            counts[resource] = first["count"]
+            rows = list(first["results"])
+            last_page = max(1, -(-first["count"] // 100))
+            for page in rng.sample(range(2, last_page + 1), min(pages, last_page - 1)):
+                response = client.get(f"/api/{resource}/", page_size=100, page=page)
+                rows.extend(response["results"])
+            ids[resource] = [row["id"] for row in rows]
+            terms.update(word for row in rows for word in row[label].split()[:2])
+        if not ids["characters"] or not ids["films"]:
+            raise ValueError("The API has no data; run fetch_swapi_data first")
+        return cls(counts, ids, sorted(terms))
+
+
+def search(client, target, rng):
+    resource = rng.choice(list(RESOURCES))
+    client.get(f"/api/{resource}/", search=rng.choice(target.terms))
+
+
+def list_popular(client, target, rng):
+    if rng.random() < 0.5:
+        client.get("/api/characters/", ordering="-film_count")
+    else:
+        client.get("/api/starships/", ordering="-pilot_count")
+
+
+def deep_page(client, target, rng):
+    resource = rng.choice(list(RESOURCES))
+    last_page = max(1, -(-target.counts[resource] // PAGE_SIZE))
+    client.get(f"/api/{resource}/", page=rng.randint(last_page // 2 + 1, last_page))
+
+
+def detail(client, target, rng):
+    resource = rng.choice(list(RESOURCES))
+    client.get(f"/api/{resource}/{rng.choice(target.ids[resource])}/")
+
+
+def detail_fanout(client, target, rng):
+    film = client.get(f"/api/films/{rng.choice(target.ids['films'])}/")
+    for character_id in film["characters"][:10]:
+        client.get(f"/api/characters/{character_id}/")
+    for starship_id in film["starships"][:5]:
+        client.get(f"/api/starships/{starship_id}/")
+
+
+def write(client, target, rng):
+    suffix = rng.getrandbits(32)
+    character = client.request(
+        "POST",
+        "/api/characters/",
+        json={
+            "name": f"Load test {suffix}",
+            "birth_year": "19BBY",
+            "eye_color": "blue",
+            "gender": "male",
+            "hair_color": "blond",
+            "height": "172",
+            "mass": "77",
+            "skin_color": "fair",
+            "homeworld": "https://swapi.dev/api/planets/1/",
+            "species": [],
+            "vehicles": [],
+            "starships": rng.sample(
+                target.ids["starships"], min(2, len(target.ids["starships"]))
+            ),
+            "created": "2014-12-09T13:50:51.644000Z",
+            "edited": "2014-12-20T21:17:56.891000Z",
+            "url": f"https://swapi.dev/api/people/{suffix}/",
+        },
+    )
+    path = f"/api/characters/{character['id']}/"
+    client.request("PATCH", path, json={"edited": "2024-01-01T00:00:00Z"})
+    client.request("DELETE", path)
+
+
+def vote(client, target, rng):
+    film_id = rng.choice(target.ids["films"])
+    client.request(
+        "POST",
+        f"/api/films/{film_id}/vote/",
+        headers={"X-Client-Id": f"loadtest-{rng.getrandbits(32)}"},
+    )
+
+
+OPERATIONS = {
+    "search": search,
+    "list": list_popular,
+    "deep-page": deep_page,
+    "detail": detail,
+    "detail-fanout": detail_fanout,
+    "write": write,
+    "vote": vote,
+}
+
+MIXES = {
+    "search-heavy": {"search": 70, "list": 20, "detail": 10},
+    "deep-paging": {"deep-page": 80, "list": 20},
+    "detail-fanout": {"detail-fanout": 80, "detail": 20},
+    "writes": {"write": 50, "vote": 30, "detail": 20},
+    "mixed": {
+        "search": 30,
+        "list": 15,
+        "deep-page": 10,
+        "detail": 25,
+        "detail-fanout": 10,
+        "write": 5,
+        "vote": 5,
+    },
+}
+
+
+def parse_mix(value):
+    """
+    Parse a traffic mix.
+
+    :param value: A name from :data:`MIXES` or ``operation=weight,...``.
+    :return: Dictionary of operation names to positive weights.
+    :raises ValueError: For unknown names, operations or invalid weights.
+    """
+    if value in MIXES:
+        return dict(MIXES[value])
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(
+                f"Unknown mix or operation {name!r}; choose from "
+                f"{', '.join(MIXES)} or {', '.join(OPERATIONS)}"
+            )
+        try:
+            mix[name] = float(weight or 1)
+        except ValueError as e:
+            raise ValueError(f"Invalid weight for {name!r}: {weight!r}") from e
+        if mix[name] <= 0:
+            raise ValueError(f"Weight of {name!r} must be positive")
+    return mix
+
+
+def chooser(mix, rng):
+    """Returns a function picking operation names from `mix` by weight."""
+    names = list(mix)
+    weights = [mix[name] for name in names]
+
+    def choose():
+        return rng.choices(names, weights)[0]
+
+    return choose
+
+
+def make_rng(seed, worker):
+    """Returns an independent random generator for `worker`."""
+    return random.Random(f"{seed}-{worker}")